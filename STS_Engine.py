@@ -18,11 +18,14 @@ from datetime import datetime
 from functools import partial
 from concurrent.futures import ThreadPoolExecutor # [V5.3] 추가
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials
 import traceback
 import pytz
 # 커스텀 지표 모듈 임포트
 import indicators_sts as ind 
+from metrics import REGISTRY, executor_gauges, start_metrics_server
+from loop_monitor import MONITOR
+from analyzer_pool import AnalyzerPool, default_process_count
 import sys
 sys.setrecursionlimit(1000)
 
@@ -32,7 +35,9 @@ sys.setrecursionlimit(1000)
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
 DATABASE_URL = os.environ.get('DATABASE_URL')
 FIREBASE_ADMIN_SDK_JSON_STR = os.environ.get('FIREBASE_ADMIN_SDK_JSON')
-WS_URI = "wss://socket.polygon.io/stocks"
+# 로컬 시뮬레이터(polygon_sim.py)로 부하 테스트할 때 바꿔 끼움
+WS_URI = os.environ.get('POLYGON_WS_URI', "wss://socket.polygon.io/stocks")
+POLYGON_REST_BASE = os.environ.get('POLYGON_REST_BASE', 'https://api.polygon.io')
 
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
 r = redis.from_url(REDIS_URL)
@@ -68,6 +73,13 @@ MODEL_FILE = "sts_xgboost_model.json"
 AI_PROB_THRESHOLD = 0.85      
 ATR_TRAIL_MULT = 1.5        
 HARD_STOP_PCT = 0.015         
+STS_BOT_MIN_READY_TICKS = 300  # Warmup Gate 최소 틱 수
+
+# 지표 계산 실행 방식 (analyzer_pool.py)
+# - inline : 이벤트 루프에서 틱마다 get_metrics (기본)
+# - process: 종목별 analyzer를 워커 프로세스에 두고, 메인 루프는 틱 전달 + 판단만
+STS_EXEC_MODE = os.environ.get('STS_EXEC_MODE', 'inline')
+STS_ANALYZER_PROCS = int(os.environ.get('STS_ANALYZER_PROCS', '0')) or default_process_count()
 
 # Logging
 TRADE_LOG_FILE = "sts_trade_log_v5.csv"
@@ -80,6 +92,15 @@ GC_TTL = 300
 
 DB_WORKER_POOL = ThreadPoolExecutor(max_workers=10) 
 NOTI_WORKER_POOL = ThreadPoolExecutor(max_workers=5)
+
+# 내부 상태 메트릭 (metrics.py - worker.py / 단독 실행 모두 /metrics로 노출)
+executor_gauges('db_worker', DB_WORKER_POOL)
+executor_gauges('noti_worker', NOTI_WORKER_POOL)
+PRODUCER_DROPPED = REGISTRY.counter('sts_producer_dropped_total', 'Messages dropped by the drop-oldest producer')
+GET_METRICS_SECONDS = REGISTRY.histogram(
+    'sts_get_metrics_seconds', 'MicrostructureAnalyzer.get_metrics duration', ('caller',))
+BATCH_TICKS = REGISTRY.histogram(
+    'sts_batch_ticks', 'Ticks per ticker per frame (one evaluation each)', buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
 db_pool = None
 
 # ==============================================================================
@@ -349,115 +370,19 @@ def log_signal_to_db(ticker, price, score, entry=0, tp=0, sl=0, strategy=""):
     finally:
         if conn: db_pool.putconn(conn)
 
-# [STS_Engine.py 내부]
-
-def _send_fcm_sync(ticker, price, probability_score, entry=None, tp=None, sl=None):
-    # 1. Firebase 초기화 체크
-    if not firebase_admin._apps:
-        # print(...) # 로그 생략
-        return
-
-    # 🟢 [헬퍼] 안전한 타입 변환
-    def sanitize(val):
-        try:
-            if hasattr(val, 'item'): return val.item()
-            return val
-        except: return 0
-
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT token, min_score FROM fcm_tokens")
-        subscribers = cursor.fetchall()
-        cursor.close()
-        
-        if not subscribers:
-            db_pool.putconn(conn)
-            return
-
-        # 🟢 [데이터 정제]
-        price = sanitize(price)
-        score_val = sanitize(probability_score)
-        entry = sanitize(entry)
-        tp = sanitize(tp)
-
-        # 알림 내용 구성
-        if entry and tp:
-            noti_title = f"BUY {ticker} ({score_val})"
-            noti_body = f"Entry: ${float(entry):.3f}\nTP: ${float(tp):.3f}"
-        else:
-            noti_title = f"SCAN {ticker}"
-            noti_body = f"Current: ${float(price):.4f}"
-
-        # 🟢 [수정 핵심] Data Payload는 모두 문자열이어야 함 (안전하게 str로 감싸기)
-        data_payload = {
-            'type': 'signal', 
-            'ticker': str(ticker), 
-            'price': str(price), 
-            'score': str(score_val),
-            'click_action': 'FLUTTER_NOTIFICATION_CLICK' # 앱 연동을 위해 권장
-        }
-        
-        print(f"🔔 [FCM] Sending: {noti_title}...", flush=True)
-
-        success_count = 0
-        failed_tokens = []
-        
-        # 🟢 [수정 핵심] 메시지 객체 단순화 (Config 제거 테스트)
-        # 만약 이래도 에러가 나면 android=, apns= 옵션을 아예 빼고 보내보세요.
-        for row in subscribers:
-            token = row[0]
-            user_min_score = row[1] if row[1] is not None else 0 
-            
-            if score_val < user_min_score: continue
-
-            try:
-                message = messaging.Message(
-                    token=token,
-                    notification=messaging.Notification(title=noti_title, body=noti_body),
-                    data=data_payload
-                    # ⚠️ [중요] 아래 설정들이 재귀 에러의 주범인 경우가 많습니다.
-                    # 에러가 지속되면 아래 주석 처리된 부분을 삭제하고 기본 알림만 보내세요.
-                    ,
-                    android=messaging.AndroidConfig(
-                        priority='high',
-                        notification=messaging.AndroidNotification(sound='default')
-                    ),
-                    apns=messaging.APNSConfig(
-                        payload=messaging.APNSPayload(
-                            aps=messaging.Aps(sound='default')
-                        )
-                    )
-                )
-                messaging.send(message)
-                success_count += 1
-            except Exception as e:
-                # 에러 로그가 너무 길어지지 않게 짧게 출력
-                print(f"❌ [FCM Fail] Token Error: {str(e)[:50]}...", flush=True)
-                if "registration-token-not-registered" in str(e): 
-                    failed_tokens.append(token)
-        
-        # (이하 토큰 정리 로직 동일)
-        if failed_tokens:
-            c = conn.cursor()
-            c.execute("DELETE FROM fcm_tokens WHERE token = ANY(%s)", (failed_tokens,))
-            conn.commit()
-            c.close()
-
-    except Exception as e:
-        print(f"❌ [FCM Critical] {e}", flush=True)
-        if conn: conn.rollback()
-    finally:
-        if conn: db_pool.putconn(conn)
+def release_db_connection(conn):
+    """get_db_connection()으로 빌린 커넥션 반납 (worker.py 등 외부 모듈용)"""
+    if conn and db_pool: db_pool.putconn(conn)
 
 # [STS_Engine.py]
 
-async def send_fcm_notification(ticker, price, probability_score, entry=None, tp=None, sl=None):
+async def send_fcm_notification(ticker, price, probability_score, entry=None, tp=None, sl=None, trace=None):
     """
     [역할 분리] 엔진은 직접 보내지 않고 Redis 'fcm_queue'에 작업 지시서(JSON)만 넣습니다.
+    trace: 시세 수신부터의 구간 타임스탬프 (tracing.py) - 적재 시각을 더해서 notifier로 넘김
     """
     try:
+        enqueue_ts = time.time()
         # 1. 보낼 데이터 포장 (무조건 문자열로 변환하여 안전하게)
         payload = {
             'ticker': str(ticker),
@@ -465,7 +390,8 @@ async def send_fcm_notification(ticker, price, probability_score, entry=None, tp
             'score': str(int(probability_score)),
             'entry': str(entry) if entry else "",
             'tp': str(tp) if tp else "",
-            'timestamp': time.time()
+            'timestamp': enqueue_ts,
+            'trace': {**(trace or {}), 'enqueue_ts': enqueue_ts}
         }
 
         # 2. Redis 큐에 직렬화해서 밀어넣기 (0.001초 소요)
@@ -812,7 +738,7 @@ class TargetSelector:
             target_date = (today - datetime.timedelta(days=offset)).strftime('%Y-%m-%d')
             
             # Grouped Daily Bars (해당 날짜의 전 종목 데이터)
-            url = f"https://api.polygon.io/v2/aggs/grouped/locale/us/market/stocks/{target_date}?adjusted=true&apiKey={self.api_key}"
+            url = f"{POLYGON_REST_BASE}/v2/aggs/grouped/locale/us/market/stocks/{target_date}?adjusted=true&apiKey={self.api_key}"
             
             with httpx.Client(timeout=30.0) as client:
                 resp = client.get(url)
@@ -847,7 +773,7 @@ class TargetSelector:
         # print("🌍 [Selector] API Snapshot Polling...", flush=True) # 로그 너무 많으면 주석 처리
         try:
             # 유료 플랜이므로 타임아웃 짧게(5초) 잡고 빠르게 치고 빠짐
-            url = f"https://api.polygon.io/v2/snapshot/locale/us/markets/stocks/tickers?apiKey={self.api_key}"
+            url = f"{POLYGON_REST_BASE}/v2/snapshot/locale/us/markets/stocks/tickers?apiKey={self.api_key}"
             
             with httpx.Client(timeout=10.0) as client:
                 resp = client.get(url)
@@ -1067,7 +993,7 @@ class TargetSelector:
 
 # [V7.1] SniperBot (Hard Kill Filter, Strict Fast-Track, Emergency Exit 적용)
 class SniperBot:
-    def __init__(self, ticker, logger, selector, model_bytes):
+    def __init__(self, ticker, logger, selector, model_bytes, remote=None):
         self.ticker = ticker
         self.logger = logger
         self.selector = selector
@@ -1094,11 +1020,16 @@ class SniperBot:
                 print(f"⚠️ {ticker}: Model Load Error - {e}")
 
         self.analyzer = MicrostructureAnalyzer()
+        # process 모드: 틱/지표 계산은 AnalyzerPool 쪽에서 (여기 analyzer는 비어 있음)
+        self.remote = remote
+        self.remote_ticks = 0
+        self.last_metrics = None
         
         self.state = "WATCHING"
         self.vwap = 0.0
         self.atr = 0.05
         self.position = {}
+        self.trace = None   # 지금 처리 중인 틱의 지연 추적 정보 (fire 시 알림에 실어 보냄)
         self.prob_history = deque(maxlen=5)
         self.regime_p = 0.5  
         
@@ -1161,6 +1092,15 @@ class SniperBot:
 
 # 기존 _calculate_regime_p 함수가 끝나는 곳 다음에 붙여넣으세요.
 
+    def tick_count(self):
+        return self.remote_ticks if self.remote else len(self.analyzer.raw_ticks)
+
+    def current_metrics(self):
+        """랭킹용 지표 (process 모드는 마지막으로 받은 값)"""
+        if self.remote: return self.last_metrics
+        with GET_METRICS_SECONDS.time(caller='focus'):
+            return self.analyzer.get_metrics()
+
     def is_ready(self):
         """[New] 데이터가 충분히 쌓였는지 검증 (Warmup Gate)"""
         # 1. 시간 경과 확인 (봇 생성 후 최소 5초 경과)
@@ -1168,7 +1108,7 @@ class SniperBot:
             return False
 
         # 2. 데이터 개수 확인 (최소 300틱 이상)
-        if len(self.analyzer.raw_ticks) < 300:
+        if self.tick_count() < STS_BOT_MIN_READY_TICKS:
             return False
             
         # 3. 필수 지표 계산 여부
@@ -1231,21 +1171,49 @@ class SniperBot:
         return True, "PASS"
 
     # [교체] 기존 update_dashboard_db 삭제 후 이 코드로 대체
-    def update_dashboard_db(self, tick_data, quote_data, agg_data):
-        self.analyzer.update_tick(tick_data, quote_data)
-        
+    def update_dashboard_db(self, tick_data, quote_data, agg_data, trace=None):
+        self.update_batch([(tick_data, quote_data, agg_data, trace)])
+
+    def update_batch(self, ticks):
+        """
+        같은 프레임에 들어온 이 종목 틱들을 순서대로 전부 반영하고, 지표 계산/판단은 1번만
+        ticks: [(tick_data, quote_data, agg_data, trace), ...] (quote/agg는 그 틱 시점 값)
+        """
+        for tick_data, quote_data, agg_data, trace in ticks:
+            self.analyzer.update_tick(tick_data, quote_data)
+            self.ingest(tick_data, agg_data, trace)
+
+        # 1. Warmup Gate (준비 안됐으면 계산 중단 및 리턴)
+        if not self._warmup_gate(): return
+
+        with GET_METRICS_SECONDS.time(caller='tick'):
+            m = self.analyzer.get_metrics()
+        self.evaluate(m)
+
+    def ingest(self, tick_data, agg_data, trace=None):
+        """틱 1건의 메인 루프 쪽 상태 (VWAP, 지연 추적)"""
+        self.trace = trace
         if agg_data and agg_data.get('vwap'): self.vwap = agg_data.get('vwap')
         if self.vwap == 0 and tick_data.get('p'): self.vwap = tick_data['p']
 
-        # 1. Warmup Gate (준비 안됐으면 계산 중단 및 리턴)
+    def on_remote_metrics(self, m, n_ticks):
+        """process 모드: 워커 프로세스가 배치 처리 후 돌려준 지표로 판단"""
+        self.remote_ticks = n_ticks
+        if not self._warmup_gate(): return
+        self.evaluate(m)
+
+    def _warmup_gate(self):
         if not self.is_ready():
             # 상태를 WARM_UP으로 찍어서 DB에 알림 (모니터링용)
             if self.state != "WARM_UP":
                  self.state = "WARM_UP"
-            return 
+            return False
+        return True
 
-        m = self.analyzer.get_metrics()
+    def evaluate(self, m):
+        """지표 -> AI/ERS 점수 -> DB 반영 -> 상태 머신 (inline/process 공통)"""
         if not m or m.get('tick_speed', 0) == 0: return 
+        self.last_metrics = m
         
         if m.get('atr') and m['atr'] > 0: self.atr = m['atr']
         else: self.atr = max(self.selector.get_atr(self.ticker), m['last_price'] * 0.01)
@@ -1340,13 +1308,15 @@ class SniperBot:
         try:
             to_ts = int(time.time() * 1000)
             from_ts = to_ts - (180 * 1000) 
-            url = f"https://api.polygon.io/v2/aggs/ticker/{self.ticker}/range/1/second/{from_ts}/{to_ts}"
+            url = f"{POLYGON_REST_BASE}/v2/aggs/ticker/{self.ticker}/range/1/second/{from_ts}/{to_ts}"
             params = {"adjusted": "true", "sort": "asc", "limit": 500, "apiKey": POLYGON_API_KEY}
             async with httpx.AsyncClient() as client:
                 resp = await client.get(url, params=params, timeout=5.0)
                 if resp.status_code == 200:
                     data = resp.json()
-                    if 'results' in data: self.analyzer.inject_history(data['results'])
+                    if 'results' in data:
+                        if self.remote: self.remote.inject_history(self.ticker, data['results'])
+                        else: self.analyzer.inject_history(data['results'])
                     print(f"✅ [Warmup] {self.ticker} Ready!", flush=True)
         except Exception as e: 
             print(f"❌ [Warmup] Failed: {e}", flush=True)
@@ -1372,8 +1342,9 @@ class SniperBot:
                     entry=price, tp=tp_price, sl=sl_price, strategy=strategy)
         )
         
+        trace = {**(self.trace or {}), 'decision_ts': time.time()}
         asyncio.create_task(send_fcm_notification(
-            self.ticker, price, int(prob*100), entry=price, tp=tp_price, sl=sl_price
+            self.ticker, price, int(prob*100), entry=price, tp=tp_price, sl=sl_price, trace=trace
         ))
         
         self.logger.log_trade({
@@ -1438,6 +1409,23 @@ class STSPipeline:
         
         # 수신과 처리를 분리할 큐 생성
         self.msg_queue = asyncio.Queue(maxsize=100000)
+        self.frame_ticks = defaultdict(list)   # 프레임 안에서 종목별로 모은 틱 (flush_ticks에서 처리)
+
+        # process 모드면 지표 계산을 워커 프로세스로 (이벤트 루프 안에서 생성되어야 함)
+        self.analyzer_pool = None
+        if STS_EXEC_MODE == 'process':
+            self.analyzer_pool = AnalyzerPool(
+                STS_ANALYZER_PROCS, self._on_remote_metrics,
+                asyncio.get_running_loop(), STS_BOT_MIN_READY_TICKS
+            )
+
+        # 큐 깊이 / 봇 수는 스크레이프 시점에 읽음
+        REGISTRY.gauge('sts_msg_queue_depth', 'STSPipeline.msg_queue size').set_function(self.msg_queue.qsize)
+        bots = REGISTRY.gauge('sts_bots', 'Sniper bots by stage', ('stage',))
+        bots.set_function(lambda: len(self.snipers), stage='staged')
+        bots.set_function(
+            lambda: sum(1 for b in list(self.snipers.values()) if getattr(b, 'is_active_target', False)),
+            stage='active')
         
         # 🟢 [수정됨] shared_model 삭제 -> model_bytes 추가
         # 이유: 모델 객체를 공유하면 충돌이 나므로, 바이트(RAM) 데이터로 들고 있다가 복제해서 씁니다.
@@ -1557,53 +1545,65 @@ class STSPipeline:
                 try:
                     self.msg_queue.get_nowait()
                     self.msg_queue.put_nowait(msg)
+                    PRODUCER_DROPPED.inc()
                 except:
                     pass
 
+    # 봇 생성/삭제 + 틱 전달 (inline: 바로 계산 / process: 워커 프로세스로)
+    def add_sniper(self, ticker):
+        bot = SniperBot(ticker, self.logger, self.selector, self.model_bytes, remote=self.analyzer_pool)
+        if self.analyzer_pool: self.analyzer_pool.attach(ticker)
+        self.snipers[ticker] = bot
+        return bot
+
+    def remove_sniper(self, ticker):
+        self.snipers.pop(ticker, None)
+        if self.analyzer_pool: self.analyzer_pool.detach(ticker)
+
+    def route_tick(self, ticker, tick_data, quote_data, agg_data, trace=None):
+        """프레임 안에서는 종목별로 모아두기만 함 (처리는 flush_ticks)"""
+        if ticker not in self.snipers: return
+        self.frame_ticks[ticker].append((tick_data, quote_data, agg_data, trace))
+
+    def flush_ticks(self):
+        """
+        프레임(Redis 메시지 / 웹소켓 프레임) 하나 처리 후 호출
+        - inline : 종목별로 틱 전부 반영 후 get_metrics + 판단 1번
+        - process: 모아둔 틱을 워커 프로세스 링 버퍼에 한 번에 기록
+        """
+        if not self.frame_ticks: return
+        batches, self.frame_ticks = self.frame_ticks, defaultdict(list)
+
+        for ticker, ticks in batches.items():
+            bot = self.snipers.get(ticker)
+            if bot is None: continue
+            BATCH_TICKS.observe(len(ticks))
+            if self.analyzer_pool is None:
+                with MONITOR.section(ticker, 'update_batch'):
+                    bot.update_batch(ticks)
+            else:
+                for tick_data, quote_data, agg_data, trace in ticks:
+                    bot.ingest(tick_data, agg_data, trace)
+                    self.analyzer_pool.push(ticker, tick_data, quote_data)
+
+        if self.analyzer_pool: self.analyzer_pool.flush()
+
+    def _on_remote_metrics(self, ticker, m, n_ticks):
+        bot = self.snipers.get(ticker)
+        if bot is None: return  # 그 사이 detach된 종목
+        try:
+            with MONITOR.section(ticker, 'evaluate'):
+                bot.on_remote_metrics(m, n_ticks)
+        except Exception as e:
+            print(f"❌ [Evaluate Error] {ticker}: {e}", flush=True)
+            traceback.print_exc()
+
    # [5] Worker (데이터 연결 로직 수정됨 - 1초봉 강제 구동 추가)
     async def worker(self):
         while True:
             msg = await self.msg_queue.get()
             try:
-                data = json.loads(msg)
-                for item in data:
-                    ev, t = item.get('ev'), item.get('sym')
-                    
-                    if ev == 'A': 
-                        self.selector.update(item)
-                        # [수정 2] 실시간 Agg 데이터를 딕셔너리에 저장해둠 (캐싱)
-                        self.last_agg[t] = item
-                        
-                        # 🔥 [긴급 수정] T(체결) 데이터가 안 들어올 때를 대비해
-                        # A(1초봉) 데이터가 들어오면 강제로 봇을 구동시킵니다.
-                        if t in self.snipers:
-                            # A 데이터를 T 데이터인 척 위장해서 봇에게 먹입니다.
-                            pseudo_tick = {
-                                'p': item['c'],      # 현재가 = 종가
-                                's': item['v'],      # 거래량
-                                't': item['e']       # 시간
-                            }
-                            # 봇에게 강제 주입 -> 이러면 Pulse 로그가 무조건 찍힙니다!
-                            self.snipers[t].update_dashboard_db(
-                                pseudo_tick, 
-                                self.last_quotes.get(t, {'bids':[],'asks':[]}), 
-                                item
-                            )
-                    
-                    elif ev == 'Q':
-                        self.last_quotes[t] = {
-                            'bids': [{'p':item.get('bp'),'s':item.get('bs')}], 
-                            'asks': [{'p':item.get('ap'),'s':item.get('as')}]
-                        }
-                    
-                    # Top 3 종목 정밀 타격 로직 (원래 로직 유지)
-                    elif ev == 'T' and t in self.snipers:
-                        current_agg = self.last_agg.get(t)
-                        self.snipers[t].update_dashboard_db(
-                            item, 
-                            self.last_quotes.get(t, {'bids':[],'asks':[]}), 
-                            current_agg 
-                        )
+                self.handle_events(json.loads(msg))
             except Exception as e:
                 # 🔥 [긴급 수정] 에러 무시하지 말고 출력!
                 import traceback
@@ -1612,6 +1612,48 @@ class STSPipeline:
             finally:
                 self.msg_queue.task_done()
 
+    def handle_events(self, data):
+        """웹소켓 프레임 하나(이벤트 리스트) 처리 - worker와 벤치마크(bench_replay.py)가 같이 사용"""
+        for item in data:
+            ev, t = item.get('ev'), item.get('sym')
+            
+            if ev == 'A': 
+                self.selector.update(item)
+                # [수정 2] 실시간 Agg 데이터를 딕셔너리에 저장해둠 (캐싱)
+                self.last_agg[t] = item
+                
+                # 🔥 [긴급 수정] T(체결) 데이터가 안 들어올 때를 대비해
+                # A(1초봉) 데이터가 들어오면 강제로 봇을 구동시킵니다.
+                if t in self.snipers:
+                    # A 데이터를 T 데이터인 척 위장해서 봇에게 먹입니다.
+                    pseudo_tick = {
+                        'p': item['c'],      # 현재가 = 종가
+                        's': item['v'],      # 거래량
+                        't': item['e']       # 시간
+                    }
+                    # 봇에게 강제 주입 -> 이러면 Pulse 로그가 무조건 찍힙니다!
+                    self.route_tick(
+                        t, pseudo_tick, 
+                        self.last_quotes.get(t, {'bids':[],'asks':[]}), 
+                        item
+                    )
+            
+            elif ev == 'Q':
+                self.last_quotes[t] = {
+                    'bids': [{'p':item.get('bp'),'s':item.get('bs')}], 
+                    'asks': [{'p':item.get('ap'),'s':item.get('as')}]
+                }
+            
+            # Top 3 종목 정밀 타격 로직 (원래 로직 유지)
+            elif ev == 'T' and t in self.snipers:
+                current_agg = self.last_agg.get(t)
+                self.route_tick(
+                    t, item, 
+                    self.last_quotes.get(t, {'bids':[],'asks':[]}), 
+                    current_agg 
+                )
+        self.flush_ticks()
+
     async def task_global_scan(self):
         print("🔭 [Scanner] Started (Fast Mode: 20s)", flush=True)
         loop = asyncio.get_running_loop()
@@ -1677,7 +1719,7 @@ class STSPipeline:
                                  continue
 
                             # 위 조건에 해당하지 않으면(그냥 멍때리는 중이면) 삭제
-                            del self.snipers[t]
+                            self.remove_sniper(t)
                             real_remove_list.append(t)
                     
                     # 실제로 삭제된 종목만 웹소켓 구독 취소
@@ -1694,8 +1736,7 @@ class STSPipeline:
                     
                     for t in to_add:
                         # 봇 생성
-                        new_bot = SniperBot(t, self.logger, self.selector, self.model_bytes)
-                        self.snipers[t] = new_bot 
+                        new_bot = self.add_sniper(t)
                         # 생성 즉시 비동기로 과거 데이터 로딩(Warmup) 시작
                         asyncio.create_task(new_bot.warmup())
 
@@ -1708,7 +1749,8 @@ class STSPipeline:
                     # 웜업이 덜 된 봇은 평가에서 제외
                     if bot.is_ready():
                         # 현재 시점의 ERS(실행 점수) 계산
-                        m = bot.analyzer.get_metrics()
+                        with MONITOR.section(ticker, 'focus:get_metrics'):
+                            m = bot.current_metrics()
                         if m:
                             score = bot.calculate_ers(m)
                             ready_bots.append((ticker, score))
@@ -1747,6 +1789,9 @@ async def main_startup():
     print("🚀 [System] Initializing STS Sniper Bot...", flush=True)
     pipeline = STSPipeline()
 
+    start_metrics_server(9101)
+    MONITOR.start()
+
     # 2. 🔥 [테스트 알림 발송] 봇 켜질 때 '살아있다'고 신고
     print("🔔 [System] Sending Startup Test Notification...", flush=True)
     try:
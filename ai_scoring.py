@@ -0,0 +1,339 @@
+import asyncio
+import json
+import math
+import os
+import time
+
+from dispatcher.http import get_http_client
+from ttl_cache import TTLCache
+
+# ==============================================================================
+# AI 채점 (scanner.py ai_worker -> Gemini)
+# ==============================================================================
+# 예전엔 후보마다 2KB짜리 시스템 프롬프트 + 요청 1건 + AsyncClient 새로 열기였습니다.
+# - 배치: 짧은 시간(AI_BATCH_WAIT_MS) 안에 모인 후보를 한 요청으로 묶어 JSON 배열로 받음
+# - 캐시: 특징값을 구간화한 지문(fingerprint)이 같으면 TTL 동안 재호출 없이 같은 점수
+#         (같은 지문이 응답 대기 중이면 그 결과를 같이 기다림)
+# - 연결: dispatcher.http 공유 클라이언트 (프로세스당 커넥션 풀 1개)
+# - 대역: AI_PROVIDER=mock 이면 외부 호출 없이 규칙 기반 점수 (로컬 테스트 / bench)
+
+AI_PROVIDER_ENV = 'AI_PROVIDER'
+DEFAULT_SCORE = 50                  # 실패 / 미설정 시 중립 점수 (캐시하지 않음)
+GEMINI_MODEL = 'gemini-2.5-flash-lite'
+GEMINI_TIMEOUT = 20.0               # 배치라 단건(10초)보다 넉넉히
+
+# 지문 구간 (특징 -> 양자화 간격). None이면 부호만
+FINGERPRINT_STEPS = {
+    'tier': 0, 'session': 0, 'trend_align': 0, 'rvol_consecutive': 0,
+    'squeeze_ratio': 0.05, 'pump': 0.25, 'pump_accel': 0.1, 'pullback': 0.5,
+    'vwap_dist': 0.25, 'vwap_slope': 1.0, 'rvol': 0.25, 'rvol_slope': 0.25,
+    'rsi': 2.0, 'volatility_z': 0.5, 'entry_suitability': 10, 'order_imbalance': None,
+}
+
+SYSTEM_PROMPT = """
+You are a **Senior Scalping Risk Manager & Market Microstructure Analyst**.
+Your primary mission is to evaluate whether the setup can realistically produce a **+3% profit within 10 minutes**
+while aggressively avoiding **late chasing and bull traps**.
+
+**[CORE PRINCIPLES]**
+"Better to miss a trade than to lose money."
+Prioritize **Early Breakouts** and reject **overextended, unstable setups**.
+
+---
+
+**[KEY EVALUATION RULES]**
+
+### 1. Squeeze Energy (`squeeze_ratio`)
+- < 0.70 = Super Compression (Pre-Breakout 💎 - IGNORE minor flaws if accel > 0)
+- 0.70 ~ 0.90 = Healthy coil
+- > 2.0 = Volatility spike / Chaos → REJECT
+
+### 2. Momentum Velocity (`pump`, `pump_accel`)
+- accel > 0.2 = Speed rising (ideal entry)
+- accel < 0 & pump > 4% = Bull Trap (Momentum dying)
+- pump > 7% = Late Chasing (High risk)
+
+### 3. VWAP Structure (`vwap_dist`, `vwap_slope`)
+- slope > 0 = Uptrend confirmed
+- dist < 1.5% = Perfect pullback zone
+- dist > 3% = Extended / Mean reversion risk
+
+### 4. Volume Integrity
+- rvol_consecutive = Real accumulation
+- order_imbalance > 0 = Aggressive buying
+- falling rvol_slope = Liquidity loss → Risk
+
+### 5. Pullback Validation
+- 0%~5% ideal
+- 5%~10% allowed only if squeeze < 0.75
+- >10% = Broken structure
+
+---
+
+**[REJECTION TRIGGERS (Instant Score < 50)]**
+- pump > 5% AND accel < 0
+- vwap_slope < 0
+- squeeze_ratio > 2.0
+- pump > 8%
+
+---
+
+**[SCORING TIERS]**
+- **90-100 (Diamond Early Breakout):** squeeze<0.85 & accel>0.2 & rvol_consecutive
+- **80-89 (Gold Valid Entry):** Strong volume & positive accel, but slightly extended
+- **60-79 (Silver Watch):** Good structure but waiting for volume trigger
+- **< 60 (Trap):** Avoid at all costs
+
+---
+
+### [RESPONSE FORMAT — STRICT JSON ARRAY]
+You will receive several signals at once. Evaluate each one independently.
+Return strictly a JSON array (no markdown, no text before/after) with exactly one object per signal, in the same order:
+[
+  {
+    "id": <signal id as given>,
+    "ticker": "<ticker as given>",
+    "probability_score": <0-100>,
+    "risk_level": "<LOW | MEDIUM | HIGH>",
+    "entry_evaluation": "<EARLY_BREAKOUT | MID_MOMENTUM | LATE_CHASING | TRAP>",
+    "should_enter": "<YES | WAIT | NO>",
+    "reasoning": "<Concise analysis: 1. Squeeze status 2. Acceleration check 3. Volume/VWAP verdict>",
+    "micro_test": "<REQUIRED (if score 60-85) | OPTIONAL (if score > 85) | NOT_NEEDED (if score < 60)>",
+    "tp_sl_comment": "<Brief TP/SL guidance based on volatility>"
+  }
+]
+"""
+
+
+def fingerprint(ticker, data):
+    """특징값을 구간화한 튜플 (조금씩 흔들리는 같은 셋업은 같은 키)"""
+    key = [ticker]
+    for name, step in FINGERPRINT_STEPS.items():
+        v = data.get(name)
+        if isinstance(v, float) and math.isnan(v): v = None
+        if v is None or isinstance(v, (str, bool)) or step == 0:
+            key.append(v)
+        elif step is None:
+            key.append((v > 0) - (v < 0))
+        else:
+            key.append(round(v / step))
+    return tuple(key)
+
+
+def build_user_prompt(items):
+    """[(ticker, data), ...] -> 배치 프롬프트 (id = 리스트 순번)"""
+    parts = [f"Analyze the following {len(items)} signals. Return one JSON object per signal, keeping its id and ticker."]
+    for i, (ticker, data) in enumerate(items):
+        parts.append(f"""
+    [SIGNAL id={i} | Ticker: {ticker}]
+    - Current Session: {data.get('session_type', 'unknown')}
+    - Squeeze Ratio: {data.get('squeeze_ratio', 'N/A')} (Lower is better)
+    - Pump Acceleration: {data.get('pump_accel', 'N/A')} (Positive is good)
+    - VWAP Slope: {data.get('vwap_slope', 'N/A')}
+    [FULL TECHNICAL DATA]
+    {json.dumps(data)}""")
+    return "\n".join(parts)
+
+
+def parse_batch_response(text):
+    """모델 응답 텍스트 -> 객체 리스트 (```json 감싸기 / 앞뒤 잡담 / {"results": [...]} 허용)"""
+    text = text.strip()
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        # 괄호 강제 추출 재시도
+        start, end = text.find('['), text.rfind(']') + 1
+        if start == -1 or end == 0:
+            start, end = text.find('{'), text.rfind('}') + 1
+        if start == -1 or end == 0: return []
+        parsed = json.loads(text[start:end])
+    if isinstance(parsed, dict):
+        parsed = parsed.get('results') or parsed.get('signals') or [parsed]
+    return [p for p in parsed if isinstance(p, dict)]
+
+
+class GeminiProvider:
+    name = 'gemini'
+
+    def __init__(self, api_key, project_id, region, model=GEMINI_MODEL):
+        self.api_key = api_key
+        self.api_url = (
+            f"https://{region}-aiplatform.googleapis.com/v1/projects/{project_id}"
+            f"/locations/{region}/publishers/google/models/{model}:generateContent"
+        )
+
+    async def score_batch(self, items):
+        payload = {
+            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]},
+            "contents": [{"role": "user", "parts": [{"text": build_user_prompt(items)}]}],
+            "generationConfig": {"responseMimeType": "application/json"}
+        }
+        headers = {"Content-Type": "application/json", "x-goog-api-key": self.api_key}
+
+        response = await get_http_client().post(self.api_url, json=payload, headers=headers, timeout=GEMINI_TIMEOUT)
+        if not response.is_success:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+        result = response.json()
+        if 'candidates' not in result:
+            if 'error' in result:
+                raise RuntimeError(f"Vertex AI 오류: {result['error'].get('message')}")
+            raise RuntimeError(f"응답에 'candidates' 없음: {str(result)[:200]}")
+
+        text = result['candidates'][0].get('content', {}).get('parts', [{}])[0].get('text', '[]')
+        return parse_batch_response(text)
+
+
+class MockProvider:
+    """외부 호출 없는 대역 (프롬프트의 평가 규칙을 단순화한 점수)"""
+    name = 'mock'
+
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.items = 0
+
+    def rule_score(self, d):
+        score = 60
+        if d.get('squeeze_ratio', 1.0) < 0.85: score += 10
+        if d.get('pump_accel', 0) > 0.2: score += 10
+        if d.get('rvol_consecutive'): score += 10
+        if d.get('vwap_slope', 0) < 0 or d.get('squeeze_ratio', 1.0) > 2.0: score -= 20
+        if d.get('pump', 0) > 8.0 or (d.get('pump', 0) > 5.0 and d.get('pump_accel', 0) < 0): score -= 30
+        return max(0, min(100, score))
+
+    async def score_batch(self, items):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        self.calls += 1
+        self.items += len(items)
+        return [
+            {"id": i, "ticker": t, "probability_score": self.rule_score(d), "reasoning": "mock rules"}
+            for i, (t, d) in enumerate(items)
+        ]
+
+
+class AIScorer:
+    """
+    score(ticker, data) -> 0~100 (실패 시 DEFAULT_SCORE)
+    동시에 들어온 요청들은 batch_size개 또는 batch_wait초 단위로 묶여 provider 1회 호출
+    """
+    def __init__(self, provider, batch_size=8, batch_wait=0.25, cache_ttl=300.0):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.cache = TTLCache(cache_ttl, max_entries=2048)
+        self.pending = []       # [(key, ticker, data, future)]
+        self.inflight = {}      # key -> future (응답 대기 중인 같은 지문)
+        self.timer = None
+        self._tasks = set()     # 진행 중인 배치 태스크 (참조를 안 들고 있으면 GC될 수 있음)
+        self.stats = {'requests': 0, 'cache_hits': 0, 'batches': 0, 'failures': 0}
+
+    async def score(self, ticker, data):
+        self.stats['requests'] += 1
+        if self.provider is None:
+            return DEFAULT_SCORE
+
+        key = fingerprint(ticker, data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            print(f"-> [Gemini AI] {ticker}: 캐시 {cached}% (같은 셋업 재요청)", flush=True)
+            return cached
+        if key in self.inflight:
+            self.stats['cache_hits'] += 1
+            return await asyncio.shield(self.inflight[key])
+
+        fut = asyncio.get_running_loop().create_future()
+        self.inflight[key] = fut
+        self.pending.append((key, ticker, data, fut))
+
+        if len(self.pending) >= self.batch_size:
+            self._flush_now()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.batch_wait, self._flush_now)
+        return await asyncio.shield(fut)
+
+    def _flush_now(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+        if self.pending:
+            self.timer = asyncio.get_running_loop().call_later(self.batch_wait, self._flush_now)
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            self.stats['batches'] += 1
+            t0 = time.monotonic()
+            try:
+                results = await self.provider.score_batch([(ticker, data) for _, ticker, data, _ in batch])
+            except Exception as e:
+                self.stats['failures'] += 1
+                print(f"-> ❌ [Gemini AI] 배치 {len(batch)}건 분석 실패: {e}", flush=True)
+                results = []
+
+            by_id = {}
+            for r in results:
+                try:
+                    by_id[int(r.get('id'))] = r
+                except (TypeError, ValueError):
+                    continue
+            by_ticker = {r.get('ticker'): r for r in results}
+
+            print(f"-> [Gemini AI] 배치 {len(batch)}건 응답 ({(time.monotonic() - t0) * 1000:.0f}ms)", flush=True)
+            for i, (key, ticker, _, fut) in enumerate(batch):
+                r = by_id.get(i)
+                if r is None or r.get('ticker') not in (None, ticker):
+                    r = by_ticker.get(ticker)
+                score = DEFAULT_SCORE
+                if r is not None:
+                    try:
+                        score = max(0, min(100, int(r.get('probability_score', DEFAULT_SCORE))))
+                        self.cache.set(key, score)
+                        print(f"-> [Gemini AI] {ticker}: 상승 확률 {score}% (이유: {r.get('reasoning', 'No reasoning provided.')})", flush=True)
+                    except (TypeError, ValueError):
+                        score = DEFAULT_SCORE
+                else:
+                    print(f"-> ❌ [Gemini AI] {ticker}: 응답에 결과 없음", flush=True)
+                self.inflight.pop(key, None)
+                if not fut.done():
+                    fut.set_result(score)
+        finally:
+            # 예외/취소로 빠져나가도 기다리는 score() 호출이 영원히 멈추지 않도록
+            for key, _, _, fut in batch:
+                self.inflight.pop(key, None)
+                if not fut.done():
+                    fut.set_result(DEFAULT_SCORE)
+
+
+def build_ai_scorer(api_key, project_id, region, provider=None):
+    """
+    AI_PROVIDER=gemini(기본) | mock
+    AI_BATCH_SIZE / AI_BATCH_WAIT_MS / AI_CACHE_TTL 로 배치 크기, 대기 시간, 캐시 수명 조정
+    """
+    provider = provider or os.environ.get(AI_PROVIDER_ENV, 'gemini')
+    if provider == 'mock':
+        impl = MockProvider(latency_ms=float(os.environ.get('AI_MOCK_LATENCY_MS', '0')))
+    elif not api_key:
+        print("-> [Gemini AI] GEMINI_API_KEY가 설정되지 않아 AI 분석을 건너뜁니다. (모든 후보 50점)", flush=True)
+        impl = None
+    elif not project_id or "YOUR_PROJECT_ID" in project_id:
+        print("-> [Gemini AI] GCP_PROJECT_ID가 설정되지 않아 AI 분석을 건너뜁니다. (모든 후보 50점)", flush=True)
+        impl = None
+    else:
+        impl = GeminiProvider(api_key, project_id, region)
+
+    scorer = AIScorer(
+        impl,
+        batch_size=int(os.environ.get('AI_BATCH_SIZE', '8')),
+        batch_wait=float(os.environ.get('AI_BATCH_WAIT_MS', '250')) / 1000.0,
+        cache_ttl=float(os.environ.get('AI_CACHE_TTL', '300'))
+    )
+    print(f"🧠 [AI Scorer] provider={impl.name if impl else 'none'} batch={scorer.batch_size} "
+          f"wait={scorer.batch_wait * 1000:.0f}ms cache={scorer.cache.ttl:.0f}s", flush=True)
+    return scorer
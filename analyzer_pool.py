@@ -0,0 +1,223 @@
+import atexit
+import math
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from metrics import REGISTRY
+
+# ==============================================================================
+# Analyzer Process Pool (STS_EXEC_MODE=process)
+# ==============================================================================
+# MicrostructureAnalyzer.get_metrics()는 pandas 리샘플링이라 CPU를 많이 먹고,
+# 이벤트 루프에서 돌면 뜨거운 종목 하나가 다른 종목/Redis 읽기를 전부 막습니다.
+#
+# - 종목별 analyzer 상태는 워커 프로세스 안에 있음 (종목 -> 프로세스 고정 배정)
+# - 메인 -> 프로세스: 공유 메모리 링 버퍼 (SPSC, 프레임 단위로 한 번에 기록)
+# - 프로세스는 쌓인 틱을 한꺼번에 반영한 뒤, 틱이 들어온 종목만 지표를 1번 계산
+#   (틱마다 계산하던 것 -> 배치당 1번)
+# - 결과(metrics, 틱 수)는 result 큐로 돌아오고 메인 루프는 판단(evaluate)만 수행
+# - attach/detach/history 같은 제어 메시지는 Pipe로 전달
+
+RING_CAPACITY = 65536           # 프로세스당 링 크기 (틱 레코드 수)
+RING_HEADER_BYTES = 64          # [0]=write_idx, [1]=read_idx (int64)
+RECORD_FIELDS = 8               # slot, t_ms, p, s, bid_p, bid_s, ask_p, ask_s
+POLL_TIMEOUT = 0.002            # 링이 비었을 때 제어 채널 대기 (초)
+
+RING_DROPPED = REGISTRY.counter('analyzer_ring_dropped_total', 'Ticks dropped because an analyzer ring was full', ('proc',))
+RING_PENDING = REGISTRY.gauge('analyzer_ring_pending', 'Ticks written but not yet consumed', ('proc',))
+RESULTS_TOTAL = REGISTRY.counter('analyzer_results_total', 'Metric results returned by analyzer processes')
+
+
+def _ring_views(shm, capacity):
+    header = np.ndarray((2,), dtype=np.int64, buffer=shm.buf[:16])
+    ring = np.ndarray((capacity, RECORD_FIELDS), dtype=np.float64, buffer=shm.buf[RING_HEADER_BYTES:])
+    return header, ring
+
+
+def _quote_side(p, s):
+    if math.isnan(p): return []
+    return [{'p': p, 's': 0 if math.isnan(s) else s}]
+
+
+def _analyzer_main(shm_name, capacity, ctrl, results, min_ready_ticks):
+    """워커 프로세스 본체 (spawn으로 실행되므로 import는 여기서)"""
+    from STS_Engine import MicrostructureAnalyzer
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    header, ring = _ring_views(shm, capacity)
+    analyzers = {}  # slot -> (ticker, analyzer)
+
+    while True:
+        # 1. 제어 메시지 (링이 비어 있으면 여기서 잠깐 대기)
+        wait = 0 if header[0] != header[1] else POLL_TIMEOUT
+        while ctrl.poll(wait):
+            wait = 0
+            op, slot, payload = ctrl.recv()
+            if op == 'attach':
+                analyzers[slot] = (payload, MicrostructureAnalyzer())
+            elif op == 'detach':
+                analyzers.pop(slot, None)
+            elif op == 'history' and slot in analyzers:
+                analyzers[slot][1].inject_history(payload)
+            elif op == 'stop':
+                del header, ring
+                shm.close()
+                return
+
+        # 2. 쌓인 틱 일괄 반영
+        w, r = int(header[0]), int(header[1])
+        if w == r: continue
+
+        idx = np.arange(r, w) % capacity
+        block = ring[idx].copy()
+        header[1] = w  # 복사 끝났으니 바로 공간 반납
+
+        touched = set()
+        for row in block:
+            slot = int(row[0])
+            entry = analyzers.get(slot)
+            if entry is None: continue
+            entry[1].update_tick(
+                {'t': row[1], 'p': row[2], 's': row[3]},
+                {'bids': _quote_side(row[4], row[5]), 'asks': _quote_side(row[6], row[7])}
+            )
+            touched.add(slot)
+
+        # 3. 틱이 들어온 종목만 지표 1회 계산 -> 메인으로
+        for slot in touched:
+            ticker, analyzer = analyzers[slot]
+            n_ticks = len(analyzer.raw_ticks)
+            m = analyzer.get_metrics() if n_ticks >= min_ready_ticks else None
+            results.put((ticker, m, n_ticks))
+
+
+class AnalyzerPool:
+    """
+    메인 프로세스 쪽 핸들 (이벤트 루프 안에서 생성)
+    on_result(ticker, metrics, n_ticks)는 이벤트 루프 스레드에서 호출됩니다.
+    """
+    def __init__(self, n_procs, on_result, loop, min_ready_ticks, capacity=RING_CAPACITY):
+        ctx = mp.get_context('spawn')   # 스레드/소켓이 열린 상태에서 fork하지 않음
+        self.capacity = capacity
+        self.on_result = on_result
+        self.loop = loop
+        self.results = ctx.Queue()
+        self.procs = []
+
+        for i in range(n_procs):
+            shm = shared_memory.SharedMemory(create=True, size=RING_HEADER_BYTES + capacity * RECORD_FIELDS * 8)
+            header, ring = _ring_views(shm, capacity)
+            header[:] = 0
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_analyzer_main, name=f'sts-analyzer-{i}', daemon=True,
+                args=(shm.name, capacity, child_conn, self.results, min_ready_ticks)
+            )
+            proc.start()
+            self.procs.append({
+                'proc': proc, 'shm': shm, 'header': header, 'ring': ring,
+                'ctrl': parent_conn, 'pending': [], 'tickers': set()
+            })
+            RING_PENDING.set_function(lambda h=header: int(h[0] - h[1]), proc=str(i))
+
+        self.assign = {}    # ticker -> (proc index, slot)
+        self.next_slot = 0
+
+        threading.Thread(target=self._drain_results, name='analyzer-results', daemon=True).start()
+        atexit.register(self.close)
+        print(f"🧮 [Analyzer Pool] {n_procs} processes started (ring {capacity} ticks each)", flush=True)
+
+    def _drain_results(self):
+        while True:
+            try:
+                ticker, m, n_ticks = self.results.get()
+            except (EOFError, OSError):
+                return
+            RESULTS_TOTAL.inc()
+            self.loop.call_soon_threadsafe(self.on_result, ticker, m, n_ticks)
+
+    # ------------------------------------------------------------------
+    # 종목 배정
+    # ------------------------------------------------------------------
+    def attach(self, ticker):
+        if ticker in self.assign: return
+        i = min(range(len(self.procs)), key=lambda k: len(self.procs[k]['tickers']))
+        slot = self.next_slot
+        self.next_slot += 1
+        self.assign[ticker] = (i, slot)
+        self.procs[i]['tickers'].add(ticker)
+        self.procs[i]['ctrl'].send(('attach', slot, ticker))
+
+    def detach(self, ticker):
+        entry = self.assign.pop(ticker, None)
+        if not entry: return
+        i, slot = entry
+        self.procs[i]['tickers'].discard(ticker)
+        self.procs[i]['ctrl'].send(('detach', slot, None))
+
+    def inject_history(self, ticker, bars):
+        entry = self.assign.get(ticker)
+        if not entry: return
+        i, slot = entry
+        self.procs[i]['ctrl'].send(('history', slot, bars))
+
+    # ------------------------------------------------------------------
+    # 틱 전달 (push로 모았다가 flush에서 링에 한 번에 기록)
+    # ------------------------------------------------------------------
+    def push(self, ticker, tick_data, quote_data):
+        entry = self.assign.get(ticker)
+        if not entry: return
+        i, slot = entry
+        bids = quote_data.get('bids') or [{}]
+        asks = quote_data.get('asks') or [{}]
+        nan = float('nan')
+        self.procs[i]['pending'].append((
+            slot, tick_data.get('t') or 0, tick_data.get('p') or 0, tick_data.get('s') or 0,
+            bids[0].get('p') or nan, bids[0].get('s') or nan,
+            asks[0].get('p') or nan, asks[0].get('s') or nan
+        ))
+
+    def flush(self):
+        for i, p in enumerate(self.procs):
+            pending = p['pending']
+            if not pending: continue
+            p['pending'] = []
+
+            header, ring = p['header'], p['ring']
+            w, r = int(header[0]), int(header[1])
+            free = self.capacity - (w - r)
+            if len(pending) > free:
+                # 소비가 못 따라가면 새 틱을 버림 (오래된 쪽은 이미 소비자 소유)
+                RING_DROPPED.inc(len(pending) - free, proc=str(i))
+                pending = pending[:free]
+                if not pending: continue
+
+            rows = np.asarray(pending, dtype=np.float64)
+            idx = np.arange(w, w + len(rows)) % self.capacity
+            ring[idx] = rows
+            # 레코드를 다 쓴 뒤에 write_idx 공개 (단일 생산자/단일 소비자)
+            header[0] = w + len(rows)
+
+    def close(self):
+        for p in self.procs:
+            try:
+                p['ctrl'].send(('stop', 0, None))
+            except Exception:
+                pass
+        for p in self.procs:
+            p['proc'].join(timeout=2)
+            try:
+                p['header'] = p['ring'] = None
+                p['shm'].close()
+                p['shm'].unlink()
+            except Exception:
+                pass
+        self.procs = []
+
+
+def default_process_count():
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
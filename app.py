@@ -2,16 +2,27 @@ import eventlet
 eventlet.monkey_patch()
 from flask import Flask, render_template, jsonify, request, send_from_directory, redirect, url_for, session
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from authlib.integrations.flask_client import OAuth
 from werkzeug.middleware.proxy_fix import ProxyFix # 🔥 [추가] 프록시 픽스 임포트
 import secrets 
+import hashlib
 import json
 import os
-import requests
+import time
+from collections import deque
 from datetime import datetime, timedelta
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import redis
 from psycopg2.extras import RealDictCursor
+from eventlet.hubs import trampoline
+from eventlet.semaphore import BoundedSemaphore
+from ttl_cache import TTLCache
+from polygon_proxy import PolygonProxy
+from subscribers import publish_change
+from tracing import read_histograms
 
 app = Flask(__name__)
 # 🔥 [핵심 수정] Render/Cloudflare 환경에서 HTTPS 인식을 위한 설정
@@ -37,13 +48,120 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'          # OAuth 연동을 위해
 API_KEY = os.environ.get('POLYGON_API_KEY')
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+
+# 워커 쪽 구독자 인덱스에 토큰 변경을 알리는 용도 (eventlet monkey_patch로 그린 소켓 사용)
+redis_client = redis.from_url(REDIS_URL)
+
+# Polygon 호출은 전부 캐싱 프록시 경유 (엔드포인트별 TTL + 요청 병합 + 커넥션 풀)
+polygon = PolygonProxy(API_KEY)
+
+# DB 커넥션 풀 설정 (요청마다 TCP + 인증 핸드셰이크 하던 것 제거)
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))           # 동시에 열 수 있는 최대 커넥션
+DB_POOL_ACQUIRE_TIMEOUT = float(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', '10'))
+DB_POOL_IDLE_CHECK = 30.0     # 이 시간 이상 놀던 커넥션은 꺼내기 전에 SELECT 1로 생존 확인
+DB_POOL_MAX_AGE = 1800.0      # 30분 넘은 커넥션은 폐기 후 재연결 (서버측 타임아웃 대비)
+
 # --- 2. DB 연결 함수 ---
+def eventlet_wait_callback(conn, timeout=-1):
+    """psycopg2 소켓 대기를 eventlet 허브에 양보합니다 (쿼리 중에도 다른 요청 처리)."""
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            break
+        elif state == psycopg2.extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+psycopg2.extensions.set_wait_callback(eventlet_wait_callback)
+
+class GreenConnectionPool:
+    """
+    eventlet 그린스레드용 PostgreSQL 커넥션 풀
+    - 최대 크기 제한: 슬롯이 다 차면 acquire_timeout 동안 대기 후 PoolError
+    - 헬스체크: 닫힌/오래된 커넥션 폐기, 오래 놀던 커넥션은 SELECT 1 확인
+    - 반납 시 열린 트랜잭션은 rollback 후 재사용
+    """
+    def __init__(self, dsn, maxconn, acquire_timeout, idle_check, max_age):
+        self.dsn = dsn
+        self.acquire_timeout = acquire_timeout
+        self.idle_check = idle_check
+        self.max_age = max_age
+        self._slots = BoundedSemaphore(maxconn)
+        self._idle = deque()     # (conn, created_at, last_used) - LIFO로 최근 쓴 것부터 재사용
+        self._created = {}       # id(conn) -> created_at (대여 중인 커넥션)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, created_at, last_used):
+        now = time.time()
+        if conn.closed or now - created_at > self.max_age:
+            return False
+        if now - last_used > self.idle_check:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise psycopg2.pool.PoolError("DB connection pool exhausted")
+        try:
+            while self._idle:
+                conn, created_at, last_used = self._idle.pop()
+                if self._is_healthy(conn, created_at, last_used):
+                    self._created[id(conn)] = created_at
+                    return conn
+                self._discard(conn)
+
+            conn = psycopg2.connect(self.dsn)
+            self._created[id(conn)] = time.time()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        created_at = self._created.pop(id(conn), None)
+        if created_at is None:
+            # 이미 반납됐거나 풀 소속이 아닌 커넥션 (이중 반납 방지)
+            return
+        try:
+            if not close and not conn.closed:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                self._idle.append((conn, created_at, time.time()))
+            else:
+                self._discard(conn)
+        except psycopg2.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+db_pool = GreenConnectionPool(
+    DATABASE_URL,
+    maxconn=DB_POOL_MAX,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+    idle_check=DB_POOL_IDLE_CHECK,
+    max_age=DB_POOL_MAX_AGE
+)
+
 def get_db_connection():
-    """PostgreSQL DB 연결을 생성합니다."""
+    """풀에서 PostgreSQL 커넥션을 빌려옵니다. 사용 후 반드시 db_pool.putconn(conn)"""
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL 환경 변수가 설정되지 않았습니다.")
-    conn = psycopg2.connect(DATABASE_URL)
-    return conn
+    return db_pool.getconn()
 
 # --- 3. Flask-Login 설정 ---
 login_manager = LoginManager()
@@ -80,7 +198,7 @@ def load_user(user_id):
     except Exception as e:
         print(f"Login session error: {e}")
     finally:
-        if conn: conn.close()
+        if conn: db_pool.putconn(conn)
     return None
 
 
@@ -110,8 +228,11 @@ def sts_page():
     # ✅ user=current_user를 추가해야 HTML에서 {{ user.name }} 등을 쓸 수 있습니다.
     return render_template('sts.html', user=current_user)
 
-@app.route('/api/sts/status')
-def get_sts_status():
+def fetch_sts_payload():
+    """
+    STS 대시보드용 Top 3 타겟 + 최근 신호 로그를 조회합니다.
+    - /api/sts/status (폴링) 와 소켓 푸시 루프가 같은 함수를 공유합니다.
+    """
     conn = None
     try:
         conn = get_db_connection() 
@@ -206,23 +327,51 @@ def get_sts_status():
             
         cursor.close()
         
-        return jsonify({
+        return {
             'targets': targets,
             'logs': logs
-        })
+        }
         
     except psycopg2.errors.UndefinedTable:
         # 봇이 아직 한 번도 실행되지 않아 테이블이 없는 경우
         if conn: conn.rollback()
-        return jsonify({'targets': [], 'logs': []})
+        return {'targets': [], 'logs': []}
         
     except Exception as e:
         print(f"❌ API Error: {e}")
-        return jsonify({'targets': [], 'logs': [], 'error': str(e)})
+        return {'targets': [], 'logs': [], 'error': str(e)}
         
     finally:
         if conn: 
-            conn.close()
+            db_pool.putconn(conn)
+
+# 엔진이 DB를 쓰는 주기(약 1.5초)보다 짧게 -> 탭이 수백 개여도 DB 쿼리는 TTL당 1번
+STS_STATUS_TTL = float(os.environ.get('STS_STATUS_TTL', '1.0'))
+sts_status_cache = TTLCache(ttl=STS_STATUS_TTL)
+
+def build_sts_snapshot():
+    """페이로드를 한 번만 직렬화하고, 내용 기반 ETag를 붙여 둡니다."""
+    payload = fetch_sts_payload()
+    body = app.json.dumps(payload)
+    return {
+        'payload': payload,
+        'body': body,
+        'etag': hashlib.sha1(body.encode('utf-8')).hexdigest()
+    }
+
+def get_sts_snapshot():
+    # single-flight: 캐시 미스 순간 동시에 몰린 요청도 DB 쿼리는 1번
+    return sts_status_cache.get_or_compute('sts_status', build_sts_snapshot)
+
+@app.route('/api/sts/status')
+def get_sts_status():
+    # 소켓이 끊긴 클라이언트용 폴백 (평소엔 sts_delta 푸시를 받음)
+    snapshot = get_sts_snapshot()
+    response = app.response_class(snapshot['body'], mimetype='application/json')
+    response.set_etag(snapshot['etag'])
+    # no-cache = 매번 재검증 -> 내용이 같으면 If-None-Match로 304 (본문 전송 없음)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 # --- 7. 인증(Auth) 라우트 ---
 
@@ -244,6 +393,7 @@ def google_login():
 # 구글 로그인 콜백
 @app.route('/auth/google/callback')
 def google_callback():
+    conn = None
     try:
         token = oauth.google.authorize_access_token()
         
@@ -271,7 +421,6 @@ def google_callback():
             user = User(id=user_data[0], email=user_data[1], is_premium=user_data[2])
         
         cursor.close()
-        conn.close()
         
         login_user(user, remember=True)
         session.permanent = True
@@ -280,6 +429,8 @@ def google_callback():
     except Exception as e:
         print(f"OAuth Error: {e}")
         return "Google Login Failed. Please try again. (Check server logs for details)", 400
+    finally:
+        if conn: db_pool.putconn(conn)
 
 # 로그아웃
 @app.route('/logout')
@@ -329,13 +480,13 @@ def get_dashboard_data():
         recommendations = cursor.fetchall()
 
         cursor.close()
-        conn.close()
 
         return jsonify({'status': status, 'signals': signals, 'recommendations': recommendations})
     except Exception as e:
-        if conn: conn.close()
         print(f"Error in /api/dashboard: {e}")
         return jsonify({'status': {'last_scan_time': 'Scanner waiting...', 'watching_count': 0, 'watching_tickers': []}, 'signals': [], 'recommendations': []})
+    finally:
+        if conn: db_pool.putconn(conn)
 
 @app.route('/api/posts')
 @login_required
@@ -347,12 +498,12 @@ def get_posts():
         cursor.execute("SELECT author, content, TO_CHAR(time, 'YYYY-MM-DD HH24:MI:SS') as time FROM posts ORDER BY time DESC LIMIT 100")
         posts = cursor.fetchall()
         cursor.close()
-        conn.close()
         return jsonify({"status": "OK", "posts": posts})
     except Exception as e:
-        if conn: conn.close()
         print(f"Error in /api/posts (GET): {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if conn: db_pool.putconn(conn)
 
 @app.route('/api/posts', methods=['POST'])
 @login_required
@@ -369,25 +520,20 @@ def create_post():
         cursor.execute("INSERT INTO posts (author, content, time) VALUES (%s, %s, %s)", (author, content, datetime.now()))
         conn.commit()
         cursor.close()
-        conn.close()
         return jsonify({"status": "OK", "message": "Post created."})
     except Exception as e:
-        if conn: conn.close()
         print(f"Error in /api/posts (POST): {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if conn: db_pool.putconn(conn)
 
 @app.route('/api/quote/<string:ticker>')
 @login_required
 def get_quote(ticker):
     if not API_KEY: return jsonify({"status": "error", "message": "API Key not configured"}), 500
-    url = f"https://api.polygon.io/v3/quotes/{ticker.upper()}?limit=1&apiKey={API_KEY}"
     try:
-        response = requests.get(url)
-        data = response.json()
-        if data.get('status') == 'OK' and data.get('results'):
-            return jsonify(data['results'][0])
-        else:
-            return jsonify({"status": "error", "message": "Ticker not found"}), 404
+        body, status = polygon.quote(ticker)
+        return jsonify(body), status
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -395,48 +541,38 @@ def get_quote(ticker):
 @login_required
 def get_ticker_details(ticker):
     if not API_KEY: return jsonify({"status": "error", "message": "API Key not configured"}), 500
-    url = f"https://api.polygon.io/v3/reference/tickers/{ticker.upper()}?apiKey={API_KEY}"
     try:
-        response = requests.get(url)
-        data = response.json()
-        if data.get('status') == 'OK' and data.get('results'):
-            results = data['results']
-            logo_url = results.get('branding', {}).get('logo_url', '')
-            if logo_url: logo_url += f"?apiKey={API_KEY}"
-            f = results.get('financials', {})
-            financial_data = {
-                "market_cap": f.get('market_capitalization', {}).get('value', 'N/A'),
-                "pe_ratio": f.get('price_to_earnings_ratio', 'N/A'),
-                "ps_ratio": f.get('price_to_sales_ratio', 'N/A'),
-                "dividend_yield": f.get('dividend_yield', {}).get('value', 'N/A')
-            }
-            details = {
-                "ticker": results.get('ticker'), "name": results.get('name'),
-                "industry": results.get('sic_description'),
-                "description": results.get('description', 'No description available.'),
-                "logo_url": logo_url, "financials": financial_data
-            }
-            return jsonify({"status": "OK", "results": details})
-        else:
-            return jsonify({"status": "error", "message": "Details not found"}), 404
+        body, status = polygon.details(ticker)
+        return jsonify(body), status
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+CHART_COLUMNS = ['time', 'open', 'high', 'low', 'close']
+
 @app.route('/api/chart_data/<string:ticker>')
 @login_required
 def get_chart_data(ticker):
+    """
+    1분봉 차트 데이터 (서버측 티커별 봉 캐시에서 응답, 1분마다 꼬리 갱신)
+    - ?since=<unix초> : 그 시각 이후(포함) 봉만 반환 -> 새로고침 시 전체 재전송 방지
+    - 응답은 봉마다 dict 대신 [time, open, high, low, close] 배열 (용량/인코딩 절감)
+    """
     if not API_KEY: return jsonify({"status": "error", "message": "API Key not configured"}), 500
+
+    since = request.args.get('since', type=float)
     try:
-        today = datetime.now().strftime('%Y-%m-%d')
-        past_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-        url = f"https://api.polygon.io/v2/aggs/ticker/{ticker.upper()}/range/1/minute/{past_date}/{today}?sort=asc&limit=5000&apiKey={API_KEY}"
-        response = requests.get(url)
-        data = response.json()
-        if data.get('status') == 'OK' and data.get('results'):
-            chart_data = [{"time": bar['t']/1000, "open": bar['o'], "high": bar['h'], "low": bar['l'], "close": bar.get('c', bar['o'])} for bar in data['results']]
-            return jsonify({"status": "OK", "results": chart_data})
-        else:
+        bars = polygon.chart_bars(ticker, since_ms=int(since * 1000) if since is not None else None)
+        if not bars and since is None:
             return jsonify({"status": "error", "message": "Chart data not found"}), 404
+
+        compact = [[t // 1000, o, h, l, c] for t, o, h, l, c in bars]
+        return jsonify({
+            "status": "OK",
+            "columns": CHART_COLUMNS,
+            "bars": compact,
+            # 다음 요청 때 since로 돌려보내면 되는 커서 (진행 중인 마지막 봉부터 다시 받음)
+            "last": compact[-1][0] if compact else since
+        })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -445,18 +581,18 @@ def get_chart_data(ticker):
 def get_market_overview():
     if not API_KEY: return jsonify({"status": "error", "message": "API Key not configured"}), 500
     try:
-        url_g = f"https://api.polygon.io/v2/snapshot/locale/us/markets/stocks/gainers?apiKey={API_KEY}"
-        res_g = requests.get(url_g); res_g.raise_for_status()
-        gainers = res_g.json().get('tickers') or []
-        
-        url_l = f"https://api.polygon.io/v2/snapshot/locale/us/markets/stocks/losers?apiKey={API_KEY}"
-        res_l = requests.get(url_l); res_l.raise_for_status()
-        losers = res_l.json().get('tickers') or []
-        
-        return jsonify({"status": "OK", "gainers": gainers, "losers": losers})
+        body, status = polygon.market_overview()
+        return jsonify(body), status
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def notify_token_change(op, **fields):
+    """워커의 구독자 인덱스 갱신 알림 (실패해도 API 응답은 정상 처리 - 워커가 재연결 시 전체 재적재)"""
+    try:
+        publish_change(redis_client, op, **fields)
+    except Exception as e:
+        print(f"⚠️ [API] Token change publish failed: {e}", flush=True)
+
 # --- (NEW) 알림 점수 기준 설정 API ---
 @app.route('/api/set_alert_threshold', methods=['POST'])
 def set_alert_threshold():
@@ -480,21 +616,20 @@ def set_alert_threshold():
         
         if cursor.rowcount == 0:
             cursor.close()
-            conn.close()
             return jsonify({"status": "error", "message": "Token not found"}), 404
 
         conn.commit()
         cursor.close()
-        conn.close()
-        
+
+        notify_token_change('upsert', token=token, min_score=int(threshold))
         return jsonify({"status": "OK", "message": "Threshold updated"}), 200
 
     except Exception as e:
-        if conn: 
-            conn.rollback()
-            conn.close()
+        if conn: conn.rollback()
         print(f"Error setting threshold: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if conn: db_pool.putconn(conn)
 
 
 # [app.py] 기존 subscribe 함수를 지우고 이 코드로 교체
@@ -528,11 +663,15 @@ def register_token():
             INSERT INTO fcm_tokens (token, created_at, min_score)
             VALUES (%s, NOW(), 0)
             ON CONFLICT (token) 
-            DO UPDATE SET created_at = NOW();
+            DO UPDATE SET created_at = NOW()
+            RETURNING min_score;
         """, (token,))
+        min_score = cursor.fetchone()[0]
         
         conn.commit()
         cursor.close()
+
+        notify_token_change('upsert', token=token, min_score=min_score)
         
         return jsonify({'status': 'success', 'message': 'Token saved/updated successfully'})
 
@@ -541,7 +680,7 @@ def register_token():
         if conn: conn.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
-        if conn: conn.close()
+        if conn: db_pool.putconn(conn)
 
 # --- 10. DB 초기화 (서버 시작 시 실행) ---
 def init_db():
@@ -620,14 +759,21 @@ def init_db():
                 conn.rollback() # 이미 컬럼이 있으면 에러 나니까 조용히 패스
 
         cursor.close()
-        conn.close()
         print("✅ [DB] Init success.")
     except Exception as e:
-        if conn: 
-            conn.rollback()
-            conn.close()
+        if conn: conn.rollback()
         print(f"❌ [DB] Init failed: {e}")
+    finally:
+        if conn: db_pool.putconn(conn)
 # ▼▼▼▼▼ [여기] 아래 코드를 붙여넣으세요 ▼▼▼▼
+@app.route('/admin/secret/latency')
+def check_latency():
+    """관리자용: 시세 수신 -> 푸시 발송 구간별 지연 히스토그램 (p50/p95/p99는 버킷 상한 기준)"""
+    try:
+        return jsonify({"status": "OK", "stages": read_histograms(redis_client)})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/admin/secret/count')
 def check_user_count():
     """관리자용: 실시간 가입자 및 기기 수 확인 페이지"""
@@ -653,7 +799,6 @@ def check_user_count():
             conn.rollback()
         
         cursor.close()
-        conn.close()
         
         # 실제 활성 사용자 수 (둘 중 큰 값 기준)
         active_users = max(user_count, device_count)
@@ -703,6 +848,8 @@ def check_user_count():
         
     except Exception as e:
         return f"Error: {e}"
+    finally:
+        if conn: db_pool.putconn(conn)
 
 init_db()
 
@@ -739,6 +886,78 @@ def broadcast_from_bot():
 
 # ▲▲▲▲▲ [여기까지 추가] ▲▲▲▲▲
 
+# ▼▼▼▼▼ STS 대시보드 실시간 푸시 (폴링 대체) ▼▼▼▼▼
+# 클라이언트마다 1초 폴링 -> DB 쿼리 하던 구조를,
+# 서버가 주기당 1번만 계산해서 'sts_live' 룸에 바뀐 부분(델타)만 뿌리는 구조로 변경
+STS_ROOM = 'sts_live'
+STS_PUSH_INTERVAL = float(os.environ.get('STS_PUSH_INTERVAL', '1.0'))
+
+sts_push_state = {
+    'snapshot': None,      # 마지막으로 브로드캐스트한 전체 페이로드
+    'subscribers': set(),  # 룸에 들어와 있는 소켓 sid
+    'loop_started': False
+}
+
+def diff_sts_payload(prev, curr):
+    """직전 스냅샷 대비 달라진 타겟/로그만 추립니다. 변화가 없으면 None."""
+    prev_targets = {t['ticker']: t for t in (prev or {}).get('targets', [])}
+    prev_order = [t['ticker'] for t in (prev or {}).get('targets', [])]
+
+    order = [t['ticker'] for t in curr['targets']]
+    changed = [t for t in curr['targets'] if prev_targets.get(t['ticker']) != t]
+    logs_changed = prev is None or prev.get('logs') != curr['logs']
+
+    if not changed and order == prev_order and not logs_changed:
+        return None
+
+    delta = {'order': order, 'targets': changed}
+    if logs_changed:
+        delta['logs'] = curr['logs']
+    return delta
+
+def sts_push_loop():
+    """주기마다 1번 계산 -> 변화가 있을 때만 룸 전체에 델타 송출"""
+    print(f"📡 [STS Push] Broadcast loop started ({STS_PUSH_INTERVAL}s)", flush=True)
+    while True:
+        try:
+            # 보고 있는 사람이 없으면 DB도 건드리지 않음
+            if sts_push_state['subscribers']:
+                payload = get_sts_snapshot()['payload']
+                if 'error' not in payload:
+                    delta = diff_sts_payload(sts_push_state['snapshot'], payload)
+                    sts_push_state['snapshot'] = payload
+                    if delta:
+                        socketio.emit('sts_delta', delta, to=STS_ROOM)
+        except Exception as e:
+            print(f"❌ [STS Push] {e}", flush=True)
+        socketio.sleep(STS_PUSH_INTERVAL)
+
+@socketio.on('join_sts')
+def handle_join_sts():
+    join_room(STS_ROOM)
+    sts_push_state['subscribers'].add(request.sid)
+
+    if not sts_push_state['loop_started']:
+        sts_push_state['loop_started'] = True
+        socketio.start_background_task(sts_push_loop)
+
+    # 새로 들어온 클라이언트에게는 전체 스냅샷 1번 (이후엔 델타만)
+    snapshot = sts_push_state['snapshot']
+    if snapshot is None:
+        snapshot = get_sts_snapshot()['payload']
+    emit('sts_snapshot', snapshot)
+
+@socketio.on('leave_sts')
+def handle_leave_sts():
+    leave_room(STS_ROOM)
+    sts_push_state['subscribers'].discard(request.sid)
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    sts_push_state['subscribers'].discard(request.sid)
+
+# ▲▲▲▲▲ STS 대시보드 실시간 푸시 ▲▲▲▲▲
+
 # if __name__ == '__main__': ... (아래로 이어짐)
 
 if __name__ == '__main__':
@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from replay_events import load_capture, load_datasets, synthetic_events
+
+# ==============================================================================
+# Replay Benchmark (실제 판단 경로 성능 측정)
+# ==============================================================================
+# 녹화된 Polygon T/Q/A 메시지를 STSPipeline.handle_events (= worker 한 프레임)에
+# 그대로 흘려서 측정합니다. DB / FCM / CSV 로그는 스텁 처리.
+#
+# 데이터 소스 (하나 선택)
+#   --datasets "tickstore/date=2024-05-*/ticker=*" : data_collector.py가 받은 trades/quotes/agg
+#                                                    (.parquet, 예전 datasets/{date}/{ticker}/*.csv도 가능)
+#   --capture frames.jsonl             : ticker_stream 메시지 한 줄에 하나 (ingester 봉투 or 리스트)
+#   --synthetic 5                      : 랜덤워크 5종목 (재현용 seed 고정)
+#
+# 출력: events/sec, 이벤트당 지연 p50/p99 (프레임 처리 시간 기준), get_metrics 호출 수/평균,
+#       메모리 (max RSS, --tracemalloc 시 파이썬 힙 peak), 발사 신호 수 + 다이제스트
+# 결과는 bench_results.jsonl에 커밋 해시와 함께 누적 -> 같은 데이터셋 직전 결과와 비교 출력
+#
+# 예) python bench_replay.py --synthetic 5 --events 200000
+#     python bench_replay.py --datasets "tickstore/date=*/ticker=*" --limit 500000 --label "get_metrics numpy"
+
+RESULTS_FILE = "bench_results.jsonl"
+DEFAULT_FRAME_SIZE = 50
+
+
+# ------------------------------------------------------------------------------
+# 1. 이벤트 로딩 (replay_events.py) -> 프레임
+# ------------------------------------------------------------------------------
+def to_frames(events, frame_size):
+    return [events[i:i + frame_size] for i in range(0, len(events), frame_size)]
+
+
+# ------------------------------------------------------------------------------
+# 2. 파이프라인 준비 (DB / FCM / 로그 스텁)
+# ------------------------------------------------------------------------------
+class NullLogger:
+    def log_trade(self, data): pass
+    def log_replay(self, data): pass
+
+
+def build_pipeline(tickers):
+    import STS_Engine as engine
+
+    signals = []
+
+    async def fake_send_fcm(ticker, price, probability_score, entry=None, tp=None, sl=None, trace=None):
+        signals.append((ticker, round(float(price), 4), int(probability_score)))
+
+    engine.update_dashboard_db = lambda *args, **kwargs: None
+    engine.log_signal_to_db = lambda *args, **kwargs: None
+    engine.send_fcm_notification = fake_send_fcm
+
+    # get_metrics 호출 수/시간 (최적화 전후 비교의 핵심 숫자)
+    gm_stats = {'calls': 0, 'seconds': 0.0}
+    original_get_metrics = engine.MicrostructureAnalyzer.get_metrics
+
+    def timed_get_metrics(self):
+        started = time.perf_counter()
+        try:
+            return original_get_metrics(self)
+        finally:
+            gm_stats['calls'] += 1
+            gm_stats['seconds'] += time.perf_counter() - started
+
+    engine.MicrostructureAnalyzer.get_metrics = timed_get_metrics
+    # process 모드는 결과가 비동기로 돌아와서 프레임 시간에 잡히지 않음 -> 항상 inline으로 측정
+    engine.STS_EXEC_MODE = 'inline'
+
+    pipeline = engine.STSPipeline()
+    pipeline.logger = NullLogger()
+    for t in tickers:
+        bot = pipeline.add_sniper(t)
+        bot.created_at -= 60  # Warmup Gate의 '생성 후 5초' 조건은 리플레이에서 의미 없음
+    return pipeline, signals, gm_stats
+
+
+# ------------------------------------------------------------------------------
+# 3. 실행 + 결과
+# ------------------------------------------------------------------------------
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def git_revision():
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=repo, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except Exception:
+        return "unknown"
+
+
+async def run_replay(frames, use_tracemalloc=False):
+    tickers = sorted({ev.get('sym') for frame in frames for ev in frame if ev.get('sym')})
+    pipeline, signals, gm_stats = build_pipeline(tickers)
+
+    if use_tracemalloc: tracemalloc.start()
+    rss_before = max_rss_mb()
+
+    frame_ms = np.empty(len(frames))
+    frame_events = np.empty(len(frames), dtype=np.int64)
+    started = time.perf_counter()
+    for i, frame in enumerate(frames):
+        f_started = time.perf_counter()
+        pipeline.handle_events(frame)
+        frame_ms[i] = (time.perf_counter() - f_started) * 1000
+        frame_events[i] = len(frame)
+        if i % 200 == 0:
+            await asyncio.sleep(0)  # fire()가 만든 태스크/익스큐터 작업이 돌 수 있게
+    wall = time.perf_counter() - started
+    await asyncio.sleep(0.1)
+
+    heap_peak = None
+    if use_tracemalloc:
+        heap_peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    # 프레임 안의 이벤트는 프레임 처리가 끝나야 반영되므로 프레임 시간을 이벤트 수만큼 가중
+    per_event = np.repeat(frame_ms, frame_events)
+    n_events = int(frame_events.sum())
+    busy = frame_ms.sum() / 1000
+
+    digest = hashlib.sha1(json.dumps(signals).encode()).hexdigest()[:12]
+    return {
+        'events': n_events,
+        'frames': len(frames),
+        'tickers': len(tickers),
+        'events_per_sec': round(n_events / busy, 1) if busy else 0.0,
+        'wall_sec': round(wall, 3),
+        'event_p50_ms': round(float(np.percentile(per_event, 50)), 4) if n_events else 0.0,
+        'event_p99_ms': round(float(np.percentile(per_event, 99)), 4) if n_events else 0.0,
+        'frame_p99_ms': round(float(np.percentile(frame_ms, 99)), 4) if len(frames) else 0.0,
+        'get_metrics_calls': gm_stats['calls'],
+        'get_metrics_mean_ms': round(gm_stats['seconds'] / gm_stats['calls'] * 1000, 4) if gm_stats['calls'] else 0.0,
+        'max_rss_mb': round(max_rss_mb(), 1),
+        'rss_growth_mb': round(max_rss_mb() - rss_before, 1),
+        'heap_peak_mb': round(heap_peak, 1) if heap_peak is not None else None,
+        'signals': len(signals),
+        'signal_digest': digest,
+    }
+
+
+def previous_result(dataset, frame_size, path=RESULTS_FILE):
+    if not os.path.exists(path): return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get('dataset') == dataset and rec.get('frame_size') == frame_size:
+                last = rec
+    return last
+
+
+def print_report(rec, prev):
+    print(f"\n📊 [Bench] {rec['dataset']} @ {rec['revision']} ({rec['label'] or '-'})", flush=True)
+    keys = ['events_per_sec', 'event_p50_ms', 'event_p99_ms', 'frame_p99_ms',
+            'get_metrics_calls', 'get_metrics_mean_ms', 'max_rss_mb', 'heap_peak_mb', 'signals']
+    for k in keys:
+        v = rec['result'].get(k)
+        line = f"   {k.ljust(22)}: {v}"
+        if prev and v is not None and prev['result'].get(k):
+            old = prev['result'][k]
+            line += f"   (prev {old}, {(v - old) / old * 100:+.1f}%)"
+        print(line, flush=True)
+    if prev and prev['result'].get('signal_digest') != rec['result']['signal_digest']:
+        print(f"   ⚠️ signals differ from {prev['revision']} "
+              f"({prev['result'].get('signal_digest')} -> {rec['result']['signal_digest']})", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the live decision path")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument('--datasets', help='glob for tickstore/date=*/ticker=* (or datasets/{date}/{ticker}) folders')
+    src.add_argument('--capture', help='JSONL of ticker_stream messages')
+    src.add_argument('--synthetic', type=int, metavar='N_TICKERS')
+    parser.add_argument('--events', type=int, default=100_000, help='synthetic event count')
+    parser.add_argument('--limit', type=int, default=0, help='max events to replay (0 = all)')
+    parser.add_argument('--frame-size', type=int, default=DEFAULT_FRAME_SIZE, help='events per frame (datasets/synthetic)')
+    parser.add_argument('--tracemalloc', action='store_true', help='track python heap peak (slower)')
+    parser.add_argument('--label', default='', help='note stored with the result')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    if args.capture:
+        frames, dataset = load_capture(args.capture)
+        frame_size = None
+        if args.limit:
+            kept, n = [], 0
+            for frame in frames:
+                if n >= args.limit: break
+                kept.append(frame)
+                n += len(frame)
+            frames = kept
+    else:
+        if args.datasets:
+            events, dataset = load_datasets(args.datasets)
+        else:
+            events, dataset = synthetic_events(args.synthetic, args.events)
+        if args.limit: events = events[:args.limit]
+        frame_size = args.frame_size
+        frames = to_frames(events, frame_size)
+
+    if not frames:
+        print("❌ [Bench] No events to replay.", flush=True)
+        return
+
+    print(f"▶️ [Bench] Replaying {sum(len(f) for f in frames)} events in {len(frames)} frames ({dataset})", flush=True)
+    result = asyncio.run(run_replay(frames, use_tracemalloc=args.tracemalloc))
+
+    rec = {
+        'ts': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'revision': git_revision(),
+        'label': args.label,
+        'dataset': dataset,
+        'frame_size': frame_size,
+        'result': result,
+    }
+    prev = previous_result(dataset, frame_size)
+    print_report(rec, prev)
+
+    if not args.no_save:
+        with open(RESULTS_FILE, 'a') as f:
+            f.write(json.dumps(rec) + "\n")
+        print(f"💾 [Bench] Saved to {RESULTS_FILE}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
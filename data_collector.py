@@ -1,9 +1,17 @@
-import requests
-import pandas as pd
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+import random
 import time
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pandas as pd
+
+import tick_store
+from dispatcher.base import RateLimiter
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -11,116 +19,266 @@ from concurrent.futures import ThreadPoolExecutor
 # 사용자 API 키 적용
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
 
-BASE_URL = "https://api.polygon.io"
-DATA_DIR = "datasets"
+BASE_URL = os.environ.get('POLYGON_REST_BASE', "https://api.polygon.io")
+DATA_DIR = tick_store.STORE_DIR    # {DATA_DIR}/date={date}/ticker={ticker}/{trades,quotes,agg}.parquet
 
 # 🔥 [수정됨] 수집 기간: 최근 3개월 (90일)
 END_DATE = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
 START_DATE = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
 
-print(f"📅 수집 기간 설정: {START_DATE} ~ {END_DATE} (최근 3개월)")
+# 비동기 수집 설정
+# - 요청은 전부 하나의 커넥션 풀 + 전역 속도 제한(초당 RATE_LIMIT건)을 공유
+# - 날짜/종목 작업은 한꺼번에 띄우되, 동시에 진행되는 종목-일은 TICKER_CONCURRENCY개로 제한
+#   (실제 동시 요청 수는 따로 CONCURRENCY로 제한) -> 앞 날짜부터 차례로 끝나서 중간에 끊어도 이어받기가 의미 있음
+# - 한 번에 50000건만 받던 것 -> next_url 커서를 끝까지 따라감 (대형주 잘림 방지)
+#   페이지는 받는 즉시 Parquet 행 그룹으로 기록 -> 메모리에는 종목-일당 한 페이지만
+# - 파일마다 행 수/크기/sha256을 _collected.json에 기록 -> 재실행 시 검증된 파일만 건너뜀
+# - 저장은 tick_store (Parquet, 고정 타입) - 기존 CSV는 python tick_store.py convert
+CONCURRENCY = int(os.environ.get('COLLECTOR_CONCURRENCY', '16'))
+TICKER_CONCURRENCY = int(os.environ.get('COLLECTOR_TICKER_CONCURRENCY', '8'))   # 동시에 받는 종목-일 수
+RATE_LIMIT = float(os.environ.get('POLYGON_RATE_LIMIT', '50'))     # 초당 요청 수 (플랜에 맞게)
+PAGE_LIMIT = 50000
+MAX_RETRIES = 5
+RETRY_BASE = 1.0                    # 백오프 시작 (초), 시도마다 2배 + 지터
+MARKER_FILE = "_collected.json"
+
+# ==============================================================================
+# 2. HTTP (커넥션 풀 + 전역 속도 제한 + 재시도 + 페이지네이션)
+# ==============================================================================
+
+class PolygonClient:
+    def __init__(self, api_key, concurrency=CONCURRENCY, rate=RATE_LIMIT):
+        self.api_key = api_key
+        self.sem = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate, max(1.0, rate), max_wait=float('inf'))
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+        self.stats = {'requests': 0, 'retries': 0, 'pages': 0, 'bytes': 0}
+
+    async def close(self):
+        await self.client.aclose()
+
+    def _with_key(self, url):
+        # next_url에는 apiKey가 빠져 있음
+        if 'apiKey=' in url: return url
+        return f"{url}{'&' if '?' in url else '?'}apiKey={self.api_key}"
+
+    async def get_json(self, url):
+        url = self._with_key(url)
+        for attempt in range(MAX_RETRIES + 1):
+            await self.limiter.acquire()
+            retry_after = None
+            try:
+                async with self.sem:
+                    self.stats['requests'] += 1
+                    res = await self.client.get(url)
+                if res.status_code == 429 or res.status_code >= 500:
+                    retry_after = res.headers.get('Retry-After')
+                    error = f"HTTP {res.status_code}"
+                else:
+                    res.raise_for_status()
+                    self.stats['bytes'] += len(res.content)
+                    return res.json()
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt == MAX_RETRIES:
+                raise RuntimeError(f"{error} (재시도 {MAX_RETRIES}회 초과)")
+            self.stats['retries'] += 1
+            try:
+                delay = float(retry_after) if retry_after else None
+            except ValueError:
+                delay = None
+            if delay is None:
+                delay = min(60.0, RETRY_BASE * 2 ** attempt) * (0.5 + random.random())
+            await asyncio.sleep(delay)
+
+    async def iter_pages(self, url):
+        """next_url 커서를 끝까지 따라가며 페이지별 results를 하나씩 (전체를 모으지 않음)"""
+        while url:
+            data = await self.get_json(url)
+            self.stats['pages'] += 1
+            yield data.get('results') or []
+            url = data.get('next_url')
+
+# ==============================================================================
+# 3. RESUME MARKERS (파일별 행 수 / 크기 / sha256)
+# ==============================================================================
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_marker(save_dir):
+    try:
+        with open(os.path.join(save_dir, MARKER_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_marker(save_dir, marker):
+    path = os.path.join(save_dir, MARKER_FILE)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(marker, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def marker_ok(save_dir, marker, name):
+    """기록된 파일이 그대로 남아 있는지 (크기 -> 해시 순으로 확인)"""
+    entry = marker.get(name)
+    if not entry: return False
+    if entry['rows'] == 0: return True   # 해당 날짜에 데이터 없음 (다시 요청 안 함)
+    path = os.path.join(save_dir, entry['file'])
+    try:
+        if os.path.getsize(path) != entry['bytes']: return False
+    except OSError:
+        return False
+    return file_sha256(path) == entry['sha256']
+
+async def stream_to_store(api, url, date, ticker, name):
+    """페이지를 받는 대로 tick_store에 행 그룹으로 기록 -> 마커 entry
+    (임시 파일 -> rename이라 중간에 죽어도 반쪽짜리 파일이 남지 않음)"""
+    writer = tick_store.PartitionWriter(name, date, ticker, root=DATA_DIR)
+    pages = 0
+    try:
+        async for page in api.iter_pages(url):
+            pages += 1
+            await asyncio.to_thread(writer.write, page)
+        path = await asyncio.to_thread(writer.close)
+    except BaseException:
+        # 취소(Ctrl+C 등) 중에도 확실히 정리되도록 동기 호출 (진행 중인 페이지 쓰기 하나만 기다림)
+        writer.abort()
+        raise
+    if path is None:
+        return {'file': None, 'rows': 0, 'pages': pages, 'bytes': 0, 'sha256': None}
+    return {'file': os.path.basename(path), 'rows': writer.rows, 'pages': pages,
+            'bytes': os.path.getsize(path), 'sha256': await asyncio.to_thread(file_sha256, path)}
 
 # ==============================================================================
-# 2. COLLECTOR FUNCTIONS
+# 4. COLLECTOR FUNCTIONS
 # ==============================================================================
 
-def get_daily_gainers(date):
+async def get_daily_gainers(api, date):
     """해당 날짜의 Top Gainers 10개 추출 (수정됨)"""
-    url = f"{BASE_URL}/v2/aggs/grouped/locale/us/market/stocks/{date}?adjusted=true&apiKey={POLYGON_API_KEY}"
+    url = f"{BASE_URL}/v2/aggs/grouped/locale/us/market/stocks/{date}?adjusted=true"
     try:
-        res = requests.get(url).json()
+        res = await api.get_json(url)
         if 'results' not in res: return []
-        
+
         df = pd.DataFrame(res['results'])
-        
+
         if df.empty or 'v' not in df.columns or 'c' not in df.columns:
             return []
 
         # 거래량 100만불 이상 & 5% 이상 상승 종목 필터링
         df['dollar_vol'] = df['v'] * df['c']
-        candidates = df[(df['dollar_vol'] > 1_000_000) & 
+        candidates = df[(df['dollar_vol'] > 1_000_000) &
                         ((df['c'] - df['o']) / df['o'] > 0.05)]
-        
+
         if candidates.empty: return []
 
         # 상승률 순 정렬 후 Top 10만 추출 (20 -> 10으로 변경)
-        candidates['change'] = (candidates['c'] - candidates['o']) / candidates['o']
+        candidates = candidates.assign(change=(candidates['c'] - candidates['o']) / candidates['o'])
         top_10 = candidates.sort_values('change', ascending=False).head(10)['T'].tolist()
         return top_10
     except Exception as e:
-        print(f"❌ [Error] {date} Gainers fetch failed: {e}")
+        print(f"❌ [Error] {date} Gainers fetch failed: {e}", flush=True)
         return []
 
-def download_ticker_data(ticker, date):
-    """Tick(Trades), Quote, Aggregate 데이터 다운로드"""
-    save_dir = f"{DATA_DIR}/{date}/{ticker}"
-    
-    # 이미 Trades와 Quotes가 둘 다 있으면 스킵
-    if os.path.exists(save_dir) and \
-       os.path.exists(f"{save_dir}/trades.csv") and \
-       os.path.exists(f"{save_dir}/quotes.csv"):
-        print(f"⏩ {date} | {ticker} All data exists. Skipping.")
-        return
-
+async def download_ticker_data(api, ticker, date):
+    """Tick(Trades), Quote, Aggregate 데이터 다운로드 (파일별로 이어받기)"""
+    save_dir = tick_store.partition_dir(date, ticker, DATA_DIR)
     os.makedirs(save_dir, exist_ok=True)
-    
-    # 1. Aggregates (1min)
-    try:
-        url_agg = f"{BASE_URL}/v2/aggs/ticker/{ticker}/range/1/minute/{date}/{date}?adjusted=true&sort=asc&limit=50000&apiKey={POLYGON_API_KEY}"
-        res = requests.get(url_agg).json()
-        if 'results' in res:
-            pd.DataFrame(res['results']).to_csv(f"{save_dir}/agg.csv", index=False)
-    except: pass
+    marker = await asyncio.to_thread(load_marker, save_dir)
 
-    # 2. Trades (Ticks)
-    try:
-        url_trade = f"{BASE_URL}/v3/trades/{ticker}?timestamp={date}&limit=50000&apiKey={POLYGON_API_KEY}"
-        res = requests.get(url_trade).json()
-        if 'results' in res:
-            pd.DataFrame(res['results']).to_csv(f"{save_dir}/trades.csv", index=False)
-    except: pass
+    # Quotes는 데이터가 많으니 마지막에 (페이지가 제일 많음)
+    # 페이지를 이어 쓰므로 전부 시간 오름차순으로 요청
+    sources = (
+        ('agg', f"{BASE_URL}/v2/aggs/ticker/{ticker}/range/1/minute/{date}/{date}?adjusted=true&sort=asc&limit={PAGE_LIMIT}"),
+        ('trades', f"{BASE_URL}/v3/trades/{ticker}?timestamp={date}&order=asc&sort=timestamp&limit={PAGE_LIMIT}"),
+        ('quotes', f"{BASE_URL}/v3/quotes/{ticker}?timestamp={date}&order=asc&sort=timestamp&limit={PAGE_LIMIT}"),
+    )
+
+    saved, skipped, failed = [], [], []
+    for name, url in sources:
+        if await asyncio.to_thread(marker_ok, save_dir, marker, name):
+            skipped.append(name)
+            continue
+        try:
+            entry = await stream_to_store(api, url, date, ticker, name)
+            pages = entry['pages']
+            marker[name] = entry
+            await asyncio.to_thread(save_marker, save_dir, marker)
+            saved.append(f"{name} {entry['rows']:,}" + (f" ({pages}p)" if pages > 1 else ""))
+        except Exception as e:
+            failed.append(name)
+            print(f"   ⚠️ {date} | {ticker} {name} download failed: {e}", flush=True)
+
+    if not saved and not failed:
+        print(f"⏩ {date} | {ticker} All data exists. Skipping.", flush=True)
+    elif failed:
+        print(f"❌ {date} | {ticker} Incomplete (failed: {', '.join(failed)}) - 다음 실행 때 이어받음", flush=True)
+    else:
+        print(f"✅ {date} | {ticker} Data Saved ({', '.join(saved)})", flush=True)
+    return not failed
+
+async def collect_date(api, date_str, ticker_sem):
+    gainers = await get_daily_gainers(api, date_str)
+    if not gainers:
+        print(f"📅 {date_str} No gainers found or holiday.", flush=True)
+        return 0, 0
+
+    print(f"📅 {date_str} Targets: {gainers}", flush=True)
+    async def limited(ticker):
+        async with ticker_sem:
+            return await download_ticker_data(api, ticker, date_str)
 
-    # 3. Quotes (NBBO) - 🔥 [중요] 주석 해제됨 (다운로드 실행)
+    results = await asyncio.gather(*(limited(t) for t in gainers))
+    return len(results), sum(1 for ok in results if not ok)
+
+async def collect(start, end, concurrency, rate, ticker_concurrency=TICKER_CONCURRENCY):
+    # 영업일 기준 날짜 리스트
+    dates = [d.strftime('%Y-%m-%d') for d in pd.date_range(start=start, end=end, freq='B')]
+
+    print(f"📊 총 수집 예정일: {len(dates)}일 (Top 10 종목/일) | 동시 종목-일 {ticker_concurrency} / 동시 요청 {concurrency} / 초당 {rate:g}건")
+    print(f"⚠️ 주의: 호가(Quotes) 데이터 포함으로 용량이 큽니다. 디스크 공간을 확인하세요.")
+
+    api = PolygonClient(POLYGON_API_KEY, concurrency, rate)
+    # 종목-일 세마포어: 요청 세마포어와 별개 (진행 중인 페이지 = 메모리 상한, 완료 순서)
+    ticker_sem = asyncio.Semaphore(ticker_concurrency)
+    started = time.monotonic()
     try:
-        # Quotes는 데이터가 많아서 limit를 최대로 늘림
-        url_quote = f"{BASE_URL}/v3/quotes/{ticker}?timestamp={date}&limit=50000&apiKey={POLYGON_API_KEY}"
-        res = requests.get(url_quote).json()
-        if 'results' in res:
-            pd.DataFrame(res['results']).to_csv(f"{save_dir}/quotes.csv", index=False)
-            # print(f"   └─ Quotes saved for {ticker}") # 로그 너무 많으면 주석 처리
-    except Exception as e: 
-        print(f"   ⚠️ Quote download failed: {e}")
-    
-    print(f"✅ {date} | {ticker} Data Saved")
+        # 날짜끼리도 동시에 (요청 수는 세마포어 + 속도 제한이 조절)
+        per_date = await asyncio.gather(*(collect_date(api, d, ticker_sem) for d in dates))
+    finally:
+        await api.close()
+
+    elapsed = time.monotonic() - started
+    tickers = sum(n for n, _ in per_date)
+    failed = sum(f for _, f in per_date)
+    s = api.stats
+    print(f"\n🏁 완료: {tickers}개 종목-일 (미완료 {failed}) | 요청 {s['requests']:,} (재시도 {s['retries']:,}, 페이지 {s['pages']:,}) | "
+          f"{s['bytes'] / 1e6:,.1f}MB / {elapsed:.0f}s ({s['bytes'] / 1e6 / max(elapsed, 1e-9):.2f}MB/s)", flush=True)
 
 def main():
+    parser = argparse.ArgumentParser(description='Polygon trades/quotes/agg dataset collector')
+    parser.add_argument('--start', default=START_DATE)
+    parser.add_argument('--end', default=END_DATE)
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='동시 HTTP 요청 수')
+    parser.add_argument('--rate', type=float, default=RATE_LIMIT, help='초당 요청 수 상한')
+    parser.add_argument('--ticker-concurrency', type=int, default=TICKER_CONCURRENCY, help='동시에 받는 종목-일 수')
+    args = parser.parse_args()
+
     if not POLYGON_API_KEY:
         print("❌ Error: API Key Missing!")
         return
 
-    # 영업일 기준 날짜 리스트
-    dates = pd.date_range(start=START_DATE, end=END_DATE, freq='B') 
-    
-    print(f"📊 총 수집 예정일: {len(dates)}일 (Top 10 종목/일)")
-    print(f"⚠️ 주의: 호가(Quotes) 데이터 포함으로 용량이 큽니다. 디스크 공간을 확인하세요.")
-
-    for d in dates:
-        date_str = d.strftime('%Y-%m-%d')
-        print(f"\n📅 Processing {date_str}...")
-        
-        gainers = get_daily_gainers(date_str)
-        
-        if not gainers:
-            print("   No gainers found or holiday.")
-            continue
-
-        print(f"   Targets: {gainers}")
-        
-        # 워커 수 5 유지
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            for ticker in gainers:
-                executor.submit(download_ticker_data, ticker, date_str)
-                time.sleep(0.1) 
+    print(f"📅 수집 기간 설정: {args.start} ~ {args.end}")
+    asyncio.run(collect(args.start, args.end, args.concurrency, args.rate, args.ticker_concurrency))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
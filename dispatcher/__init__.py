@@ -0,0 +1,6 @@
+# 알림 발송 단일 경로 (FCM / Discord / 웹 채팅 / 로컬 대역)
+from .base import Alert, RateLimiter, Transport
+from .core import Dispatcher, build_dispatcher
+from .fcm import FCMTransport, db_token_pruner, db_token_source, latency_summary, send_multicast
+from .local import LocalTransport
+from .webhooks import ChatBroadcastTransport, DiscordTransport
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+# ==============================================================================
+# Dispatcher 공통 타입: Alert / Transport / RateLimiter
+# ==============================================================================
+
+
+@dataclass
+class Alert:
+    """채널에 상관없이 하나로 통일된 알림 단위 (제목/본문을 안 주면 기본 포맷)"""
+    ticker: str
+    price: object
+    score: object
+    entry: object = None
+    tp: object = None
+    sl: object = None
+    kind: str = 'signal'
+    title: str = None
+    body: str = None
+    queued_at: float = None     # fcm_queue 적재 시각 (epoch 초) - 배송 지연 측정용
+    trace: dict = None          # 시세 수신부터의 구간 타임스탬프 (tracing.py)
+
+    def __post_init__(self):
+        if self.title is None:
+            prefix = "BUY" if self.is_buy else "SCAN"
+            self.title = f"{prefix} {self.ticker} (Score: {self.score})"
+        if self.body is None:
+            if self.is_buy:
+                self.body = f"Entry: ${self.entry} / TP: ${self.tp}"
+            else:
+                self.body = f"Current: ${self.price}"
+
+    @property
+    def is_buy(self):
+        return bool(self.entry and self.tp)
+
+    @classmethod
+    def from_task(cls, task):
+        """fcm_queue 작업 지시서(JSON dict) -> Alert"""
+        return cls(
+            ticker=task['ticker'], price=task['price'], score=task['score'],
+            entry=task.get('entry') or None, tp=task.get('tp') or None, sl=task.get('sl') or None,
+            kind=task.get('type', 'signal'), queued_at=task.get('timestamp'),
+            trace=task.get('trace')
+        )
+
+    def data(self):
+        """FCM data payload (값은 전부 문자열이어야 함)"""
+        return {
+            'type': self.kind,
+            'title': self.title,
+            'body': self.body,
+            'ticker': str(self.ticker),
+            'price': str(self.price),
+            'score': str(self.score),
+            'entry': str(self.entry) if self.entry else "",
+            'tp': str(self.tp) if self.tp else "",
+            'sl': str(self.sl) if self.sl else "",
+            'click_action': '/'
+        }
+
+
+class RateLimiter:
+    """
+    채널별 토큰 버킷 (asyncio 단일 스레드 전제라 락 없음)
+    토큰이 없으면 max_wait까지 기다리고, 그래도 안 되면 False (해당 채널만 발송 생략)
+    """
+    def __init__(self, rate, burst, max_wait=5.0):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            wait = (1 - self.tokens) / self.rate
+            if waited + wait > self.max_wait:
+                return False
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class Transport:
+    """
+    채널 하나 (FCM / Discord / 채팅 / 로컬)
+    하위 클래스는 name, 기본 속도 제한을 정하고 async send(alert)를 구현합니다.
+    """
+    name = 'base'
+    default_rate = 10.0     # 초당 발송 수
+    default_burst = 10
+    default_max_wait = 5.0  # 토큰 대기 상한 (dispatch()는 모든 채널을 기다리므로 부차 채널은 0)
+
+    def __init__(self, rate=None, burst=None, max_wait=None):
+        self.limiter = RateLimiter(
+            rate if rate is not None else self.default_rate,
+            burst if burst is not None else self.default_burst,
+            max_wait if max_wait is not None else self.default_max_wait
+        )
+
+    async def send(self, alert):
+        raise NotImplementedError
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+
+from metrics import percentile
+
+from .local import LocalTransport
+from .webhooks import ChatBroadcastTransport, DiscordTransport
+
+# ==============================================================================
+# Dispatcher: 알림 1건 -> 등록된 모든 채널로 동시에 발송
+# ==============================================================================
+# - 채널마다 속도 제한 (초과분은 FCM/로컬은 최대 수 초 대기 후, 웹훅은 바로 생략
+#   -> dispatch()가 모든 채널을 기다려도 푸시가 웹훅 제한 때문에 늦어지지 않음)
+# - 한 채널이 실패/지연돼도 다른 채널에는 영향 없음
+# - 채널별 발송 지연 p50/p95/p99, 성공/실패/생략 카운트
+
+ALERT_CHANNELS_ENV = 'ALERT_CHANNELS'
+
+
+class Dispatcher:
+    def __init__(self, transports):
+        self.transports = list(transports)
+        self.latency_ms = defaultdict(lambda: deque(maxlen=2000))
+        self.counts = defaultdict(lambda: {'sent': 0, 'errors': 0, 'dropped': 0})
+
+    async def _send(self, transport, alert):
+        name = transport.name
+        if not await transport.limiter.acquire():
+            self.counts[name]['dropped'] += 1
+            print(f"⏳ [Dispatcher] {name} rate limited, skipped {alert.ticker}", flush=True)
+            return None
+
+        started = time.perf_counter()
+        try:
+            result = await transport.send(alert)
+        except Exception as e:
+            self.counts[name]['errors'] += 1
+            print(f"❌ [Dispatcher] {name} send failed ({alert.ticker}): {str(e)[:100]}", flush=True)
+            return None
+
+        self.latency_ms[name].append((time.perf_counter() - started) * 1000)
+        self.counts[name]['sent'] += 1
+        return result
+
+    async def dispatch(self, alert):
+        """{채널명: 결과} (실패/생략 채널은 None)"""
+        results = await asyncio.gather(*(self._send(t, alert) for t in self.transports))
+        return {t.name: res for t, res in zip(self.transports, results)}
+
+    def stats(self):
+        out = {}
+        for t in self.transports:
+            samples = self.latency_ms[t.name]
+            out[t.name] = {
+                **self.counts[t.name],
+                **{f"p{p}": round(percentile(samples, p), 1) for p in (50, 95, 99)}
+            }
+        return out
+
+
+def build_dispatcher(channels=None, default='fcm', fcm=None):
+    """
+    채널 이름 목록(없으면 ALERT_CHANNELS 환경변수, 쉼표 구분)으로 디스패처 구성
+    fcm 채널은 토큰 소스가 프로세스마다 달라서 만들어진 FCMTransport를 넘겨받습니다.
+    예) ALERT_CHANNELS=fcm,discord,chat  /  부하 테스트: ALERT_CHANNELS=local
+    """
+    if channels is None:
+        channels = os.environ.get(ALERT_CHANNELS_ENV, default)
+    if isinstance(channels, str):
+        channels = [c.strip() for c in channels.split(',') if c.strip()]
+
+    transports = []
+    for name in channels:
+        if name == 'fcm':
+            if fcm is None:
+                print("⚠️ [Dispatcher] fcm channel requested without FCMTransport, skipped", flush=True)
+                continue
+            transports.append(fcm)
+        elif name == 'discord':
+            transports.append(DiscordTransport())
+        elif name == 'chat':
+            transports.append(ChatBroadcastTransport())
+        elif name == 'local':
+            transports.append(LocalTransport())
+        else:
+            print(f"⚠️ [Dispatcher] Unknown channel '{name}' ignored", flush=True)
+
+    print(f"📡 [Dispatcher] Channels: {[t.name for t in transports]}", flush=True)
+    return Dispatcher(transports)
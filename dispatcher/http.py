@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+# ==============================================================================
+# 공유 HTTP 클라이언트 (웹훅 채널용)
+# ==============================================================================
+# 알림마다 httpx.AsyncClient()를 새로 열던 것 제거 -> 프로세스당 1개 커넥션 풀 재사용
+# (AsyncClient는 처음 쓰인 이벤트 루프에 묶이므로, 루프가 바뀌면 새로 만듭니다)
+
+HTTP_TIMEOUT = httpx.Timeout(5.0, connect=3.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+_client = None
+_client_loop = None
+
+
+def get_http_client():
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
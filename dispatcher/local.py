@@ -0,0 +1,29 @@
+import asyncio
+from collections import deque
+
+from .base import Transport
+
+# ==============================================================================
+# 로컬 대역 채널 (부하 테스트용)
+# ==============================================================================
+# 실제 FCM/웹훅 대신 메모리에만 기록 -> 외부 호출 없이 디스패처 경로만 측정
+# latency_ms로 외부 API 응답 시간을 흉내낼 수 있습니다.
+
+
+class LocalTransport(Transport):
+    name = 'local'
+    default_rate = 1_000_000.0  # 사실상 무제한
+    default_burst = 1_000_000
+
+    def __init__(self, latency_ms=0.0, keep=1000, **kwargs):
+        super().__init__(**kwargs)
+        self.latency_ms = latency_ms
+        self.sent = deque(maxlen=keep)
+        self.count = 0
+
+    async def send(self, alert):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        self.sent.append(alert)
+        self.count += 1
+        return self.count
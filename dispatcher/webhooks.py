@@ -0,0 +1,57 @@
+import os
+
+from .base import Transport
+from .http import get_http_client
+
+# ==============================================================================
+# 웹훅 채널: Discord / 웹 채팅방 브로드캐스트 (app.py /api/chat/broadcast)
+# ==============================================================================
+
+DISCORD_WEBHOOK_URL = os.environ.get('DISCORD_WEBHOOK_URL')
+CHAT_BROADCAST_URL = os.environ.get('CHAT_BROADCAST_URL', 'http://localhost:10000/api/chat/broadcast')
+
+
+class DiscordTransport(Transport):
+    name = 'discord'
+    default_rate = 0.5      # Discord 웹훅 제한 (분당 30건)
+    default_burst = 5
+    default_max_wait = 0.0  # 제한에 걸리면 바로 생략 (같이 나가는 푸시를 붙잡지 않도록)
+
+    def __init__(self, url=DISCORD_WEBHOOK_URL, **kwargs):
+        super().__init__(**kwargs)
+        # 플레이스홀더/잘린 URL은 미설정으로 간주
+        if not url or "YOUR_DISCORD" in url or len(url) < 50:
+            url = None
+        self.url = url
+
+    async def send(self, alert):
+        if not self.url:
+            print(f"🔔 [알림] {alert.ticker} @ ${alert.price} (디스코드 URL 미설정)", flush=True)
+            return None
+
+        content = f"🚀 **{alert.title}** 🚀\n{alert.body}"
+        response = await get_http_client().post(self.url, json={"content": content})
+        response.raise_for_status()
+        return response.status_code
+
+
+class ChatBroadcastTransport(Transport):
+    name = 'chat'
+    default_rate = 2.0
+    default_burst = 5
+    default_max_wait = 0.0
+
+    def __init__(self, url=CHAT_BROADCAST_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+
+    async def send(self, alert):
+        payload = {
+            'user': '🤖 AI Sniper',
+            'message': f"{alert.title}\n{alert.body}",
+            'type': 'bot_signal',
+            'ticker': str(alert.ticker)
+        }
+        response = await get_http_client().post(self.url, json=payload)
+        response.raise_for_status()
+        return response.status_code
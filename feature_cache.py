@@ -0,0 +1,292 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import tick_store
+
+# ==============================================================================
+# Feature Cache (종목-일별 피처 행렬을 .npy로 저장 -> mmap으로 재사용)
+# ==============================================================================
+# 백테스트/학습이 돌 때마다 trades -> 1초봉 -> 지표를 전부 다시 계산하던 것 -> 한 번만
+#
+#   featcache/sts_backtest-3f9a1c2b7d4e/_meta.json            (키 재료, 컬럼/타입)
+#                                       _index.json           (종목-일별 원본 stat, 행 수)
+#                                       date=2024-05-01/ABCD.npy      (float 행렬, 컬럼 순서 = meta)
+#                                       date=2024-05-01/ABCD.idx.npy  (int64 ns 시간 인덱스)
+#
+# - 키 = sha256(피처 함수 소스 + 의존 모듈 소스(indicators_sts 등) + 파라미터)
+#   -> 코드나 파라미터가 바뀌면 새 디렉터리, 예전 것은 그대로 (python feature_cache.py ls / rm)
+# - 종목-일마다 원본(tick_store trades.parquet) 크기/mtime을 기록 -> 원본이 바뀐 것만 다시 계산
+# - 빈 결과도 기록 (데이터 부족 종목을 매번 다시 계산하지 않음)
+# - 계산은 프로세스 풀로 병렬, 저장은 임시 파일 -> rename
+# - 주의: 피처 함수 안의 난수 placeholder(obi/vpin)도 캐시된 값으로 고정됨
+
+CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR', 'featcache')
+META_FILE = "_meta.json"
+INDEX_FILE = "_index.json"
+INDEX_FLUSH_EVERY = 50      # 중간에 죽어도 계산한 만큼은 남도록 주기적으로 index 저장
+
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return getattr(obj, '__qualname__', repr(obj))
+
+
+def feature_key(fn, params=None, deps=()):
+    """피처 코드 버전 + 파라미터 해시"""
+    h = hashlib.sha256()
+    h.update(f"{fn.__module__}.{fn.__qualname__}\n".encode())
+    h.update(_source(fn).encode())
+    for dep in deps:
+        h.update(_source(dep).encode())
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _source_stat(kinds, date, ticker, root):
+    stat = {}
+    for kind in kinds:
+        try:
+            st = os.stat(tick_store.file_path(kind, date, ticker, root))
+            stat[kind] = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            stat[kind] = None
+    return stat
+
+
+def _save_npy(path, arr):
+    with open(path + ".tmp", 'wb') as f:
+        np.save(f, arr)
+    os.replace(path + ".tmp", path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _build(fn, params, date, ticker, out_dir, dtype):
+    """워커 프로세스: 피처 계산 -> .npy 저장 -> (rows, columns, dtypes)"""
+    df = fn(date, ticker, **params)
+    base = os.path.join(out_dir, ticker)
+    if df is None or df.empty:
+        # 원본이 바뀌어 다시 계산했더니 비었으면 예전 행렬도 지움 (남아 있으면 그대로 읽힘)
+        _remove(base + ".npy")
+        _remove(base + ".idx.npy")
+        return 0, None, None
+    os.makedirs(out_dir, exist_ok=True)
+    _save_npy(base + ".npy", np.ascontiguousarray(df.to_numpy(dtype=dtype)))
+    if isinstance(df.index, pd.DatetimeIndex):
+        _save_npy(base + ".idx.npy", df.index.asi8)
+    else:
+        _remove(base + ".idx.npy")
+    return len(df), list(df.columns), {c: str(t) for c, t in df.dtypes.items()}
+
+
+class FeatureSet:
+    """
+    fn(date, ticker, **params) -> DataFrame (또는 None) 결과를 종목-일 단위로 캐시
+    deps: 키에 소스를 포함할 모듈/함수 (fn이 부르는 지표 모듈 등)
+    sources: 변경 감지할 tick_store 종류
+    """
+
+    def __init__(self, name, fn, params=None, deps=(), sources=('trades',),
+                 root=CACHE_DIR, store_root=tick_store.STORE_DIR, dtype='float64'):
+        self.name = name
+        self.fn = fn
+        self.params = dict(params or {})
+        self.deps = tuple(deps)
+        self.sources = tuple(sources)
+        self.store_root = store_root
+        self.dtype = dtype
+        self.key = feature_key(fn, self.params, self.deps)
+        self.path = os.path.join(root, f"{name}-{self.key[:12]}")
+        self._meta = None
+        self._index = None
+
+    # -------------------- meta / index --------------------
+
+    def _read_json(self, name, default):
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write_json(self, name, data):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, name)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = self._read_json(META_FILE, {})
+        return self._meta
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._read_json(INDEX_FILE, {})
+        return self._index
+
+    def _entry_dir(self, date):
+        return os.path.join(self.path, f"date={date}")
+
+    def is_fresh(self, date, ticker):
+        entry = self.index.get(f"{date}/{ticker}")
+        if not entry or entry['source'] != _source_stat(self.sources, date, ticker, self.store_root):
+            return False
+        if entry['rows'] == 0: return True
+        return os.path.exists(os.path.join(self._entry_dir(date), f"{ticker}.npy"))
+
+    # -------------------- 계산 --------------------
+
+    def materialize(self, parts, workers=None):
+        """(date, ticker) 목록 중 캐시가 없거나 원본이 바뀐 것만 계산"""
+        started = time.monotonic()
+        todo = [(d, t) for d, t in parts if not self.is_fresh(d, t)]
+        reused = len(parts) - len(todo)
+        built = empty = failed = 0
+
+        if todo and not self.meta:
+            self._meta = {'name': self.name, 'key': self.key, 'fn': f"{self.fn.__module__}.{self.fn.__qualname__}",
+                          'params': self.params, 'dtype': self.dtype, 'columns': None, 'dtypes': None}
+            self._write_json(META_FILE, self._meta)
+
+        def record(date, ticker, result):
+            nonlocal built, empty
+            rows, columns, dtypes = result
+            if rows and self.meta['columns'] is None:
+                self.meta['columns'], self.meta['dtypes'] = columns, dtypes
+                self._write_json(META_FILE, self.meta)
+            elif rows and columns != self.meta['columns']:
+                raise ValueError(f"{date} {ticker}: 컬럼이 다름 {columns} != {self.meta['columns']}")
+            self.index[f"{date}/{ticker}"] = {
+                'rows': rows, 'source': _source_stat(self.sources, date, ticker, self.store_root)
+            }
+            if rows: built += 1
+            else: empty += 1
+            if (built + empty) % INDEX_FLUSH_EVERY == 0:
+                self._write_json(INDEX_FILE, self.index)
+
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        try:
+            if workers <= 1 or len(todo) <= 1:
+                for date, ticker in todo:
+                    try:
+                        result = _build(self.fn, self.params, date, ticker, self._entry_dir(date), self.dtype)
+                    except Exception as e:
+                        failed += 1
+                        print(f"   ⚠️ {date} | {ticker} 피처 계산 실패: {e}", flush=True)
+                        continue
+                    record(date, ticker, result)
+            elif todo:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {
+                        pool.submit(_build, self.fn, self.params, d, t, self._entry_dir(d), self.dtype): (d, t)
+                        for d, t in todo
+                    }
+                    for fut in as_completed(futures):
+                        date, ticker = futures[fut]
+                        try:
+                            result = fut.result()
+                        except Exception as e:
+                            failed += 1
+                            print(f"   ⚠️ {date} | {ticker} 피처 계산 실패: {e}", flush=True)
+                            continue
+                        record(date, ticker, result)
+        finally:
+            if todo:
+                self._write_json(INDEX_FILE, self.index)
+
+        print(f"🧮 [Feature Cache] {os.path.basename(self.path)}: 재사용 {reused} / 계산 {built} / 빈 결과 {empty}"
+              + (f" / 실패 {failed}" if failed else "") + f" | {time.monotonic() - started:.1f}s", flush=True)
+        return {'reused': reused, 'built': built, 'empty': empty, 'failed': failed}
+
+    # -------------------- 읽기 --------------------
+
+    def load_array(self, date, ticker):
+        """memmap 행렬 (index에 없거나 빈 결과면 None - 파일만 남아 있는 건 믿지 않음)"""
+        entry = self.index.get(f"{date}/{ticker}")
+        if not entry or entry['rows'] == 0: return None
+        path = os.path.join(self._entry_dir(date), f"{ticker}.npy")
+        if not os.path.exists(path): return None
+        return np.load(path, mmap_mode='r')
+
+    def load_frame(self, date, ticker):
+        """종목-일 하나를 원래 컬럼/타입의 DataFrame으로 (memmap 위에 올림)"""
+        arr = self.load_array(date, ticker)
+        if arr is None: return None
+        idx_path = os.path.join(self._entry_dir(date), f"{ticker}.idx.npy")
+        index = pd.DatetimeIndex(np.load(idx_path)) if os.path.exists(idx_path) else None
+        df = pd.DataFrame(arr, columns=self.meta['columns'], index=index, copy=False)
+        # 정수였던 컬럼(라벨 등)만 원래 타입으로
+        restore = {c: t for c, t in (self.meta.get('dtypes') or {}).items() if t != str(arr.dtype)}
+        return df.astype(restore) if restore else df
+
+    def load(self, parts, workers=None):
+        """필요한 것만 계산한 뒤 전부 이어 붙인 DataFrame (없으면 None)"""
+        self.materialize(parts, workers)
+        frames = []
+        for date, ticker in parts:
+            df = self.load_frame(date, ticker)
+            if df is not None and not df.empty:
+                frames.append(df)
+        return pd.concat(frames) if frames else None
+
+
+# ------------------------------------------------------------------------------
+# CLI: 캐시 목록 / 삭제
+# ------------------------------------------------------------------------------
+
+def _dir_size(path):
+    return sum(os.path.getsize(p) for p in glob.glob(os.path.join(path, "**", "*"), recursive=True) if os.path.isfile(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feature cache tools')
+    parser.add_argument('--root', default=CACHE_DIR)
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('ls', help='캐시 세트 목록 (이름-키, 종목-일 수, 크기)')
+    rm = sub.add_parser('rm', help='캐시 세트 삭제')
+    rm.add_argument('names', nargs='+', help='ls에 나온 이름-키 디렉터리')
+    args = parser.parse_args()
+
+    if args.cmd == 'ls':
+        for path in sorted(glob.glob(os.path.join(args.root, "*-*"))):
+            if not os.path.isdir(path): continue
+            try:
+                with open(os.path.join(path, INDEX_FILE)) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+            rows = sum(e['rows'] for e in index.values())
+            print(f"{os.path.basename(path)}  {len(index)} ticker-days  {rows:,} rows  {_dir_size(path) / 1e6:,.1f}MB")
+    elif args.cmd == 'rm':
+        for name in args.names:
+            path = os.path.join(args.root, os.path.basename(name))
+            if os.path.exists(os.path.join(path, META_FILE)):
+                shutil.rmtree(path)
+                print(f"🗑️ {name} 삭제")
+            else:
+                print(f"⚠️ {name}: 캐시 세트가 아님")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,12 @@ import websockets
 import redis.asyncio as redis
 import os
 import json
+import time
 
 # --- 설정 ---
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
-WS_URI = "wss://socket.polygon.io/stocks"
+WS_URI = os.environ.get('POLYGON_WS_URI', "wss://socket.polygon.io/stocks")  # polygon_sim.py로 교체 가능
 
 # Redis 연결
 r = redis.from_url(REDIS_URL)
@@ -46,7 +47,10 @@ async def producer():
                     # [A] 데이터 수신 (타임아웃을 줘서 주기적으로 구독 관리 로직이 돌게 함)
                     try:
                         msg = await asyncio.wait_for(ws.recv(), timeout=0.5)
-                        await r.lpush('ticker_stream', msg)
+                        # 수신 시각을 봉투에 같이 실어 보냄 (지연 추적용)
+                        # 원본 프레임은 다시 직렬화하지 않고 문자열 그대로 끼워 넣음
+                        ingest_ts = time.time()
+                        await r.lpush('ticker_stream', f'{{"ingest_ts": {ingest_ts:.6f}, "events": {msg}}}')
                         
                         # Redis 청소 (가끔씩)
                         if hash(msg) % 1000 == 0:
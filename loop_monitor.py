@@ -0,0 +1,168 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from metrics import REGISTRY, percentile
+
+# ==============================================================================
+# Event Loop 지연 모니터 (느린 콜백 + 원인 종목/코드 경로 추적)
+# ==============================================================================
+# 1. lag probe: interval마다 잠들었다 깨는 시간이 얼마나 밀렸는지 -> p50/p95/p99
+# 2. 콜백 타이머: asyncio Handle._run을 감싸서 threshold 넘는 콜백을 로그
+# 3. 워치독 스레드: 콜백이 threshold를 넘기는 '도중에' 루프 스레드 스택을 떠둠
+#    -> 어느 함수/줄에서 멈춰 있었는지 (pandas 계산 등) 그대로 보임
+# 4. section(ticker, path): 핫스팟을 감싸두면 느린 콜백 안에서 어느 종목이
+#    얼마나 먹었는지 같이 출력
+#
+# LOOP_MONITOR=0 이면 비활성화 (section은 아무것도 안 하는 컨텍스트)
+
+LOOP_MONITOR_ENABLED = os.environ.get('LOOP_MONITOR', '1') != '0'
+LOOP_SLOW_CALLBACK_MS = float(os.environ.get('LOOP_SLOW_CALLBACK_MS', '20'))
+LOOP_PROBE_INTERVAL = 0.1
+LOOP_REPORT_INTERVAL = 60.0
+STACK_DEPTH = 8
+
+
+def _short_frame(fs):
+    return f"{os.path.basename(fs.filename)}:{fs.lineno} {fs.name}"
+
+
+class LoopMonitor:
+    def __init__(self, threshold_ms=LOOP_SLOW_CALLBACK_MS, registry=REGISTRY):
+        self.threshold = threshold_ms / 1000.0
+        self.enabled = False
+        self.loop_thread_id = None
+
+        self.lag_ms = deque(maxlen=3000)       # 최근 lag 샘플 (probe 0.1초 -> 약 5분)
+        self._sections = []                     # 현재 콜백 안에서 실행된 (ticker, path, sec)
+        self._callback_started = None           # 실행 중인 콜백 시작 시각 (워치독이 읽음)
+        self._stall_stack = None                # 워치독이 떠 둔 스택
+
+        self.lag_hist = registry.histogram('event_loop_lag_seconds', 'Event loop wake-up delay')
+        lag_quantile = registry.gauge('event_loop_lag_quantile_seconds', 'Recent event loop lag', ('quantile',))
+        for q in (50, 95, 99):
+            lag_quantile.set_function(lambda q=q: percentile(list(self.lag_ms), q) / 1000.0, quantile=f"0.{q}")
+        self.slow_total = registry.counter('event_loop_slow_callbacks_total', 'Callbacks over the slow threshold')
+        self.section_hist = registry.histogram('loop_section_seconds', 'Time spent in monitored sections', ('path',))
+
+    # ------------------------------------------------------------------
+    # 핫스팟 표시
+    # ------------------------------------------------------------------
+    def section(self, ticker, path):
+        if not self.enabled:
+            return nullcontext()
+        return self._section(ticker, path)
+
+    @contextmanager
+    def _section(self, ticker, path):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._sections.append((ticker, path, elapsed))
+            self.section_hist.observe(elapsed, path=path)
+
+    # ------------------------------------------------------------------
+    # 콜백 타이머 (Handle._run 래핑)
+    # ------------------------------------------------------------------
+    def _install_handle_timer(self):
+        monitor = self
+        original_run = asyncio.events.Handle._run
+        if getattr(original_run, '_loop_monitor', False):
+            return
+
+        def _run(handle):
+            monitor._sections = []
+            monitor._stall_stack = None
+            started = time.perf_counter()
+            monitor._callback_started = started
+            try:
+                return original_run(handle)
+            finally:
+                monitor._callback_started = None
+                elapsed = time.perf_counter() - started
+                if elapsed >= monitor.threshold:
+                    monitor._report_slow(handle, elapsed)
+
+        _run._loop_monitor = True
+        asyncio.events.Handle._run = _run
+
+    def _report_slow(self, handle, elapsed):
+        self.slow_total.inc()
+
+        # 종목별 합산 (가장 오래 먹은 순)
+        by_key = {}
+        for ticker, path, sec in self._sections:
+            by_key[(ticker, path)] = by_key.get((ticker, path), 0.0) + sec
+        top = sorted(by_key.items(), key=lambda kv: kv[1], reverse=True)[:3]
+        attribution = ", ".join(f"{t} {p} {sec * 1000:.1f}ms" for (t, p), sec in top) or "-"
+
+        desc = repr(handle)
+        if len(desc) > 160: desc = desc[:157] + "..."
+        print(f"🐢 [Loop] Slow callback {elapsed * 1000:.1f}ms | {attribution} | {desc}", flush=True)
+        if self._stall_stack:
+            print(f"   ↳ stalled at: {' <- '.join(self._stall_stack)}", flush=True)
+
+    # ------------------------------------------------------------------
+    # 워치독 (별도 스레드)
+    # ------------------------------------------------------------------
+    def _watchdog(self):
+        poll = max(self.threshold / 2, 0.005)
+        while True:
+            time.sleep(poll)
+            started = self._callback_started
+            if started is None or self._stall_stack is not None:
+                continue
+            if time.perf_counter() - started < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+            # 그 사이에 콜백이 끝나고 다음 콜백이 시작됐으면 버림
+            if self._callback_started is started:
+                # 안쪽(실제로 멈춘 곳)부터
+                self._stall_stack = [_short_frame(fs) for fs in reversed(stack)]
+
+    # ------------------------------------------------------------------
+    # lag probe + 주기 리포트
+    # ------------------------------------------------------------------
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_PROBE_INTERVAL)
+            now = loop.time()
+            lag = max(0.0, now - started - LOOP_PROBE_INTERVAL)
+            self.lag_ms.append(lag * 1000)
+            self.lag_hist.observe(lag)
+
+            if now - last_report >= LOOP_REPORT_INTERVAL:
+                last_report = now
+                p = self.percentiles()
+                print(f"⏱️ [Loop] lag p50 {p['p50']:.1f}ms / p95 {p['p95']:.1f}ms / p99 {p['p99']:.1f}ms", flush=True)
+
+    def percentiles(self):
+        samples = list(self.lag_ms)
+        return {f"p{q}": percentile(samples, q) for q in (50, 95, 99)}
+
+    def start(self):
+        """실행 중인 이벤트 루프 안에서 호출"""
+        if not LOOP_MONITOR_ENABLED or self.enabled:
+            return
+        self.enabled = True
+        self.loop_thread_id = threading.get_ident()
+        self._install_handle_timer()
+        threading.Thread(target=self._watchdog, name='loop-watchdog', daemon=True).start()
+        asyncio.get_running_loop().create_task(self._probe())
+        print(f"⏱️ [Loop] Monitor started (slow callback > {self.threshold * 1000:.0f}ms)", flush=True)
+
+
+MONITOR = LoopMonitor()
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==============================================================================
+# 경량 메트릭 레지스트리 (Prometheus 텍스트 포맷)
+# ==============================================================================
+# print 로그 말고 숫자로 보기 위한 최소 구현 (외부 라이브러리 없음)
+# - Counter / Gauge / Histogram, 라벨 지원
+# - Gauge는 함수를 걸어두면 스크레이프 시점에 값을 읽음 (큐 길이 등)
+# - start_metrics_server(): 백그라운드 스레드에서 GET /metrics 응답
+#   (worker.py: METRICS_PORT 기본 9100 / STS_Engine.py 단독 실행: 9101)
+
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + (extra or [])
+    if not pairs: return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+def _format_value(v):
+    if v == float('inf'): return '+Inf'
+    return repr(float(v))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = defaultdict(float)
+
+    def inc(self, n=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] += n
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = defaultdict(float)
+        self._functions = {}
+
+    def set(self, v, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = v
+
+    def inc(self, n=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] += n
+
+    def dec(self, n=1, **labels):
+        self.inc(-n, **labels)
+
+    def set_function(self, fn, **labels):
+        """스크레이프할 때 fn()을 호출해서 값으로 사용 (다른 스레드에서 불리므로 가볍고 안전해야 함)"""
+        self._functions[_label_key(self.labelnames, labels)] = fn
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, fn in list(self._functions.items()):
+            try:
+                values[key] = fn()
+            except Exception:
+                continue  # 읽는 순간 구조가 바뀌는 등 - 이번 스크레이프만 생략
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._counts = {}   # key -> [bucket별 개수]
+        self._sums = defaultdict(float)
+
+    def observe(self, v, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if v <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] += v
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in self._counts.items()]
+        lines = []
+        for key, counts, total in items:
+            cum = 0
+            for bound, n in zip(self.buckets, counts):
+                cum += n
+                le = [('le', _format_value(bound))]
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cum}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cum}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get_or_create(Counter, name, help_text, labelnames=labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._get_or_create(Gauge, name, help_text, labelnames=labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labelnames=labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def executor_gauges(name, executor, registry=REGISTRY):
+    """
+    ThreadPoolExecutor 포화도 (대기 중인 작업 수 / 살아 있는 스레드 수 / 최대 스레드 수)
+    표준 API가 없어서 내부 속성(_work_queue, _threads)을 읽습니다.
+    """
+    registry.gauge('executor_queue_depth', 'Tasks waiting for a thread', ('pool',)).set_function(
+        lambda: executor._work_queue.qsize(), pool=name)
+    registry.gauge('executor_threads', 'Threads started', ('pool',)).set_function(
+        lambda: len(executor._threads), pool=name)
+    registry.gauge('executor_max_workers', 'Configured max threads', ('pool',)).set(
+        executor._max_workers, pool=name)
+
+
+def start_metrics_server(default_port, registry=REGISTRY):
+    """METRICS_PORT(없으면 default_port)로 /metrics 서버 시작. 0이면 비활성화."""
+    port = int(os.environ.get('METRICS_PORT', default_port))
+    if not port: return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # 스크레이프마다 접근 로그 찍지 않음
+
+    try:
+        server = ThreadingHTTPServer((METRICS_HOST, port), Handler)
+    except OSError as e:
+        print(f"⚠️ [Metrics] Port {port} unavailable: {e}", flush=True)
+        return None
+
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    print(f"📈 [Metrics] Serving http://{METRICS_HOST}:{port}/metrics", flush=True)
+    return server
@@ -0,0 +1,178 @@
+# [notifier.py] 푸시 알림 전용 프로세스 (fcm_queue 소비)
+# worker.py 이벤트 루프에서 분리 -> 팬아웃이 아무리 커도 시세(tick) 처리 경로에 영향 없음
+
+import redis.asyncio as redis
+import asyncio
+import json
+import os
+import sys
+import time
+
+try:
+    from STS_Engine import (
+        DB_WORKER_POOL,
+        NOTI_WORKER_POOL,
+        init_db,
+        init_firebase,
+        get_db_connection,
+        release_db_connection
+    )
+    from dispatcher import Alert, FCMTransport, build_dispatcher, db_token_pruner
+    from subscribers import SubscriberIndex, follow_changes, publish_change
+    from tracing import LatencyHistogram
+except ImportError as e:
+    print(f"❌ [Notifier Error] 모듈 로드 실패: {e}", flush=True)
+    sys.exit(1)
+
+# --- 설정 ---
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+FCM_QUEUE = 'fcm_queue'
+FCM_BATCH_MAX = 50              # 한 번에 꺼내는 최대 알림 수
+FCM_POP_TIMEOUT = 5             # BRPOP 대기 (초) - 큐가 비어 있으면 여기서 블로킹
+FCM_DEDUPE_WINDOW = float(os.environ.get('FCM_DEDUPE_WINDOW', '30'))  # 같은 종목 재발송 억제 (초)
+
+r = redis.from_url(REDIS_URL)
+
+# [구독자 인덱스] 알림 기준 점수별 토큰 버킷 (app.py 변경 알림으로 증분 갱신)
+subscriber_index = SubscriberIndex()
+
+# 구간별 지연 히스토그램 (결정 -> 적재 -> 발송, 거래소 -> 발송 전체)
+stage_hist = LatencyHistogram()
+
+# 종목별 마지막 발송 기록: ticker -> (sent_at, is_buy)
+last_sent = {}
+
+
+def fetch_subscriber_rows():
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT token, min_score FROM fcm_tokens")
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        release_db_connection(conn)
+
+async def load_subscriber_rows():
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_WORKER_POOL, fetch_subscriber_rows)
+
+
+def is_buy(task):
+    return bool(task.get('entry') and task.get('tp'))
+
+async def pop_batch():
+    """
+    BRPOP으로 첫 건을 기다렸다가, 이미 쌓여 있는 나머지는 RPOP count로 한 번에 꺼냄
+    (LPUSH/RPOP 구조라 꺼낸 순서 = 적재 순서, 뒤쪽이 최신)
+    """
+    first = await r.brpop(FCM_QUEUE, timeout=FCM_POP_TIMEOUT)
+    if not first: return []
+
+    raw = [first[1]]
+    more = await r.rpop(FCM_QUEUE, FCM_BATCH_MAX - 1)
+    if more: raw.extend(more)
+
+    tasks = []
+    for packed in raw:
+        try:
+            tasks.append(json.loads(packed))
+        except Exception as e:
+            print(f"⚠️ [Notifier] Bad queue item dropped: {e}", flush=True)
+    return tasks
+
+def dedupe(tasks):
+    """
+    1. 배치 안에서는 종목당 1건 (BUY가 SCAN보다 우선, 같은 종류면 최신)
+    2. 윈도우 안에 이미 보낸 종목은 생략 (단, SCAN 후 BUY로 격상된 경우는 발송)
+    """
+    latest = {}
+    for task in tasks:
+        prev = latest.get(task['ticker'])
+        if prev is None or is_buy(task) or not is_buy(prev):
+            latest[task['ticker']] = task
+
+    now = time.time()
+    for ticker, (sent_at, was_buy) in list(last_sent.items()):
+        if now - sent_at >= FCM_DEDUPE_WINDOW:
+            del last_sent[ticker]
+
+    selected = []
+    for ticker, task in latest.items():
+        prev = last_sent.get(ticker)
+        if prev and (prev[1] or not is_buy(task)):
+            continue
+        last_sent[ticker] = (now, is_buy(task))
+        selected.append(task)
+    return selected
+
+
+async def eligible_tokens(score):
+    """구독자 인덱스에서 기준 점수 이하 토큰만 bisect로 추출 (DB 조회 없음)"""
+    if not subscriber_index.ready:
+        subscriber_index.load(await load_subscriber_rows())
+    return subscriber_index.eligible(score)
+
+prune_tokens_in_db = db_token_pruner(get_db_connection, release_db_connection, DB_WORKER_POOL)
+
+async def prune_tokens(tokens):
+    """만료 토큰 일괄 청소 (DB 삭제 + 인덱스 반영 알림)"""
+    await prune_tokens_in_db(tokens)
+    subscriber_index.delete(tokens)
+    await publish_change(r, 'delete', tokens=tokens)
+
+# 알림 채널 (기본 FCM, ALERT_CHANNELS=fcm,chat 처럼 추가 가능)
+dispatcher = build_dispatcher(
+    default='fcm',
+    fcm=FCMTransport(eligible_tokens, on_invalid=prune_tokens, executor=NOTI_WORKER_POOL)
+)
+
+
+async def process_fcm_job(task):
+    try:
+        alert = Alert.from_task(task)
+        await dispatcher.dispatch(alert)
+
+        if alert.trace:
+            alert.trace['send_ts'] = time.time()
+            stage_hist.observe_trace(alert.trace)
+    except Exception as e:
+        print(f"❌ [Notifier FCM Error] {e}", flush=True)
+
+
+async def fcm_consumer_loop():
+    print("📨 [Notifier] Started (BRPOP batch mode)", flush=True)
+
+    init_db()
+    init_firebase()
+    asyncio.create_task(follow_changes(subscriber_index, r, load_subscriber_rows))
+
+    while True:
+        try:
+            tasks = await pop_batch()
+            if not tasks: continue
+
+            selected = dedupe(tasks)
+            if len(selected) < len(tasks):
+                print(f"🧹 [Notifier] Deduped {len(tasks)} -> {len(selected)} signals", flush=True)
+
+            # 종목별 팬아웃은 서로 독립 -> 동시에 진행
+            await asyncio.gather(*(process_fcm_job(task) for task in selected))
+
+            # 알림은 드물어서 배치마다 바로 반영
+            if stage_hist.pending:
+                await stage_hist.flush(r)
+        except Exception as e:
+            print(f"❌ [Notifier Loop Error] {e}", flush=True)
+            await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    try:
+        asyncio.run(fcm_consumer_loop())
+    except KeyboardInterrupt:
+        print("🛑 [Notifier] Stopped by user.")
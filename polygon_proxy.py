@@ -0,0 +1,172 @@
+import bisect
+import os
+import time
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ttl_cache import TTLCache
+
+# ==============================================================================
+# Polygon Caching Proxy (app.py 전용)
+# ==============================================================================
+# 유저 트래픽이 그대로 Polygon 호출로 이어지지 않도록 중간에서 흡수합니다.
+# - 엔드포인트별 TTL (레퍼런스 정보는 몇 시간, 시장 개요는 몇 초)
+# - 같은 키 동시 미스는 1번만 호출 (TTLCache single-flight = request coalescing)
+# - 커넥션 재사용 세션 (요청마다 TCP/TLS 핸드셰이크 제거)
+# - 차트 분봉은 매번 7일치를 새로 받지 않고, 마지막 봉 이후 꼬리(tail)만 갱신
+
+POLYGON_REST_BASE = os.environ.get('POLYGON_REST_BASE', 'https://api.polygon.io')
+
+QUOTE_TTL = 2.0             # 호가: 모달 새로고침(5초)보다 짧게
+DETAILS_TTL = 6 * 3600.0    # 회사 정보/재무: 장중에 거의 안 바뀜
+OVERVIEW_TTL = 15.0         # 상승/하락 상위 (랜딩 페이지, 비로그인)
+CHART_TTL = 60.0            # 분봉 꼬리 갱신 주기 (1분에 1번)
+NOT_FOUND_TTL = 60.0        # 없는 종목도 잠깐 기억 (같은 오타로 계속 호출 방지)
+
+CHART_LOOKBACK_DAYS = 7
+CHART_MAX_BARS = 5000
+REQUEST_TIMEOUT = 5.0
+
+
+class PolygonProxy:
+    def __init__(self, api_key, base_url=POLYGON_REST_BASE, pool_size=20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.cache = TTLCache(ttl=QUOTE_TTL, max_entries=4096)
+
+        # 커넥션 풀 세션 + 일시적 오류(429/5xx) 짧은 재시도
+        retry = Retry(
+            total=2, backoff_factor=0.2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _get(self, path, **params):
+        """응답 JSON. 404(없는 종목)는 예외 대신 None -> 호출부가 캐시되는 404 결과로 바꿈
+        (5xx / 네트워크 오류는 그대로 raise)"""
+        params['apiKey'] = self.api_key
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    # ------------------------------------------------------------------
+    # 아래 공개 메서드는 모두 (body, http_status) 를 반환합니다.
+    # 404 같은 '정상적인 실패'도 캐시에 넣고, 네트워크 예외는 캐시하지 않고 그대로 올립니다.
+    # ------------------------------------------------------------------
+
+    def quote(self, ticker):
+        ticker = ticker.upper()
+
+        def load():
+            data = self._get(f"/v3/quotes/{ticker}", limit=1) or {}
+            if data.get('status') == 'OK' and data.get('results'):
+                return data['results'][0], 200
+            return {"status": "error", "message": "Ticker not found"}, 404
+
+        return self.cache.get_or_compute(('quote', ticker), load, ttl=QUOTE_TTL)
+
+    def details(self, ticker):
+        ticker = ticker.upper()
+
+        def load():
+            data = self._get(f"/v3/reference/tickers/{ticker}") or {}
+            if not (data.get('status') == 'OK' and data.get('results')):
+                return {"status": "error", "message": "Details not found"}, 404
+
+            results = data['results']
+            logo_url = results.get('branding', {}).get('logo_url', '')
+            if logo_url: logo_url += f"?apiKey={self.api_key}"
+            f = results.get('financials', {})
+            financial_data = {
+                "market_cap": f.get('market_capitalization', {}).get('value', 'N/A'),
+                "pe_ratio": f.get('price_to_earnings_ratio', 'N/A'),
+                "ps_ratio": f.get('price_to_sales_ratio', 'N/A'),
+                "dividend_yield": f.get('dividend_yield', {}).get('value', 'N/A')
+            }
+            details = {
+                "ticker": results.get('ticker'), "name": results.get('name'),
+                "industry": results.get('sic_description'),
+                "description": results.get('description', 'No description available.'),
+                "logo_url": logo_url, "financials": financial_data
+            }
+            return {"status": "OK", "results": details}, 200
+
+        # 404는 길게 들고 있지 않음
+        return self.cache.get_or_compute(
+            ('details', ticker), load,
+            ttl=lambda result: DETAILS_TTL if result[1] == 200 else NOT_FOUND_TTL
+        )
+
+    def market_overview(self):
+        def load():
+            gainers = (self._get("/v2/snapshot/locale/us/markets/stocks/gainers") or {}).get('tickers') or []
+            losers = (self._get("/v2/snapshot/locale/us/markets/stocks/losers") or {}).get('tickers') or []
+            return {"status": "OK", "gainers": gainers, "losers": losers}, 200
+
+        return self.cache.get_or_compute(('overview',), load, ttl=OVERVIEW_TTL)
+
+    # ------------------------------------------------------------------
+    # 차트 분봉 (꼬리 갱신)
+    # ------------------------------------------------------------------
+    def _fetch_bars(self, ticker, start, end):
+        data = self._get(
+            f"/v2/aggs/ticker/{ticker}/range/1/minute/{start}/{end}",
+            sort='asc', limit=CHART_MAX_BARS
+        ) or {}
+        if data.get('status') not in ('OK', 'DELAYED'):
+            return None
+        return [
+            (bar['t'], bar['o'], bar['h'], bar['l'], bar.get('c', bar['o']))
+            for bar in data.get('results') or []
+        ]
+
+    def _load_bars(self, ticker):
+        """
+        캐시된 봉이 있으면 마지막 봉 시각부터만 다시 받아서 이어 붙임.
+        (마지막 봉은 진행 중인 분봉일 수 있으므로 포함해서 덮어씀)
+        """
+        prev = self.cache.peek(('chart', ticker))
+        now = datetime.now()
+        cutoff_ms = int((now - timedelta(days=CHART_LOOKBACK_DAYS)).timestamp() * 1000)
+
+        if prev and prev['bars']:
+            try:
+                last_ms = prev['bars'][-1][0]
+                tail = self._fetch_bars(ticker, last_ms, int(time.time() * 1000))
+            except Exception as e:
+                # 꼬리 갱신 실패 시 기존 봉으로 버팀 (다음 주기에 재시도)
+                print(f"⚠️ [Polygon Proxy] {ticker} chart tail refresh failed: {e}", flush=True)
+                return prev
+
+            bars = prev['bars']
+            if tail:
+                first_new = tail[0][0]
+                bars = [b for b in bars if b[0] < first_new] + tail
+        else:
+            start = (now - timedelta(days=CHART_LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+            bars = self._fetch_bars(ticker, start, now.strftime('%Y-%m-%d')) or []
+
+        bars = [b for b in bars if b[0] >= cutoff_ms][-CHART_MAX_BARS:]
+        return {'bars': bars, 'refreshed_at': time.time()}
+
+    def chart_bars(self, ticker, since_ms=None):
+        """
+        [(t_ms, o, h, l, c), ...] 오름차순. 데이터 없으면 빈 리스트
+        since_ms를 주면 그 시각 '이상'의 봉만 반환 (진행 중인 마지막 봉도 다시 내려감)
+        """
+        ticker = ticker.upper()
+        entry = self.cache.get_or_compute(('chart', ticker), lambda: self._load_bars(ticker), ttl=CHART_TTL)
+        bars = entry['bars']
+        if since_ms is None:
+            return bars
+        # 튜플 비교: (since_ms,) < (since_ms, o, h, ...) 이므로 t >= since_ms 첫 위치
+        return bars[bisect.bisect_left(bars, (since_ms,)):]
@@ -0,0 +1,454 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+from replay_events import load_capture, load_datasets, synthetic_events
+
+# ==============================================================================
+# Local Polygon Simulator (장 마감 후 / API 키 없이 부하 테스트)
+# ==============================================================================
+# 웹소켓: Polygon 인증/구독 프로토콜 그대로 (connected -> auth -> subscribe/unsubscribe)
+#         녹화(datasets/, ticker_stream 캡처) 또는 합성 T/Q/A/AM 스트림을 N배속으로 재생
+# REST  : 서비스들이 실제로 호출하는 엔드포인트만
+#         /v2/snapshot/locale/us/markets/stocks/tickers   (STS TargetSelector)
+#         /v2/snapshot/locale/us/markets/stocks/gainers   (scanner.py)
+#         /v2/aggs/grouped/locale/us/market/stocks/{date} (전일 거래량)
+#         /v2/aggs/ticker/{T}/range/1/{second|minute}/{from}/{to} (웜업/초기 캔들)
+#
+# 서비스 쪽은 환경변수만 바꾸면 됩니다 (키는 아무 값이나):
+#   POLYGON_WS_URI=ws://127.0.0.1:8765/stocks POLYGON_REST_BASE=http://127.0.0.1:8766 POLYGON_API_KEY=sim
+#
+# 예) python polygon_sim.py --synthetic 50 --events 2000000 --speed 10 --loop
+#     python polygon_sim.py --datasets "datasets/2024-05-10/*" --speed 0   (최대 속도)
+#
+# - 타임스탬프는 재생 시작 시각 기준으로 옮겨서 '지금' 데이터처럼 보이게 함 (간격은 원본 그대로)
+# - 원본에 A/AM이 없으면 T로부터 1초봉(A)/1분봉(AM)을 만들어서 같이 보냄
+# - 클라이언트마다 송신 큐가 있고, 못 따라오면 프레임을 버리고 카운트 (백프레셔 관찰용)
+
+WS_PORT = 8765
+REST_PORT = 8766
+MAX_FRAME_EVENTS = 1000     # 프레임 하나에 담는 최대 이벤트 수 (배속이 높으면 프레임이 커짐)
+CLIENT_QUEUE_FRAMES = 2000  # 클라이언트별 송신 대기 프레임 한도
+STATS_INTERVAL = 10.0
+BACKFILL_BARS = 500
+
+
+def _event_ts(ev):
+    return ev.get('t') if ev.get('ev') in ('T', 'Q') else ev.get('e', ev.get('t'))
+
+
+def _shift(ev, offset_ms):
+    """타임스탬프만 옮긴 복사본 (T/Q는 t, 봉은 s/e - T의 s는 체결 수량이라 건드리지 않음)"""
+    out = dict(ev)
+    for k in (('t',) if out.get('ev') in ('T', 'Q') else ('s', 'e')):
+        if k in out: out[k] = int(out[k]) + offset_ms
+    return out
+
+
+# ------------------------------------------------------------------------------
+# 1. 시장 상태 (REST 응답용) + 봉 생성
+# ------------------------------------------------------------------------------
+class BarBuilder:
+    """T 이벤트 -> 고정 간격 봉 (다음 체결이 경계를 넘을 때 직전 봉을 닫음)"""
+    def __init__(self, ev_name, span_ms):
+        self.ev_name = ev_name
+        self.span_ms = span_ms
+        self.bars = {}      # sym -> 진행 중인 봉
+        self.day_v = defaultdict(float)
+
+    def on_trade(self, sym, p, s, t):
+        closed = None
+        bar = self.bars.get(sym)
+        start = t - t % self.span_ms
+        if bar and start >= bar['e']:
+            closed = self._close(sym, bar)
+            bar = None
+        if bar is None:
+            bar = self.bars[sym] = {'o': p, 'h': p, 'l': p, 'c': p, 'v': 0.0, 'pv': 0.0, 'n': 0,
+                                    's': start, 'e': start + self.span_ms}
+        bar['h'] = max(bar['h'], p)
+        bar['l'] = min(bar['l'], p)
+        bar['c'] = p
+        bar['v'] += s
+        bar['pv'] += p * s
+        bar['n'] += 1
+        return closed
+
+    def _close(self, sym, bar):
+        self.day_v[sym] += bar['v']
+        vw = bar['pv'] / bar['v'] if bar['v'] else bar['c']
+        return {
+            'ev': self.ev_name, 'sym': sym, 'v': bar['v'], 'av': self.day_v[sym], 'op': bar['o'],
+            'vw': round(vw, 4), 'vwap': round(vw, 4), 'o': bar['o'], 'c': bar['c'], 'h': bar['h'], 'l': bar['l'],
+            'a': round(vw, 4), 'z': int(bar['v'] / bar['n']) if bar['n'] else 0, 's': bar['s'], 'e': bar['e']
+        }
+
+
+class MarketState:
+    """재생 중인 종목들의 당일/전일/분봉 상태 (REST 스레드와 공유 -> lock)"""
+    def __init__(self, seed=11):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.day = {}                                       # sym -> {o,h,l,c,v,pv,n}
+        self.prev = {}                                      # sym -> {o,h,l,c,v,vw}
+        self.last_trade = {}                                # sym -> {p,s,t}
+        self.last_quote = {}
+        self.minute_bars = defaultdict(lambda: deque(maxlen=2000))
+        self.second_bars = defaultdict(lambda: deque(maxlen=3600))
+
+    def _ensure(self, sym, p):
+        if sym in self.day: return
+        self.day[sym] = {'o': p, 'h': p, 'l': p, 'c': p, 'v': 0.0, 'pv': 0.0, 'n': 0}
+        # 전일 종가는 오늘 시가보다 조금 낮게 -> 상승 상위 목록이 생김
+        prev_c = p * self.rng.uniform(0.7, 1.02)
+        prev_v = self.rng.uniform(5e5, 2e7)
+        self.prev[sym] = {'o': prev_c, 'h': prev_c * 1.05, 'l': prev_c * 0.95, 'c': prev_c,
+                          'v': prev_v, 'vw': prev_c}
+
+    def apply(self, frame):
+        with self.lock:
+            for ev in frame:
+                kind, sym = ev.get('ev'), ev.get('sym')
+                if kind == 'T':
+                    p, s = float(ev['p']), float(ev.get('s') or 0)
+                    self._ensure(sym, p)
+                    d = self.day[sym]
+                    d['h'] = max(d['h'], p); d['l'] = min(d['l'], p); d['c'] = p
+                    d['v'] += s; d['pv'] += p * s; d['n'] += 1
+                    self.last_trade[sym] = {'p': p, 's': s, 't': ev['t'] * 1_000_000}
+                elif kind == 'Q':
+                    self.last_quote[sym] = {'p': ev.get('bp'), 'S': ev.get('bs'), 'P': ev.get('ap'),
+                                            's': ev.get('as'), 't': ev['t'] * 1_000_000}
+                elif kind == 'AM':
+                    self.minute_bars[sym].append(ev)
+                elif kind == 'A':
+                    self.second_bars[sym].append(ev)
+
+    # --------------------------- REST 응답 ---------------------------
+    def _snapshot_item(self, sym):
+        d, prev = self.day[sym], self.prev[sym]
+        vw = d['pv'] / d['v'] if d['v'] else d['c']
+        last_min = self.minute_bars[sym][-1] if self.minute_bars[sym] else None
+        item = {
+            'ticker': sym,
+            'todaysChange': round(d['c'] - prev['c'], 4),
+            'todaysChangePerc': round((d['c'] - prev['c']) / prev['c'] * 100, 4),
+            'updated': int(time.time() * 1e9),
+            'day': {'o': d['o'], 'h': d['h'], 'l': d['l'], 'c': d['c'], 'v': d['v'], 'vw': round(vw, 4)},
+            'prevDay': {k: round(v, 4) for k, v in prev.items()},
+            'lastTrade': self.last_trade.get(sym, {}),
+            'lastQuote': self.last_quote.get(sym, {}),
+            'min': {k: last_min[k] for k in ('o', 'h', 'l', 'c', 'v', 'vw', 'av')} if last_min else {},
+        }
+        return item
+
+    def snapshot(self, gainers=False):
+        with self.lock:
+            items = [self._snapshot_item(sym) for sym in self.day if self.day[sym]['n']]
+        if gainers:
+            items.sort(key=lambda x: x['todaysChangePerc'], reverse=True)
+            items = items[:20]
+        return {'status': 'OK', 'count': len(items), 'tickers': items}
+
+    def grouped(self, date):
+        with self.lock:
+            day_ms = int(datetime.strptime(date, '%Y-%m-%d').timestamp() * 1000)
+            results = [{'T': sym, 'o': p['o'], 'h': p['h'], 'l': p['l'], 'c': p['c'], 'v': p['v'],
+                        'vw': p['vw'], 'n': int(p['v'] / 200), 't': day_ms} for sym, p in self.prev.items()]
+        return {'status': 'OK', 'adjusted': True, 'queryCount': len(results), 'resultsCount': len(results),
+                'results': results}
+
+    def aggs(self, sym, timespan, from_ms, to_ms, sort='asc', limit=5000):
+        span_ms = 1000 if timespan == 'second' else 60_000
+        with self.lock:
+            source = self.second_bars if timespan == 'second' else self.minute_bars
+            bars = [{'o': b['o'], 'h': b['h'], 'l': b['l'], 'c': b['c'], 'v': b['v'], 'vw': b['vw'],
+                     'n': b.get('z', 0), 't': b['s']} for b in source.get(sym, [])]
+            start_price = bars[0]['o'] if bars else (self.day[sym]['o'] if sym in self.day else None)
+
+        # 재생 시작 전 구간은 시작 가격에서 끝나는 랜덤워크로 채움 (웜업/초기 캔들용)
+        if start_price is not None:
+            first_t = bars[0]['t'] if bars else int(time.time() * 1000) // span_ms * span_ms
+            bars = self._backfill(sym, start_price, first_t, span_ms) + bars
+
+        bars = [b for b in bars if from_ms <= b['t'] <= to_ms]
+        if sort == 'desc': bars.reverse()
+        bars = bars[:limit]
+        return {'ticker': sym, 'status': 'OK', 'adjusted': True, 'queryCount': len(bars),
+                'resultsCount': len(bars), 'results': bars}
+
+    def _backfill(self, sym, end_price, end_t, span_ms):
+        rng = random.Random(f"{sym}:{span_ms}")
+        price, out = end_price, []
+        for i in range(1, BACKFILL_BARS + 1):
+            o = price / (1 + rng.gauss(0, 0.002))
+            h, l = max(o, price) * (1 + abs(rng.gauss(0, 0.001))), min(o, price) * (1 - abs(rng.gauss(0, 0.001)))
+            v = rng.randint(10, 500) * 100
+            out.append({'o': round(o, 4), 'h': round(h, 4), 'l': round(l, 4), 'c': round(price, 4),
+                        'v': v, 'vw': round((o + price) / 2, 4), 'n': v // 100, 't': end_t - i * span_ms})
+            price = o
+        out.reverse()
+        return out
+
+
+def _parse_time(value, end=False):
+    """aggs from/to: ms 정수 또는 YYYY-MM-DD"""
+    if value.isdigit(): return int(value)
+    day = datetime.strptime(value, '%Y-%m-%d')
+    if end: day += timedelta(days=1)
+    return int(day.timestamp() * 1000) - (1 if end else 0)
+
+
+def start_rest_server(state, host, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            parts = [p for p in url.path.split('/') if p]
+            try:
+                if url.path == '/v2/snapshot/locale/us/markets/stocks/tickers':
+                    body = state.snapshot()
+                elif url.path == '/v2/snapshot/locale/us/markets/stocks/gainers':
+                    body = state.snapshot(gainers=True)
+                elif parts[:6] == ['v2', 'aggs', 'grouped', 'locale', 'us', 'market'] and len(parts) == 8:
+                    body = state.grouped(parts[7])
+                elif parts[:3] == ['v2', 'aggs', 'ticker'] and len(parts) == 9 and parts[4] == 'range':
+                    body = state.aggs(parts[3], parts[6], _parse_time(parts[7]), _parse_time(parts[8], end=True),
+                                      sort=q.get('sort', 'asc'), limit=int(q.get('limit', 5000)))
+                else:
+                    self._send(404, {'status': 'NOT_FOUND', 'message': f'sim: {url.path} not implemented'})
+                    return
+            except Exception as e:
+                self._send(400, {'status': 'ERROR', 'error': str(e)})
+                return
+            self._send(200, body)
+
+        def _send(self, code, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='sim-rest', daemon=True).start()
+    print(f"🌐 [Sim] REST on http://{host}:{port}", flush=True)
+    return server
+
+
+# ------------------------------------------------------------------------------
+# 2. 웹소켓 (인증/구독 + 클라이언트별 송신 큐)
+# ------------------------------------------------------------------------------
+class Client:
+    def __init__(self, ws, queue_frames):
+        self.ws = ws
+        self.authed = False
+        self.subs = set()
+        self.queue = asyncio.Queue(maxsize=queue_frames)
+        self.sent = 0
+        self.dropped = 0
+
+    def wants(self, ev):
+        kind, sym = ev.get('ev'), ev.get('sym')
+        return f"{kind}.{sym}" in self.subs or f"{kind}.*" in self.subs
+
+    async def status(self, status, message):
+        await self.ws.send(json.dumps([{'ev': 'status', 'status': status, 'message': message}]))
+
+
+class PolygonSim:
+    def __init__(self, queue_frames=CLIENT_QUEUE_FRAMES):
+        self.clients = set()
+        self.queue_frames = queue_frames
+        self.events_out = 0
+
+    async def handler(self, ws):
+        client = Client(ws, self.queue_frames)
+        self.clients.add(client)
+        sender = asyncio.create_task(self._sender(client))
+        try:
+            await client.status('connected', 'Connected Successfully')
+            async for raw in ws:
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    continue
+                action, params = msg.get('action'), msg.get('params') or ''
+                if action == 'auth':
+                    client.authed = bool(params)
+                    await client.status('auth_success' if client.authed else 'auth_failed',
+                                        'authenticated' if client.authed else 'authentication failed')
+                elif action in ('subscribe', 'unsubscribe'):
+                    if not client.authed:
+                        await client.status('error', 'not authorized')
+                        continue
+                    for p in (x.strip() for x in params.split(',') if x.strip()):
+                        if action == 'subscribe': client.subs.add(p)
+                        else: client.subs.discard(p)
+                        await client.status('success', f"{action}d to: {p}")
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.clients.discard(client)
+
+    async def _sender(self, client):
+        while True:
+            payload = await client.queue.get()
+            await client.ws.send(payload)
+            client.sent += 1
+
+    def broadcast(self, frame):
+        for client in list(self.clients):
+            if not client.authed or not client.subs: continue
+            events = [ev for ev in frame if client.wants(ev)]
+            if not events: continue
+            try:
+                client.queue.put_nowait(json.dumps(events))
+                self.events_out += len(events)
+            except asyncio.QueueFull:
+                client.dropped += 1
+
+    async def report(self):
+        last_out, last_ts = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            now = time.monotonic()
+            rate = (self.events_out - last_out) / (now - last_ts)
+            last_out, last_ts = self.events_out, now
+            per_client = ", ".join(f"{c.ws.remote_address[1] if c.ws.remote_address else '?'}: sent {c.sent} "
+                                   f"drop {c.dropped} q {c.queue.qsize()}" for c in self.clients) or "no clients"
+            print(f"📤 [Sim] {rate:,.0f} events/s | {per_client}", flush=True)
+
+
+# ------------------------------------------------------------------------------
+# 3. 재생
+# ------------------------------------------------------------------------------
+def with_bars(events):
+    """원본에 A/AM이 없으면 T로 1초봉/1분봉 생성해서 시간순으로 끼워 넣음"""
+    kinds = {ev.get('ev') for ev in events}
+    builders = []
+    if 'A' not in kinds: builders.append(BarBuilder('A', 1000))
+    if 'AM' not in kinds: builders.append(BarBuilder('AM', 60_000))
+    if not builders: return events
+
+    out = []
+    for ev in events:
+        if ev.get('ev') == 'T':
+            for b in builders:
+                closed = b.on_trade(ev['sym'], float(ev['p']), float(ev.get('s') or 0), int(ev['t']))
+                if closed: out.append(closed)
+        out.append(ev)
+    return out
+
+
+async def replay(sim, state, events, speed, loop_forever, frame_size):
+    events = [ev for ev in events if _event_ts(ev) is not None]
+    if not events:
+        print("❌ [Sim] No events to replay.", flush=True)
+        return
+    t0 = int(_event_ts(events[0]))
+    span = int(_event_ts(events[-1])) - t0
+    print(f"▶️ [Sim] {len(events):,} events, {span / 1000:.0f}s of market time @ "
+          f"{'max speed' if not speed else f'{speed}x'}", flush=True)
+
+    while True:
+        wall0 = time.monotonic()
+        offset = int(time.time() * 1000) - t0
+        i, n = 0, len(events)
+        while i < n:
+            if speed:
+                due = wall0 + (_event_ts(events[i]) - t0) / 1000 / speed
+                delay = due - time.monotonic()
+                if delay > 0: await asyncio.sleep(delay)
+                # 지금까지 도착했어야 할 이벤트를 한 프레임으로
+                now_data = t0 + (time.monotonic() - wall0) * 1000 * speed
+                j = i
+                while j < n and j - i < MAX_FRAME_EVENTS and _event_ts(events[j]) <= now_data:
+                    j += 1
+                j = max(j, i + 1)
+            else:
+                j = min(n, i + frame_size)
+
+            frame = [_shift(ev, offset) for ev in events[i:j]]
+            state.apply(frame)
+            sim.broadcast(frame)
+            i = j
+            if not speed: await asyncio.sleep(0)
+
+        if not loop_forever: break
+        print("🔁 [Sim] Replay finished, looping", flush=True)
+
+    print("⏹️ [Sim] Replay finished", flush=True)
+
+
+async def main_async(args, events):
+    state = MarketState()
+    sim = PolygonSim(queue_frames=args.client_queue)
+    start_rest_server(state, args.host, args.rest_port)
+    # 재생 전에도 REST가 종목을 알 수 있게 첫 체결가로 상태 초기화
+    first_trades = {}
+    for ev in events:
+        if ev.get('ev') == 'T' and ev['sym'] not in first_trades: first_trades[ev['sym']] = ev
+    state.apply(list(first_trades.values()))
+
+    async with websockets.serve(sim.handler, args.host, args.ws_port, max_size=None):
+        print(f"🔌 [Sim] WebSocket on ws://{args.host}:{args.ws_port}/stocks", flush=True)
+        asyncio.create_task(sim.report())
+        if args.wait_client:
+            print("⏳ [Sim] Waiting for a subscribed client...", flush=True)
+            while not any(c.subs for c in sim.clients): await asyncio.sleep(0.2)
+        await replay(sim, state, events, args.speed, args.loop, args.frame_size)
+        await asyncio.Future()  # 재생이 끝나도 REST/WS는 유지
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Polygon websocket/REST simulator")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument('--datasets', help='glob for datasets/{date}/{ticker} folders')
+    src.add_argument('--capture', help='JSONL of ticker_stream messages')
+    src.add_argument('--synthetic', type=int, metavar='N_TICKERS')
+    parser.add_argument('--events', type=int, default=500_000, help='synthetic event count')
+    parser.add_argument('--speed', type=float, default=1.0, help='multiple of real time (0 = as fast as possible)')
+    parser.add_argument('--frame-size', type=int, default=50, help='events per frame when --speed 0')
+    parser.add_argument('--loop', action='store_true', help='replay forever')
+    parser.add_argument('--wait-client', action='store_true', help='start replay after the first subscription')
+    parser.add_argument('--client-queue', type=int, default=CLIENT_QUEUE_FRAMES)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--ws-port', type=int, default=WS_PORT)
+    parser.add_argument('--rest-port', type=int, default=REST_PORT)
+    args = parser.parse_args()
+
+    if args.capture:
+        frames, _ = load_capture(args.capture)
+        events = [ev for frame in frames for ev in frame]
+    elif args.datasets:
+        events, _ = load_datasets(args.datasets)
+        # datasets의 agg.csv는 1분봉 -> AM
+        for ev in events:
+            if ev.get('ev') == 'A': ev['ev'] = 'AM'
+    else:
+        events, _ = synthetic_events(args.synthetic, args.events)
+
+    events = with_bars(events)
+    try:
+        asyncio.run(main_async(args, events))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import math
+from collections import deque
+
+import pandas as pd
+
+from ring_buffers import MinuteBarRing
+
+# ==============================================================================
+# 증분 퀀트 지표 (scanner.py 종목별 상태)
+# ==============================================================================
+# 예전 calculate_quant_indicators(df)는 분봉이 하나 닫힐 때마다 ATR/VWAP/BB/RSI/RVOL/
+# 변동성 Z/CLV/EMA60을 전체 히스토리에 대해 pandas rolling으로 다시 계산했습니다.
+# 실제로 쓰는 건 마지막 값(+ 직전 몇 개)뿐이라, 봉이 확정될 때 그 봉의 기여분만 상태에 더합니다.
+#
+# - 마지막 봉(pending)은 상태에 넣지 않고 들고만 있음
+#   -> 같은 분 AM 재수신은 덮어쓰기, 틱 가격 리페인팅은 snapshot(last_price)에서만 반영
+#   -> 다음 분 봉이 오면 그때 확정(commit)
+# - 롤링 창(14/20/5)은 확정분 k-1개 + pending 1개로 계산 -> 봉당 비용이 히스토리 길이와 무관
+# - VWAP은 예전과 같이 보관 창(window, 기본 120봉) 안에서의 누적
+# - EMA60만 예전과 같이 창 시작점(가장 오래된 봉)에서 다시 시작해 창 전체로 계산
+#   (이어서 누적하면 EMA 교차 부근에서 trend_align이 뒤집힘 -> AI 점수 입력이 바뀌므로 유지)
+
+NAN = float('nan')
+
+
+def _mean(values, n):
+    """pandas rolling(n).mean()의 마지막 값 (개수 부족 시 NaN)"""
+    if len(values) < n: return NAN
+    return sum(values[-n:]) / n
+
+
+def _std(values, n):
+    """pandas rolling(n).std() (ddof=1)의 마지막 값"""
+    if len(values) < n: return NAN
+    window = values[-n:]
+    m = sum(window) / n
+    return math.sqrt(sum((x - m) ** 2 for x in window) / (n - 1))
+
+
+def _session_val(t_ms):
+    t = pd.Timestamp(int(t_ms), unit='ms')
+    total_min = t.hour * 60 + t.minute
+    if 570 <= total_min < 630: return 0  # 09:30 ~ 10:30 (Opening)
+    elif 630 <= total_min < 840: return 1 # 10:30 ~ 14:00 (Mid-Day)
+    elif 840 <= total_min < 960: return 2 # 14:00 ~ 16:00 (Power Hour)
+    else: return 3 # Others
+
+
+class _RollingSum:
+    """최근 n개 합 (가끔 전체 재합산해서 부동소수 오차 누적 방지)"""
+    def __init__(self, n):
+        self.values = deque(maxlen=n)
+        self.sum = 0.0
+        self._pushes = 0
+
+    def push(self, x):
+        if len(self.values) == self.values.maxlen:
+            self.sum -= self.values[0]
+        self.values.append(x)
+        self.sum += x
+        self._pushes += 1
+        if self._pushes % self.values.maxlen == 0:
+            self.sum = sum(self.values)
+
+
+class QuantState:
+    def __init__(self, window=120):
+        self.window = window
+        self.bars = MinuteBarRing(window)   # 원본 봉 (마지막 = pending)
+        self.committed = 0                  # 확정된 봉 수 (전체)
+        self.last_close = None              # 마지막 확정 봉 종가
+
+        # 확정 봉별 파생값 (창 길이 - 1개만 보관)
+        self.tr = deque(maxlen=13)          # ATR 14
+        self.gain = deque(maxlen=13)        # RSI 14
+        self.loss = deque(maxlen=13)
+        self.closes = deque(maxlen=19)      # BB 20
+        self.bb_width = deque(maxlen=19)    # BB 평균 20
+        self.vols = deque(maxlen=19)        # RVOL 20
+        self.rvol = deque(maxlen=2)         # RVOL 연속 증가 (t-1, t-2)
+        self.ranges = deque(maxlen=19)      # 변동성 Z 20
+        self.imbalance = deque(maxlen=4)    # CLV x 거래량 평균 5
+        self.vp = _RollingSum(window - 1)   # VWAP (창 안 누적)
+        self.vol_sum = _RollingSum(window - 1)
+        self.alpha = 2.0 / (60 + 1)         # EMA 60 (snapshot에서 창 전체로)
+
+    def __len__(self):
+        return len(self.bars)
+
+    # ------------------------------------------------------------------
+    # 봉 입력
+    # ------------------------------------------------------------------
+    def update(self, t, o, h, l, c, v):
+        """AM 봉 (같은 분이면 pending 교체, 다음 분이면 이전 pending 확정 후 교체)"""
+        if len(self.bars) and t != self.bars.last_t:
+            self._commit(self.bars.view(1))
+        self.bars.append(t, o, h, l, c, v)
+
+    def load(self, bars):
+        """REST aggs 결과 [{t,o,h,l,c,v}, ...] 시간순"""
+        for b in bars:
+            self.update(float(b['t']), float(b['o']), float(b['h']), float(b['l']), float(b['c']), float(b['v']))
+
+    def _bar_terms(self, h, l, c, v):
+        """봉 하나의 기여분 (직전 확정 종가 기준)"""
+        pc = self.last_close if self.last_close is not None else c
+        tr = max(h - l, abs(h - pc), abs(l - pc))
+        delta = c - pc
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        span = h - l
+        clv = ((c - l) - (h - c)) / (span + 1e-10)
+        vp = (h + l + c) / 3 * v
+        return tr, gain, loss, span, clv * v, vp
+
+    def _bb_width(self, closes_with, c):
+        # (upper - lower) / c = 4σ / c, 20봉 미만이면 0 (예전 nan_to_num과 동일)
+        width = (4.0 * _std(closes_with, 20)) / c if c else NAN
+        return 0.0 if math.isnan(width) else width
+
+    def _rvol(self, vols_with, v):
+        ma = _mean(vols_with, 20)
+        if math.isnan(ma): return NAN
+        return v / ma if ma != 0 else 0.0
+
+    def _commit(self, last):
+        h, l, c, v = float(last.h[0]), float(last.l[0]), float(last.c[0]), float(last.v[0])
+        tr, gain, loss, span, imb, vp = self._bar_terms(h, l, c, v)
+
+        closes_with = list(self.closes) + [c]
+        vols_with = list(self.vols) + [v]
+        self.bb_width.append(self._bb_width(closes_with, c))
+        self.rvol.append(self._rvol(vols_with, v))
+
+        self.tr.append(tr)
+        self.gain.append(gain)
+        self.loss.append(loss)
+        self.closes.append(c)
+        self.vols.append(v)
+        self.ranges.append(span)
+        self.imbalance.append(imb)
+        self.vp.push(vp)
+        self.vol_sum.push(v)
+        self.last_close = c
+        self.committed += 1
+
+    # ------------------------------------------------------------------
+    # 지표 (pending 봉 + 선택적 틱 가격 리페인팅)
+    # ------------------------------------------------------------------
+    def snapshot(self, last_price=None):
+        """calculate_quant_indicators와 같은 키의 dict (봉이 없으면 None)"""
+        n = len(self.bars)
+        if not n: return None
+        view = self.bars.view(last_price=last_price)
+        t, h, l, c, v = float(view.t[-1]), float(view.h[-1]), float(view.l[-1]), float(view.c[-1]), float(view.v[-1])
+        closes = view.c
+
+        tr, gain, loss, span, imb, vp = self._bar_terms(h, l, c, v)
+
+        # ATR / RSI (14)
+        atr = _mean(list(self.tr) + [tr], 14)
+        avg_gain = _mean(list(self.gain) + [gain], 14)
+        avg_loss = _mean(list(self.loss) + [loss], 14)
+        rsi = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+
+        # VWAP (창 안 누적) + 3봉 전 VWAP 대비 기울기
+        total_vp = self.vp.sum + vp
+        total_v = self.vol_sum.sum + v
+        vwap = total_vp / total_v if total_v != 0 else 0.0
+        vwap_slope = 0.0
+        if n >= 4:
+            back_vp = total_vp - vp - sum(list(self.vp.values)[-2:])
+            back_v = total_v - v - sum(list(self.vol_sum.values)[-2:])
+            vwap_4 = back_vp / back_v if back_v != 0 else 0.0
+            vwap_slope = (vwap - vwap_4) / vwap_4 * 10000 if vwap_4 else NAN
+
+        # Squeeze (BB 폭 / BB 폭 20봉 평균)
+        width = self._bb_width(list(self.closes) + [c], c)
+        bb_avg = _mean(list(self.bb_width) + [width], 20)
+        squeeze_ratio = width / bb_avg if bb_avg != 0 else 1.0
+
+        # Pump & 가속도
+        price_5m_ago = closes[-6] if n > 6 else closes[0]
+        current_pump = ((c - price_5m_ago) / price_5m_ago) * 100 if price_5m_ago != 0 else 0
+        price_2m_ago = closes[-3] if n > 3 else closes[0]
+        price_7m_ago = closes[-8] if n > 8 else closes[0]
+        prev_pump = ((price_2m_ago - price_7m_ago) / price_7m_ago) * 100 if price_7m_ago != 0 else 0
+
+        # RVOL + 3봉 연속 증가 / 기울기
+        rvol = self._rvol(list(self.vols) + [v], v)
+        rvol_consecutive_up, rvol_slope = False, 0.0
+        if n >= 4:
+            r1, r2 = self.rvol[-1], self.rvol[-2]
+            rvol_consecutive_up = (rvol > r1) and (r1 > r2)
+            rvol_slope = rvol - r2
+
+        # 변동성 Z / 주문 불균형
+        ranges = list(self.ranges) + [span]
+        volatility_z = (span - _mean(ranges, 20)) / (_std(ranges, 20) + 1e-10)
+        order_imbalance = _mean(list(self.imbalance) + [imb], 5)
+
+        # EMA 60 추세 (ewm(span=60, adjust=False)와 동일하게 창 첫 봉부터)
+        values = closes.tolist()
+        ema = values[0]
+        for x in values[1:]:
+            ema += self.alpha * (x - ema)
+
+        return {
+            "close": c,
+            "volume": v,
+            "vwap": vwap,
+            "vwap_slope": vwap_slope,
+            "squeeze_ratio": squeeze_ratio,
+            "rsi": rsi,
+            "rvol": rvol,
+            "rvol_slope": rvol_slope,
+            "rvol_consecutive": rvol_consecutive_up,
+            "pump": current_pump,
+            "pump_accel": current_pump - prev_pump,
+            "volatility_z": volatility_z,
+            "atr": atr if not math.isnan(atr) else 0.01,
+            "order_imbalance": order_imbalance,
+            "trend_align": 1 if c > ema else -1,
+            "session": _session_val(t),
+            "prev_close_5": closes[-6] if n > 5 else closes[0],
+            "recent_high": float(view.h.max())
+        }
@@ -0,0 +1,112 @@
+import glob
+import json
+import os
+import random
+
+import pandas as pd
+
+# ==============================================================================
+# Replay Events (bench_replay.py / polygon_sim.py 공용)
+# ==============================================================================
+# 녹화/저장된 데이터 -> 웹소켓 포맷 T/Q/A 이벤트
+#   load_datasets(pattern) : tickstore/date=*/ticker=* (또는 예전 datasets/{date}/{ticker} CSV)
+#   load_capture(path)     : ticker_stream 메시지 JSONL (프레임 경계 유지)
+#   synthetic_events(n, m) : 랜덤워크 (seed 고정)
+
+
+def _read_kind(path, kind, columns=None):
+    """{kind}.parquet 우선, 없으면 예전 {kind}.csv (둘 다 없으면 None)"""
+    pq_file = os.path.join(path, f"{kind}.parquet")
+    if os.path.exists(pq_file):
+        return pd.read_parquet(pq_file, columns=columns)
+    csv_file = os.path.join(path, f"{kind}.csv")
+    if os.path.exists(csv_file):
+        return pd.read_csv(csv_file, usecols=columns)
+    return None
+
+
+def load_dataset_dir(path):
+    """tickstore/date={date}/ticker={ticker} (또는 datasets/{date}/{ticker}) 폴더 하나 -> 웹소켓 포맷 이벤트"""
+    ticker = os.path.basename(os.path.normpath(path))
+    if ticker.startswith("ticker="): ticker = ticker[len("ticker="):]
+    events = []
+
+    df = _read_kind(path, 'trades', ['sip_timestamp', 'price', 'size'])
+    if df is not None:
+        for ts, p, s in zip(df['sip_timestamp'].values, df['price'].values, df['size'].values):
+            events.append((int(ts), {'ev': 'T', 'sym': ticker, 'p': float(p), 's': float(s), 't': int(ts) // 1_000_000}))
+
+    cols = ['sip_timestamp', 'bid_price', 'bid_size', 'ask_price', 'ask_size']
+    df = _read_kind(path, 'quotes', cols)
+    if df is not None:
+        for ts, bp, bs, ap, as_ in zip(*(df[c].values for c in cols)):
+            events.append((int(ts), {
+                'ev': 'Q', 'sym': ticker, 'bp': float(bp), 'bs': float(bs),
+                'ap': float(ap), 'as': float(as_), 't': int(ts) // 1_000_000
+            }))
+
+    df = _read_kind(path, 'agg')
+    if df is not None:
+        for row in df.itertuples(index=False):
+            end_ms = int(row.t) + 60_000  # 1분봉 -> 끝나는 시각에 도착한 것으로
+            events.append((end_ms * 1_000_000, {
+                'ev': 'A', 'sym': ticker, 'o': row.o, 'h': row.h, 'l': row.l, 'c': row.c,
+                'v': row.v, 'vw': getattr(row, 'vw', row.c), 'vwap': getattr(row, 'vw', row.c),
+                's': int(row.t), 'e': end_ms
+            }))
+    return events
+
+
+def load_datasets(pattern):
+    events = []
+    dirs = sorted(d for d in glob.glob(pattern) if os.path.isdir(d))
+    for d in dirs:
+        events.extend(load_dataset_dir(d))
+    events.sort(key=lambda x: x[0])
+    return [ev for _, ev in events], f"datasets:{pattern}"
+
+
+def load_capture(path):
+    """ticker_stream 메시지 그대로 (프레임 경계 유지)"""
+    frames = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            data = json.loads(line)
+            if isinstance(data, dict): data = data.get('events') or []
+            frames.append(data)
+    return frames, f"capture:{os.path.basename(path)}"
+
+
+def synthetic_events(n_tickers, n_events, seed=7):
+    """랜덤워크 T/Q + 1초마다 A (데이터 없는 환경에서도 같은 부하를 재현)"""
+    rng = random.Random(seed)
+    tickers = [f"SYN{i}" for i in range(n_tickers)]
+    price = {t: rng.uniform(2, 20) for t in tickers}
+    cum_pv = {t: 0.0 for t in tickers}
+    cum_v = {t: 0.0 for t in tickers}
+    next_agg = {t: 0 for t in tickers}
+    t_ms = 1_700_000_000_000
+
+    events = []
+    while len(events) < n_events:
+        t_ms += rng.randint(0, 3)
+        # 핫 종목 쏠림 (첫 종목이 절반 가까이)
+        sym = tickers[0] if rng.random() < 0.4 else rng.choice(tickers)
+        p = price[sym] = max(0.5, price[sym] * (1 + rng.gauss(0, 0.0008)))
+        if rng.random() < 0.35:
+            spread = p * 0.001
+            events.append({'ev': 'Q', 'sym': sym, 'bp': round(p - spread, 4), 'bs': rng.randint(1, 50) * 100,
+                           'ap': round(p + spread, 4), 'as': rng.randint(1, 50) * 100, 't': t_ms})
+            continue
+        s = rng.randint(1, 20) * 100
+        cum_pv[sym] += p * s
+        cum_v[sym] += s
+        events.append({'ev': 'T', 'sym': sym, 'p': round(p, 4), 's': s, 't': t_ms})
+        if t_ms >= next_agg[sym]:
+            next_agg[sym] = t_ms + 1000
+            vwap = cum_pv[sym] / cum_v[sym]
+            events.append({'ev': 'A', 'sym': sym, 'o': p, 'h': p, 'l': p, 'c': round(p, 4), 'v': s,
+                           'vw': vwap, 'vwap': vwap, 's': t_ms - 1000, 'e': t_ms})
+    return events, f"synthetic:{n_tickers}x{n_events}"
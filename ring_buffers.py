@@ -0,0 +1,90 @@
+from collections import deque
+
+import numpy as np
+
+# ==============================================================================
+# 고정 크기 링 버퍼 (scanner.py 종목별 분봉 / 틱 기록)
+# ==============================================================================
+# DataFrame.loc[ts] = [...] 로 한 줄씩 붙이면 매번 프레임 전체를 재할당하고,
+# 분석 전에 .copy()까지 하면 종목 수 x 봉 수만큼 계속 복사가 일어납니다.
+# - MinuteBarRing: 컬럼별 numpy 배열을 2배 크기로 잡고 같은 봉을 두 군데(i, i+capacity)에
+#   써 둠 -> 최근 N개가 항상 연속 구간이라 복사 없이 슬라이스(view)로 읽힘. 봉 추가는 O(1)
+# - TickRing: deque(maxlen) + 누적 카운터 (길이가 상한에 막혀도 '몇 틱 들어왔나' 계산 가능)
+
+FIELDS = ('t', 'o', 'h', 'l', 'c', 'v')
+
+
+class BarView:
+    """최근 봉들의 컬럼별 numpy 배열 (t는 epoch ms). 링 내부를 가리키는 view이므로 수정 금지."""
+    __slots__ = FIELDS
+
+    def __init__(self, t, o, h, l, c, v):
+        self.t, self.o, self.h, self.l, self.c, self.v = t, o, h, l, c, v
+
+    def __len__(self):
+        return len(self.c)
+
+
+class MinuteBarRing:
+    def __init__(self, capacity=120):
+        self.capacity = capacity
+        self._data = np.zeros((len(FIELDS), capacity * 2), dtype=np.float64)
+        self.count = 0      # 지금까지 들어온 봉 수 (같은 분 덮어쓰기는 제외)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last_t(self):
+        if not self.count: return None
+        return self._data[0, (self.count - 1) % self.capacity]
+
+    def append(self, t, o, h, l, c, v):
+        """새 봉 추가 (직전 봉과 같은 시각이면 그 봉을 덮어씀)"""
+        if self.count and t == self.last_t:
+            pos = (self.count - 1) % self.capacity
+        else:
+            pos = self.count % self.capacity
+            self.count += 1
+        row = (t, o, h, l, c, v)
+        self._data[:, pos] = row
+        self._data[:, pos + self.capacity] = row
+
+    def load(self, bars):
+        """[{t,o,h,l,c,v}, ...] 시간순 (REST aggs 결과) - 최근 capacity개만 남음"""
+        for b in bars[-self.capacity:]:
+            self.append(float(b['t']), float(b['o']), float(b['h']), float(b['l']), float(b['c']), float(b['v']))
+
+    def view(self, n=None, last_price=None):
+        """
+        최근 n개 봉 (기본: 전부)
+        last_price를 주면 마지막 봉의 종가/고가/저가를 그 가격으로 보정한 값으로 돌려줌
+        (링에 저장된 봉은 그대로 - c/h/l 세 컬럼만 복사)
+        """
+        k = len(self) if n is None else min(n, len(self))
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else self.capacity
+        cols = self._data[:, end - k:end]
+        t, o, h, l, c, v = cols
+        if last_price is not None and k:
+            c, h, l = c.copy(), h.copy(), l.copy()
+            c[-1] = last_price
+            if last_price > h[-1]: h[-1] = last_price
+            if last_price < l[-1]: l[-1] = last_price
+        return BarView(t, o, h, l, c, v)
+
+
+class TickRing:
+    def __init__(self, capacity=500):
+        self.ticks = deque(maxlen=capacity)   # (t, p, s)
+        self.total = 0                         # 누적 틱 수 (구간 틱 속도 계산용)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def append(self, t, p, s):
+        self.ticks.append((t, p, s))
+        self.total += 1
+
+    @property
+    def last_price(self):
+        return float(self.ticks[-1][1]) if self.ticks else None
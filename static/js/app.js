@@ -203,6 +203,10 @@ document.addEventListener('DOMContentLoaded', function() {
     
     let lightweightChart = null;
     let candleSeries = null;
+    let lastChartTime = 0; // 차트 증분 요청용 since 커서 (마지막 봉 시각, 초)
+
+    // 서버 응답은 [time, open, high, low, close] 배열 -> 차트 라이브러리 형식으로 변환
+    const barFromCompact = (b) => ({ time: b[0], open: b[1], high: b[2], low: b[3], close: b[4] });
     let currentModalTicker = null; 
 
     // --- 2. 5초마다 데이터 새로고침 (DB) ---
@@ -484,7 +488,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         candleSeries = null; 
 
-        if (chartData.status !== 'OK' || chartData.results.length === 0) {
+        if (chartData.status !== 'OK' || chartData.bars.length === 0) {
             chartContainer.innerHTML = '<p style="padding-left:24px; color: red;">Could not load chart data.</p>';
             return;
         }
@@ -525,7 +529,8 @@ document.addEventListener('DOMContentLoaded', function() {
             wickDownColor: chartDownColor
         });
 
-        candleSeries.setData(chartData.results);
+        candleSeries.setData(chartData.bars.map(barFromCompact));
+        lastChartTime = chartData.last;
         lightweightChart.timeScale().fitContent();
     }
 
@@ -563,14 +568,14 @@ document.addEventListener('DOMContentLoaded', function() {
                     }
                 } catch (e) {}
                 
-                // (차트 업데이트)
+                // (차트 업데이트) 마지막 봉 이후만 받아서 update (전체 재전송 X)
                 try {
-                    const chartResponse = await fetch(`/api/chart_data/${ticker}`);
+                    const chartResponse = await fetch(`/api/chart_data/${ticker}?since=${lastChartTime}`);
                     const chartData = await chartResponse.json();
                     
                     if (chartData.status === 'OK' && candleSeries && lightweightChart) {
-                        candleSeries.setData(chartData.results);
-                        lightweightChart.timeScale().fitContent();
+                        chartData.bars.forEach(b => candleSeries.update(barFromCompact(b)));
+                        if (chartData.last) lastChartTime = chartData.last;
                     }
                 } catch (e) {}
             } catch (e) { }
@@ -104,9 +104,16 @@ function formatMetric(value, decimals = 2) {
     return Number(value).toFixed(decimals); // 0.00 등 숫자 정상 표시
 }
 
+// [실시간 푸시] 서버가 'sts_live' 룸으로 스냅샷/델타를 보내줌 -> 폴링은 소켓 끊겼을 때만
+let stsPushActive = false;
+let stsLatest = null; // 마지막으로 화면에 반영한 전체 데이터 (델타 병합 기준)
+
 async function updateDashboard() {
     // console.log("🔄 Fetching STS Status..."); 
 
+    // 소켓 푸시가 살아있으면 폴링 생략 (폴백 전용)
+    if (stsPushActive && socket && socket.connected) return;
+
     try {
         const res = await fetch('/api/sts/status');
         
@@ -115,11 +122,31 @@ async function updateDashboard() {
             return;
         }
         
-        let data = await res.json();
-        
+        applyStsData(await res.json());
+    } catch (e) {
+        console.error("🚨 Dashboard Sync Error:", e);
+    }
+}
+
+// 델타 병합: 바뀐 타겟만 교체하고 순서(order)대로 재구성
+function mergeStsDelta(delta) {
+    const base = stsLatest || { targets: [], logs: [] };
+    const byTicker = {};
+    base.targets.forEach(t => { byTicker[t.ticker] = t; });
+    (delta.targets || []).forEach(t => { byTicker[t.ticker] = t; });
+
+    return {
+        targets: (delta.order || []).map(ticker => byTicker[ticker]).filter(Boolean),
+        logs: delta.logs !== undefined ? delta.logs : base.logs
+    };
+}
+
+function applyStsData(data) {
+    try {
         // 데이터 구조 방어 로직
         if (!data) data = { targets: [], logs: [] };
         if (!data.targets) data.targets = [];
+        stsLatest = data;
 
         // 1. Store data mapping
         data.targets.forEach(t => {
@@ -438,6 +465,13 @@ window.selectTicker = async function(ticker) {
     await loadChart(ticker);
 }
 
+// 서버 응답은 [time, open, high, low, close] 배열 -> 차트 라이브러리 형식으로 변환
+function barFromCompact(b) {
+    return { time: b[0], open: b[1], high: b[2], low: b[3], close: b[4] };
+}
+
+const chartBarCache = {}; // ticker -> { bars, last } (재선택 시 증분 요청용)
+
 async function loadChart(ticker) {
     if (!els.chartContainer) return;
     
@@ -471,11 +505,22 @@ async function loadChart(ticker) {
     });
 
     try {
-        const res = await fetch(`/api/chart_data/${ticker}`);
+        // 이미 받아둔 봉이 있으면 마지막 봉 이후만 요청 (since 커서)
+        const cached = chartBarCache[ticker];
+        const url = cached ? `/api/chart_data/${ticker}?since=${cached.last}` : `/api/chart_data/${ticker}`;
+        const res = await fetch(url);
         if(res.ok) {
             const json = await res.json();
             if(json.status === 'OK') {
-                candleSeries.setData(json.results);
+                const fresh = json.bars.map(barFromCompact);
+                let bars = fresh;
+                if (cached) {
+                    // 진행 중이던 마지막 봉은 새 값으로 덮어씀
+                    const firstNew = fresh.length ? fresh[0].time : Infinity;
+                    bars = cached.bars.filter(b => b.time < firstNew).concat(fresh);
+                }
+                chartBarCache[ticker] = { bars, last: json.last ?? (cached && cached.last) };
+                candleSeries.setData(bars);
             }
         } else {
             // Fallback for demo
@@ -513,6 +558,21 @@ function generateDummyData() {
 /* ==========================================================================
    PART 4. INIT & REAL-TIME CHAT (Socket.io) - [수정됨]
    ========================================================================== */
+if (socket) {
+    // (재)접속할 때마다 룸에 다시 들어가서 전체 스냅샷부터 받음
+    socket.on('connect', () => socket.emit('join_sts'));
+    socket.on('disconnect', () => { stsPushActive = false; });
+
+    socket.on('sts_snapshot', (data) => {
+        stsPushActive = true;
+        applyStsData(data);
+    });
+    socket.on('sts_delta', (delta) => {
+        if (!stsPushActive) return; // 스냅샷 받기 전 델타는 무시
+        applyStsData(mergeStsDelta(delta));
+    });
+}
+
 setInterval(updateDashboard, 1000); 
 updateDashboard();
 
@@ -1,24 +1,24 @@
 import pandas as pd
 import numpy as np
-import os
-import glob
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 import indicators_sts as ind # 우리가 만든 지표 모듈 재사용
+import tick_store
+import feature_cache
 
 # ==============================================================================
 # 1. FEATURE ENGINEERING ENGINE
 # ==============================================================================
+TRADE_COLUMNS = ['sip_timestamp', 'price', 'size']
+
 def process_ticker_data(date, ticker):
-    """저장된 CSV를 읽어와서 Feature를 추출"""
-    base_path = f"datasets/{date}/{ticker}"
-    
+    """tick_store(Parquet)에서 필요한 컬럼만 읽어와서 Feature를 추출"""
     try:
-        df_trades = pd.read_csv(f"{base_path}/trades.csv")
-        # df_quotes = pd.read_csv(f"{base_path}/quotes.csv") # Quotes는 용량 문제로 없을 수도 있음
-        # df_agg = pd.read_csv(f"{base_path}/agg.csv")
-    except:
+        df_trades = tick_store.read_partition('trades', date, ticker, columns=TRADE_COLUMNS)
+        # df_quotes = tick_store.read_partition('quotes', date, ticker) # Quotes는 용량 문제로 없을 수도 있음
+    except Exception:
         return None
+    if df_trades is None: return None
 
     # 데이터 전처리 및 병합 (Timestamp 기준 정렬)
     df_trades['t'] = pd.to_datetime(df_trades['sip_timestamp'], unit='ns')
@@ -117,29 +117,20 @@ def train_weights(all_data):
     
     return weights
 
+# 피처 캐시: 이 파일의 process_ticker_data / indicators_sts 코드가 바뀌면 키가 바뀌어 전부 재계산,
+# 아니면 새로 받은 종목-일만 계산 -> 전체 데이터셋으로 백테스트
+FEATURES = feature_cache.FeatureSet('sts_backtest', process_ticker_data, deps=(ind,))
+
 def run_backtest():
-    all_features = []
-    
-    # 저장된 데이터셋 순회
-    dirs = glob.glob("datasets/*/*")
-    print(f"📂 총 {len(dirs)}개 종목 데이터 로딩 중...")
-    
-    # 테스트용으로 50개만 로딩 (전체 다 하려면 [:50] 제거)
-    for i, d in enumerate(dirs[:50]): 
-        parts = d.split(os.sep)
-        if len(parts) < 3: continue 
-        date, ticker = parts[-2], parts[-1]
-        
-        # print(f"Processing {ticker}...", end='\r') 
-        df = process_ticker_data(date, ticker)
-        if df is not None and not df.empty:
-            all_features.append(df)
-            
-    if not all_features:
-        print("\n❌ 데이터가 없습니다. data_collector.py를 먼저 실행하세요.")
+    # 저장된 데이터셋 순회 (tick_store 파티션 = 종목-일)
+    parts = tick_store.partitions('trades')
+    print(f"📂 총 {len(parts)}개 종목 데이터 로딩 중...")
+    
+    full_df = FEATURES.load(parts)
+    if full_df is None:
+        print("\n❌ 데이터가 없습니다. data_collector.py (또는 기존 CSV는 tick_store.py convert)를 먼저 실행하세요.")
         return
 
-    full_df = pd.concat(all_features)
     print(f"\n📊 총 {len(full_df)}개 데이터 포인트 분석 시작")
     
     # AI 학습
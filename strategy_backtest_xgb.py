@@ -1,17 +1,18 @@
 import pandas as pd
 import numpy as np
-import os
-import glob
 import pickle
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, classification_report
 import indicators_sts as ind # 지표 모듈 재사용
+import tick_store
+import feature_cache
 
 # ==============================================================================
 # 1. CONFIGURATION
 # ==============================================================================
-DATA_DIR = "datasets"
+DATA_DIR = tick_store.STORE_DIR
+TRADE_COLUMNS = ['sip_timestamp', 'price', 'size']
 MODEL_FILE = "sts_xgboost_model.json"
 TARGET_PROFIT = 0.02  # 목표: 3분 내 2% 수익 (스캘핑 최적화)
 STOP_LOSS = -0.01     # 손절: -1% 이내 방어
@@ -19,13 +20,13 @@ STOP_LOSS = -0.01     # 손절: -1% 이내 방어
 # ==============================================================================
 # 2. FEATURE ENGINEERING (데이터 가공)
 # ==============================================================================
-def process_ticker_data_xgb(date, ticker):
+def process_ticker_data_xgb(date, ticker, target_profit=TARGET_PROFIT, stop_loss=STOP_LOSS):
     """XGBoost용 고밀도 데이터셋 생성"""
-    base_path = f"{DATA_DIR}/{date}/{ticker}"
     try:
-        df_trades = pd.read_csv(f"{base_path}/trades.csv")
-    except:
+        df_trades = tick_store.read_partition('trades', date, ticker, columns=TRADE_COLUMNS, root=DATA_DIR)
+    except Exception:
         return None
+    if df_trades is None: return None
 
     # 전처리
     df_trades['t'] = pd.to_datetime(df_trades['sip_timestamp'], unit='ns')
@@ -72,7 +73,7 @@ def process_ticker_data_xgb(date, ticker):
     max_loss = (future_low - df['close']) / df['close']
     
     # 성공 조건: (최대 수익 >= 2%) AND (최대 손실 > -1%)
-    df['target'] = ((max_profit >= TARGET_PROFIT) & (max_loss > STOP_LOSS)).astype(int)
+    df['target'] = ((max_profit >= target_profit) & (max_loss > stop_loss)).astype(int)
     
     # Data Cleaning
     features = [
@@ -90,22 +91,19 @@ def process_ticker_data_xgb(date, ticker):
 def run_xgb_optimization():
     print(f"🚀 [XGBoost 엔진 시동] 목표: 승률 극대화 (Target: 3분 내 {TARGET_PROFIT*100}% 수익)")
     
-    all_data = []
-    dirs = glob.glob(f"{DATA_DIR}/*/*")
-    print(f"📂 데이터셋 로딩 중 ({len(dirs)}개 종목)...")
-    
-    for i, d in enumerate(dirs[:100]): # 학습 속도를 위해 100개만 샘플링 (전체 하려면 제한 해제)
-        parts = d.split(os.sep)
-        if len(parts) < 3: continue 
-        df = process_ticker_data_xgb(parts[-2], parts[-1])
-        if df is not None and not df.empty:
-            all_data.append(df)
-            
-    if not all_data:
-        print("❌ 데이터 없음. data_collector.py 실행 필요.")
+    parts = tick_store.partitions('trades', root=DATA_DIR)
+    print(f"📂 데이터셋 로딩 중 ({len(parts)}개 종목)...")
+    
+    # 피처 캐시 (코드/목표 수익·손절이 바뀐 경우만 재계산) -> 전체 종목-일로 학습
+    features = feature_cache.FeatureSet(
+        'sts_xgb', process_ticker_data_xgb, deps=(ind,), store_root=DATA_DIR,
+        params={'target_profit': TARGET_PROFIT, 'stop_loss': STOP_LOSS}
+    )
+    full_df = features.load(parts)
+    if full_df is None:
+        print("❌ 데이터 없음. data_collector.py (또는 기존 CSV는 tick_store.py convert) 실행 필요.")
         return
 
-    full_df = pd.concat(all_data)
     print(f"📊 총 {len(full_df):,}개 데이터 포인트 확보.")
     print(f"🔥 정답(성공) 비율: {full_df['target'].mean()*100:.2f}% (데이터 불균형 확인)")
 
@@ -0,0 +1,112 @@
+import asyncio
+import bisect
+import json
+
+# ==============================================================================
+# FCM Subscriber Index (알림 점수 기준별 토큰 버킷)
+# ==============================================================================
+# 신호마다 SELECT token, min_score FROM fcm_tokens 를 돌리고 파이썬에서 거르던 것 제거.
+# - min_score 오름차순 배열 + 버킷(토큰 집합) -> score 이하 버킷만 bisect로 골라냄
+# - app.py가 토큰 등록/기준 변경 시 Redis 채널로 변경분을 publish -> 워커가 증분 반영
+# - 구독(재)연결 직후에는 DB에서 전체를 다시 읽어서 끊겨 있던 동안 놓친 변경을 보정
+
+FCM_TOKENS_CHANNEL = 'fcm_tokens_changed'
+
+
+class SubscriberIndex:
+    def __init__(self):
+        self.thresholds = []    # 정렬된 min_score 목록
+        self.buckets = {}       # min_score -> set(token)
+        self.by_token = {}      # token -> min_score
+        self.ready = False
+
+    def load(self, rows):
+        """DB 전체 행 [(token, min_score), ...] 으로 인덱스 재구성"""
+        self.thresholds, self.buckets, self.by_token = [], {}, {}
+        for token, min_score in rows:
+            self._add(token, min_score)
+        self.ready = True
+        print(f"📇 [Subscribers] Index loaded: {len(self.by_token)} tokens / {len(self.thresholds)} buckets", flush=True)
+
+    def _add(self, token, min_score):
+        min_score = int(min_score) if min_score is not None else 0
+        bucket = self.buckets.get(min_score)
+        if bucket is None:
+            bucket = self.buckets[min_score] = set()
+            bisect.insort(self.thresholds, min_score)
+        bucket.add(token)
+        self.by_token[token] = min_score
+
+    def _remove(self, token):
+        min_score = self.by_token.pop(token, None)
+        if min_score is None: return
+        bucket = self.buckets[min_score]
+        bucket.discard(token)
+        if not bucket:
+            del self.buckets[min_score]
+            self.thresholds.pop(bisect.bisect_left(self.thresholds, min_score))
+
+    def upsert(self, token, min_score):
+        self._remove(token)
+        self._add(token, min_score)
+
+    def delete(self, tokens):
+        for token in tokens:
+            self._remove(token)
+
+    def apply(self, change):
+        """pub/sub 메시지 반영: {'op': 'upsert', 'token', 'min_score'} / {'op': 'delete', 'tokens': [...]}"""
+        op = change.get('op')
+        if op == 'upsert':
+            self.upsert(change['token'], change.get('min_score'))
+        elif op == 'delete':
+            self.delete(change.get('tokens') or [])
+
+    def eligible(self, score):
+        """min_score <= score 인 토큰 전부"""
+        try:
+            idx = bisect.bisect_right(self.thresholds, float(score))
+        except (TypeError, ValueError):
+            idx = len(self.thresholds)
+        return [token for th in self.thresholds[:idx] for token in self.buckets[th]]
+
+    def __len__(self):
+        return len(self.by_token)
+
+
+def publish_change(client, op, **fields):
+    """
+    토큰 변경 알림 (sync/async Redis 클라이언트 둘 다 사용 가능 - async면 반환값을 await)
+    예) publish_change(r, 'upsert', token=token, min_score=30)
+    """
+    return client.publish(FCM_TOKENS_CHANNEL, json.dumps({'op': op, **fields}))
+
+
+async def follow_changes(index, redis_client, load_rows):
+    """
+    인덱스를 Redis 채널에 붙여서 계속 최신 상태로 유지 (워커 이벤트 루프에서 태스크로 실행)
+    load_rows: DB 전체 행을 돌려주는 async 함수
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(FCM_TOKENS_CHANNEL)
+            # 구독을 먼저 걸고 전체 적재 -> 그 사이 변경분은 채널에 쌓였다가 뒤에 반영됨 (upsert는 멱등)
+            index.load(await load_rows())
+
+            async for message in pubsub.listen():
+                if message.get('type') != 'message': continue
+                try:
+                    index.apply(json.loads(message['data']))
+                except Exception as e:
+                    print(f"⚠️ [Subscribers] Bad change message: {e}", flush=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ [Subscribers] Channel error, resyncing in 5s: {e}", flush=True)
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
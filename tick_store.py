@@ -0,0 +1,299 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ==============================================================================
+# Parquet Tick Store (datasets/{date}/{ticker}/*.csv 대체)
+# ==============================================================================
+# 백테스트가 돌 때마다 종목-일별 trades.csv 전체를 다시 파싱하던 것 -> 컬럼형 저장소
+#
+#   tickstore/date=2024-05-01/ticker=ABCD/trades.parquet
+#                                         quotes.parquet
+#                                         agg.parquet
+#                                         _collected.json   (data_collector 이어받기 기록)
+#
+# - 컬럼 타입 고정: *_timestamp는 int64 ns (agg의 t는 Polygon 그대로 ms), 가격 float64,
+#   수량 float32 (2^24 이하 정수는 정확), 거래소/테이프 int8, conditions는 list<int16>
+# - zstd 압축 + 시간순 정렬 -> 행 그룹 min/max 통계로 시간 범위 필터도 파일 안에서 걸러짐
+# - read(kind, columns, dates, tickers, start, end): 필요한 컬럼만, date/ticker는 경로(파티션)
+#   단계에서 잘라내고 나머지 조건은 pyarrow에 그대로 넘김
+# - 기존 CSV 일괄 변환: python tick_store.py convert --src datasets
+
+STORE_DIR = os.environ.get('TICK_STORE_DIR', 'tickstore')
+KINDS = ('trades', 'quotes', 'agg')
+COMPRESSION = 'zstd'
+
+_conditions = pa.list_(pa.int16())
+SCHEMAS = {
+    'trades': pa.schema([
+        ('sip_timestamp', pa.int64()), ('participant_timestamp', pa.int64()), ('trf_timestamp', pa.int64()),
+        ('price', pa.float64()), ('size', pa.float32()),
+        ('exchange', pa.int8()), ('tape', pa.int8()), ('trf_id', pa.int16()), ('correction', pa.int8()),
+        ('sequence_number', pa.int64()), ('id', pa.string()), ('conditions', _conditions),
+    ]),
+    'quotes': pa.schema([
+        ('sip_timestamp', pa.int64()), ('participant_timestamp', pa.int64()), ('trf_timestamp', pa.int64()),
+        ('bid_price', pa.float64()), ('bid_size', pa.float32()), ('bid_exchange', pa.int8()),
+        ('ask_price', pa.float64()), ('ask_size', pa.float32()), ('ask_exchange', pa.int8()),
+        ('tape', pa.int8()), ('sequence_number', pa.int64()),
+        ('conditions', _conditions), ('indicators', _conditions),
+    ]),
+    'agg': pa.schema([
+        ('t', pa.int64()), ('o', pa.float64()), ('h', pa.float64()), ('l', pa.float64()), ('c', pa.float64()),
+        ('v', pa.float64()), ('vw', pa.float64()), ('n', pa.int32()),
+    ]),
+}
+TIME_COLUMN = {'trades': 'sip_timestamp', 'quotes': 'sip_timestamp', 'agg': 't'}
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string()), ('ticker', pa.string())]), flavor='hive')
+
+
+def partition_dir(date, ticker, root=STORE_DIR):
+    return os.path.join(root, f"date={date}", f"ticker={ticker}")
+
+
+def file_path(kind, date, ticker, root=STORE_DIR):
+    return os.path.join(partition_dir(date, ticker, root), f"{kind}.parquet")
+
+# ------------------------------------------------------------------------------
+# 쓰기
+# ------------------------------------------------------------------------------
+
+def _parse_list(v):
+    """CSV에서 온 '[12, 37]' 문자열 / 이미 리스트 / 비어 있음 -> list 또는 None"""
+    if v is None or (isinstance(v, float) and np.isnan(v)): return None
+    if isinstance(v, str):
+        v = v.strip()
+        return json.loads(v) if v.startswith('[') else None
+    return list(v)
+
+
+def _columns(rows):
+    """DataFrame 또는 list of dict -> (컬럼 이름들, 이름 -> 값 시퀀스). dict는 DataFrame을 거치지 않음"""
+    if isinstance(rows, pd.DataFrame):
+        return list(rows.columns), lambda name: rows[name]
+    names = list(dict.fromkeys(k for r in rows for k in r))
+    return names, lambda name: [r.get(name) for r in rows]
+
+
+def to_table(kind, rows, strict=False):
+    """
+    REST results(list of dict) 또는 DataFrame -> 고정 스키마 Arrow 테이블 (시간순)
+    strict=True: 정확히 스키마 컬럼만 (없는 컬럼은 null, 모르는 컬럼은 버림)
+                 -> 페이지마다 스키마가 같아서 행 그룹으로 이어 쓸 수 있음
+    """
+    names, column = _columns(rows)
+    n = len(rows)
+    schema = SCHEMAS[kind]
+    arrays, fields = [], []
+    for field in schema:
+        if field.name not in names:
+            if strict:
+                arrays.append(pa.nulls(n, field.type))
+                fields.append(field)
+            continue
+        col = column(field.name)
+        if pa.types.is_list(field.type):
+            values = pa.array([_parse_list(v) for v in col], type=field.type)
+        else:
+            # CSV에서 읽으면 id가 int, 빈 정수 컬럼이 float(NaN)로 오므로 추론 후 캐스팅
+            # (float32 수량은 정밀도 손실 허용)
+            values = pa.array(col, from_pandas=True)
+            if values.type != field.type:
+                values = values.cast(field.type, safe=not pa.types.is_floating(field.type))
+        arrays.append(values)
+        fields.append(field)
+    # 스키마에 없는 컬럼은 추론 타입 그대로 보존
+    for name in ([] if strict else names):
+        if name in schema.names: continue
+        values = pa.array(column(name), from_pandas=True)
+        arrays.append(values)
+        fields.append(pa.field(name, values.type))
+
+    table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    key = TIME_COLUMN[kind]
+    if key in table.column_names and table.num_rows:
+        table = table.take(pc.sort_indices(table, [(key, 'ascending')]))
+    return table
+
+
+def write(kind, date, ticker, rows, root=STORE_DIR):
+    """테이블 저장 (임시 파일 -> rename). 저장된 경로 반환"""
+    path = file_path(kind, date, ticker, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(to_table(kind, rows), path + ".tmp", compression=COMPRESSION)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class PartitionWriter:
+    """
+    페이지(청크) 단위로 받아 바로 행 그룹으로 기록 -> 메모리에는 한 페이지만
+    close()에서 임시 파일 -> rename (중간에 죽으면 .tmp만 남고 기존 파일/마커는 그대로)
+    청크는 시간순으로 들어와야 파일 전체가 시간순 (Polygon은 order=asc로 요청)
+    """
+    def __init__(self, kind, date, ticker, root=STORE_DIR):
+        self.kind = kind
+        self.path = file_path(kind, date, ticker, root)
+        self.rows = 0
+        self._writer = None
+        self._aborted = False
+        # asyncio.to_thread로 부를 때 취소돼도 스레드의 write는 계속 돌 수 있음 -> abort와 겹치지 않게
+        self._lock = threading.Lock()
+
+    def write(self, rows):
+        if not len(rows): return
+        table = to_table(self.kind, rows, strict=True)
+        with self._lock:
+            if self._aborted: return
+            if self._writer is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._writer = pq.ParquetWriter(self.path + ".tmp", table.schema, compression=COMPRESSION)
+            self._writer.write_table(table)
+            self.rows += table.num_rows
+
+    def close(self):
+        """저장된 경로 (한 줄도 없었으면 None)"""
+        with self._lock:
+            if self._writer is None: return None
+            self._writer.close()
+            self._writer = None
+            os.replace(self.path + ".tmp", self.path)
+            return self.path
+
+    def abort(self):
+        with self._lock:
+            self._aborted = True
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            try:
+                os.remove(self.path + ".tmp")
+            except OSError:
+                pass
+
+# ------------------------------------------------------------------------------
+# 읽기
+# ------------------------------------------------------------------------------
+
+def _as_list(v):
+    if v is None: return None
+    return [v] if isinstance(v, str) else list(v)
+
+
+def partitions(kind='trades', dates=None, tickers=None, root=STORE_DIR):
+    """저장된 (date, ticker) 목록. dates는 'YYYY-MM-DD' / 리스트 / (시작, 끝) 튜플"""
+    out = []
+    date_range = dates if isinstance(dates, tuple) else None
+    date_set = None if date_range or dates is None else set(_as_list(dates))
+    ticker_set = None if tickers is None else set(_as_list(tickers))
+    for path in glob.glob(os.path.join(root, "date=*", "ticker=*", f"{kind}.parquet")):
+        d_dir, t_dir = path.split(os.sep)[-3:-1]
+        date, ticker = d_dir[len("date="):], t_dir[len("ticker="):]
+        if date_set is not None and date not in date_set: continue
+        if date_range and not (date_range[0] <= date <= date_range[1]): continue
+        if ticker_set is not None and ticker not in ticker_set: continue
+        out.append((date, ticker))
+    return sorted(out)
+
+
+def dataset(kind, dates=None, tickers=None, root=STORE_DIR):
+    """date/ticker로 파일을 먼저 고른 pyarrow Dataset (파티션 컬럼 date, ticker 포함)"""
+    files = [file_path(kind, d, t, root) for d, t in partitions(kind, dates, tickers, root)]
+    schema = SCHEMAS[kind]
+    for name in ('date', 'ticker'):
+        schema = schema.append(pa.field(name, pa.string()))
+    return ds.dataset(files, schema=schema, format='parquet', partitioning=PARTITIONING, partition_base_dir=root)
+
+
+def read(kind, columns=None, dates=None, tickers=None, start=None, end=None, filter=None, root=STORE_DIR):
+    """
+    DataFrame으로 읽기
+    columns: 필요한 컬럼만 (None이면 전부, 'date'/'ticker' 파티션 컬럼도 지정 가능)
+    start/end: 시간 컬럼(trades/quotes는 ns, agg는 ms) 범위 [start, end)
+    filter: 추가 pyarrow 조건식 (예: ds.field('price') < 20)
+    """
+    dset = dataset(kind, dates, tickers, root)
+    key = ds.field(TIME_COLUMN[kind])
+    expr = filter
+    if start is not None:
+        expr = key >= start if expr is None else expr & (key >= start)
+    if end is not None:
+        expr = key < end if expr is None else expr & (key < end)
+    return dset.to_table(columns=columns, filter=expr).to_pandas()
+
+
+def read_partition(kind, date, ticker, columns=None, root=STORE_DIR):
+    """종목-일 하나 (없으면 None)"""
+    path = file_path(kind, date, ticker, root)
+    if not os.path.exists(path): return None
+    return pq.read_table(path, columns=columns).to_pandas()
+
+# ------------------------------------------------------------------------------
+# 기존 CSV 변환
+# ------------------------------------------------------------------------------
+
+def convert_csv_tree(src='datasets', root=STORE_DIR, remove=False, force=False):
+    """datasets/{date}/{ticker}/{kind}.csv -> 저장소. 이미 변환된 파일은 건너뜀"""
+    csv_bytes = pq_bytes = converted = skipped = 0
+    started = time.monotonic()
+    for csv_path in sorted(glob.glob(os.path.join(src, "*", "*", "*.csv"))):
+        kind = os.path.splitext(os.path.basename(csv_path))[0]
+        if kind not in KINDS: continue
+        date, ticker = csv_path.split(os.sep)[-3:-1]
+        out = file_path(kind, date, ticker, root)
+        if not force and os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(csv_path):
+            skipped += 1
+            continue
+        try:
+            df = pd.read_csv(csv_path)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+            print(f"⚠️ {csv_path}: {e}", flush=True)
+            continue
+        write(kind, date, ticker, df, root)
+        size_in, size_out = os.path.getsize(csv_path), os.path.getsize(out)
+        csv_bytes += size_in
+        pq_bytes += size_out
+        converted += 1
+        print(f"✅ {date} | {ticker} {kind}: {len(df):,} rows, {size_in / 1e6:.1f}MB -> {size_out / 1e6:.1f}MB", flush=True)
+        if remove:
+            os.remove(csv_path)
+
+    ratio = csv_bytes / pq_bytes if pq_bytes else 0
+    print(f"\n🏁 변환 {converted}개 (건너뜀 {skipped}) | CSV {csv_bytes / 1e6:,.1f}MB -> Parquet {pq_bytes / 1e6:,.1f}MB "
+          f"(x{ratio:.1f} 절감) | {time.monotonic() - started:.0f}s", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parquet tick store tools')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    conv = sub.add_parser('convert', help='datasets/{date}/{ticker}/*.csv -> parquet store')
+    conv.add_argument('--src', default='datasets')
+    conv.add_argument('--dst', default=STORE_DIR)
+    conv.add_argument('--remove-csv', action='store_true', help='변환 후 CSV 삭제')
+    conv.add_argument('--force', action='store_true', help='이미 변환된 파일도 다시')
+    ls = sub.add_parser('ls', help='저장된 종목-일 목록')
+    ls.add_argument('--kind', default='trades', choices=KINDS)
+    ls.add_argument('--root', default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.cmd == 'convert':
+        convert_csv_tree(args.src, args.dst, remove=args.remove_csv, force=args.force)
+    elif args.cmd == 'ls':
+        parts = partitions(args.kind, root=args.root)
+        for date, ticker in parts:
+            print(f"{date} {ticker}")
+        print(f"({len(parts)} partitions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import time
+from collections import defaultdict
+
+# ==============================================================================
+# Tick -> Alert 지연 추적 (ingester -> worker -> notifier)
+# ==============================================================================
+# 시세 1건/알림 1건에 구간별 타임스탬프(epoch 초)를 실어 나르고, 구간 지연을
+# 고정 버킷 히스토그램으로 Redis에 누적합니다. (app.py /admin/secret/latency 에서 조회)
+#
+#   exchange_ts  Polygon 이벤트 시각 (T: 't', A: 'e')
+#   ingest_ts    ingester 수신 시각
+#   dequeue_ts   worker가 ticker_stream에서 꺼낸 시각
+#   decision_ts  SniperBot.fire() 시각
+#   enqueue_ts   fcm_queue 적재 시각
+#   send_ts      notifier 발송 완료 시각
+
+TRACE_FIELDS = ('exchange_ts', 'ingest_ts', 'dequeue_ts', 'decision_ts', 'enqueue_ts', 'send_ts')
+
+# (구간 이름, 시작 필드, 끝 필드)
+TRACE_STAGES = (
+    ('exchange_to_ingest', 'exchange_ts', 'ingest_ts'),
+    ('ingest_to_dequeue', 'ingest_ts', 'dequeue_ts'),
+    ('dequeue_to_decision', 'dequeue_ts', 'decision_ts'),
+    ('decision_to_enqueue', 'decision_ts', 'enqueue_ts'),
+    ('enqueue_to_send', 'enqueue_ts', 'send_ts'),
+    ('tick_to_alert', 'exchange_ts', 'send_ts'),
+)
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+HIST_KEY = 'latency:hist:{}'
+FLUSH_INTERVAL = 5.0
+
+
+def stage_latencies(trace):
+    """trace dict -> {구간: ms} (양쪽 타임스탬프가 다 있는 구간만)"""
+    out = {}
+    for stage, start, end in TRACE_STAGES:
+        a, b = trace.get(start), trace.get(end)
+        if a and b:
+            out[stage] = max(0.0, (float(b) - float(a)) * 1000)
+    return out
+
+
+def _bucket_field(ms):
+    for bound in BUCKETS_MS:
+        if ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+
+class LatencyHistogram:
+    """
+    프로세스 내부 누적 -> 주기적으로 Redis에 한꺼번에 HINCRBY (틱마다 Redis 왕복하지 않음)
+    """
+    def __init__(self):
+        self.pending = defaultdict(lambda: defaultdict(int))
+        self.pending_sum = defaultdict(float)
+        self.last_flush = time.monotonic()
+
+    def observe(self, stage, ms):
+        self.pending[stage][_bucket_field(ms)] += 1
+        self.pending[stage]['count'] += 1
+        self.pending_sum[stage] += ms
+
+    def observe_trace(self, trace):
+        for stage, ms in stage_latencies(trace).items():
+            self.observe(stage, ms)
+
+    def due(self):
+        return bool(self.pending) and time.monotonic() - self.last_flush >= FLUSH_INTERVAL
+
+    def flush(self, client):
+        """
+        sync/async Redis 클라이언트 둘 다 사용 가능 (async면 반환값을 await)
+        """
+        pipe = client.pipeline(transaction=False)
+        for stage, fields in self.pending.items():
+            key = HIST_KEY.format(stage)
+            for field, n in fields.items():
+                pipe.hincrby(key, field, n)
+            pipe.hincrbyfloat(key, 'sum_ms', round(self.pending_sum[stage], 3))
+        self.pending.clear()
+        self.pending_sum.clear()
+        self.last_flush = time.monotonic()
+        return pipe.execute()
+
+
+def summarize(fields):
+    """Redis 해시 하나(bytes/str 섞여도 됨) -> count, mean, p50/p95/p99 (버킷 상한 기준 추정치)"""
+    fields = {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in fields.items()}
+    count = int(fields.get('count', 0))
+    if not count:
+        return {'count': 0}
+
+    out = {'count': count, 'mean_ms': round(fields.get('sum_ms', 0.0) / count, 1)}
+    bounds = [(b, f"le_{b}") for b in BUCKETS_MS] + [(float('inf'), 'le_inf')]
+    for p in (50, 95, 99):
+        target = count * p / 100.0
+        cum = 0
+        for bound, field in bounds:
+            cum += fields.get(field, 0)
+            if cum >= target:
+                out[f"p{p}_ms"] = bound if bound != float('inf') else f">{BUCKETS_MS[-1]}"
+                break
+    out['buckets'] = {field: int(fields[field]) for _, field in bounds if fields.get(field)}
+    return out
+
+
+def read_histograms(client):
+    """동기 Redis 클라이언트로 전체 구간 요약 (admin 엔드포인트용)"""
+    pipe = client.pipeline(transaction=False)
+    for stage, _, _ in TRACE_STAGES:
+        pipe.hgetall(HIST_KEY.format(stage))
+    return {
+        stage: summarize(fields)
+        for (stage, _, _), fields in zip(TRACE_STAGES, pipe.execute())
+    }
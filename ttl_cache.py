@@ -0,0 +1,82 @@
+import threading
+import time
+
+# ==============================================================================
+# TTL Cache + Single-Flight
+# ==============================================================================
+# - 짧은 TTL 인메모리 캐시 (app.py 같은 eventlet 프로세스에서는 threading.Lock이
+#   monkey_patch로 그린 락이 되므로 그대로 사용 가능)
+# - single-flight: 같은 키가 동시에 미스나면 계산(DB/HTTP)은 1번만 하고
+#   나머지 요청은 그 결과를 기다렸다가 같이 받아갑니다.
+
+
+class TTLCache:
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}      # key -> (value, expires_at)
+        self._key_locks = {}    # key -> Lock (single-flight용)
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _evict(self, now):
+        # 1. 만료된 것부터 정리
+        expired = [k for k, (_, exp) in self._entries.items() if exp <= now]
+        for k in expired:
+            self._entries.pop(k, None)
+            self._key_locks.pop(k, None)
+
+        # 2. 그래도 넘치면 만료 임박한 순서로 정리
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self._entries.items(), key=lambda kv: kv[1][1])[:overflow]
+            for k, _ in oldest:
+                self._entries.pop(k, None)
+                self._key_locks.pop(k, None)
+
+    def get(self, key):
+        """신선한 값이 있으면 반환, 없거나 만료됐으면 None"""
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def peek(self, key):
+        """만료 여부와 상관없이 마지막 값 반환 (증분 갱신의 기준값 용도)"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        now = time.monotonic()
+        self._entries[key] = (value, now + (self.ttl if ttl is None else ttl))
+        if len(self._entries) > self.max_entries:
+            self._evict(now)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """
+        캐시 히트면 즉시 반환, 미스면 compute()를 호출해 채웁니다.
+        동시에 들어온 미스 요청들은 락에서 대기 -> 첫 요청 결과를 공유 (single-flight)
+        ttl에 함수를 넘기면 계산된 값을 보고 TTL을 정합니다. (예: 404는 짧게)
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock_for(key):
+            # 락 대기하는 동안 다른 요청이 이미 채웠을 수 있음
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            value = compute()
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            return value
@@ -8,25 +8,23 @@ import sys
 import asyncio 
 from functools import partial
 from concurrent.futures import ThreadPoolExecutor
-import firebase_admin
-from firebase_admin import credentials, messaging
 
 try:
     from STS_Engine import (
         STSPipeline, 
         STS_TARGET_COUNT, 
-        SniperBot, 
         DB_WORKER_POOL, 
-        init_db,             
-        get_db_connection    
+        init_db
     )
+    from tracing import LatencyHistogram
+    from metrics import REGISTRY, start_metrics_server
+    from loop_monitor import MONITOR
 except ImportError:
     print("❌ [Worker Error] 'STS_Engine.py'를 찾을 수 없습니다.", flush=True)
     sys.exit(1)
 
 # --- 설정 ---
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
-FIREBASE_ADMIN_SDK_JSON_STR = os.environ.get('FIREBASE_ADMIN_SDK_JSON')
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
 
 if not POLYGON_API_KEY:
@@ -35,22 +33,32 @@ if not POLYGON_API_KEY:
 # 비동기 Redis 클라이언트 생성
 r = redis.from_url(REDIS_URL)
 
-def init_firebase_worker():
-    if firebase_admin._apps: return
-    try:
-        if not FIREBASE_ADMIN_SDK_JSON_STR: return
-        json_str = FIREBASE_ADMIN_SDK_JSON_STR.strip()
-        if json_str.startswith("'") and json_str.endswith("'"):
-            json_str = json_str[1:-1]
+# 메트릭 (metrics.py, GET :9100/metrics)
+FRAMES_TOTAL = REGISTRY.counter('worker_frames_total', 'ticker_stream frames processed')
+EVENTS_TOTAL = REGISTRY.counter('worker_events_total', 'Polygon events processed', ('ev',))
+FRAME_SECONDS = REGISTRY.histogram('worker_frame_seconds', 'Time spent processing one ticker_stream frame')
+REDIS_LIST_LENGTH = REGISTRY.gauge('redis_list_length', 'Redis list length', ('key',))
+
+async def sample_queue_depths(interval=1.0):
+    """Redis 큐 길이는 스크레이프 스레드에서 못 읽으니 루프에서 주기적으로 샘플링"""
+    while True:
         try:
-            cred_dict = json.loads(json_str)
-        except json.JSONDecodeError:
-            fixed_str = json_str.replace('\\n', '\n')
-            cred_dict = json.loads(fixed_str)
-        firebase_admin.initialize_app(credentials.Certificate(cred_dict))
-        print("✅ [Worker] Firebase Init Done", flush=True)
-    except Exception as e:
-        print(f"⚠️ [Worker] Firebase Init Warning: {e}", flush=True)
+            for key in ('ticker_stream', 'fcm_queue'):
+                REDIS_LIST_LENGTH.set(await r.llen(key), key=key)
+        except Exception as e:
+            print(f"⚠️ [Metrics] Queue depth sample failed: {e}", flush=True)
+        await asyncio.sleep(interval)
+
+# 구간별 지연 히스토그램 (5초마다 Redis로 모아서 반영)
+stage_hist = LatencyHistogram()
+
+def make_trace(exchange_ms, ingest_ts, dequeue_ts):
+    """Polygon 이벤트 시각(ms) + 수신/꺼낸 시각(초) -> trace dict"""
+    return {
+        'exchange_ts': exchange_ms / 1000.0 if exchange_ms else None,
+        'ingest_ts': ingest_ts,
+        'dequeue_ts': dequeue_ts
+    }
 
 def run_warmup_task(bot):
     try:
@@ -58,103 +66,6 @@ def run_warmup_task(bot):
     except Exception as e:
         print(f"⚠️ [Warmup Start Error] {e}")
 
-# [알림 처리] 비동기 함수로 변경 (Redis await 사용 위함)
-async def process_fcm_job():
-    try:
-        # 1. [수정] 비동기 Redis 사용 (await 필수)
-        packed_data = await r.rpop('fcm_queue')
-        if not packed_data: return 
-
-        task = json.loads(packed_data)
-        ticker = task['ticker']
-        score = task['score']
-        
-        # 2. DB 작업은 동기식이므로 별도 스레드에서 실행 (스캐너 멈춤 방지)
-        loop = asyncio.get_running_loop()
-        
-        # DB 읽기 헬퍼 함수
-        def fetch_subscribers():
-            conn = get_db_connection()
-            try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT token, min_score FROM fcm_tokens")
-                subs = cursor.fetchall()
-                cursor.close()
-                return subs
-            finally:
-                pass # 커넥션 풀 사용 중이므로 닫지 않음
-
-        subscribers = await loop.run_in_executor(DB_WORKER_POOL, fetch_subscribers)
-
-        if not subscribers: return
-
-        if task.get('entry') and task.get('tp'):
-            title = f"BUY {ticker} (Score: {score})"
-            body = f"Entry: ${task['entry']} / TP: ${task['tp']}"
-        else:
-            title = f"SCAN {ticker} (Score: {score})"
-            body = f"Current: ${task['price']}"
-
-        # [유지] Data-only Payload (New content available 방지)
-        data_payload = {
-            'title': title,   
-            'body': body,     
-            'ticker': str(ticker),
-            'price': str(task['price']), 
-            'score': str(score),
-            'click_action': '/'
-        }
-
-        print(f"📨 [Worker] Sending Data-only FCM: {title}", flush=True)
-
-        init_firebase_worker()
-        
-        success = 0
-        failed_tokens = []
-
-        for row in subscribers:
-            token = row[0]
-            try:
-                user_min = int(row[1]) if row[1] is not None else 0
-                if float(score) < user_min: continue
-            except: pass
-
-            try:
-                # notification 없이 data만 보냄
-                msg = messaging.Message(token=token, data=data_payload)
-                messaging.send(msg)
-                success += 1
-            except Exception as e:
-                if "registration-token-not-registered" in str(e) or "not-found" in str(e): 
-                    failed_tokens.append(token)
-
-        # 토큰 청소 (비동기 래핑)
-        if failed_tokens:
-            def clean_tokens(tokens):
-                conn = get_db_connection()
-                try:
-                    c = conn.cursor()
-                    c.execute("DELETE FROM fcm_tokens WHERE token = ANY(%s)", (tokens,))
-                    conn.commit()
-                    c.close()
-                finally:
-                    pass
-            await loop.run_in_executor(DB_WORKER_POOL, partial(clean_tokens, failed_tokens))
-
-    except Exception as e:
-        print(f"❌ [Worker FCM Error] {e}", flush=True)
-
-async def fcm_consumer_loop():
-    print("📨 [FCM Worker] Started independent notification loop", flush=True)
-    while True:
-        try:
-            # [수정] 직접 await 호출 (async 함수이므로 executor 불필요)
-            await process_fcm_job()
-            await asyncio.sleep(0.1) 
-        except Exception as e:
-            print(f"❌ [FCM Loop Error] {e}", flush=True)
-            await asyncio.sleep(1)
-
 async def send_test_notification():
     print("🔔 [Test] Sending startup notification...", flush=True)
     try:
@@ -206,7 +117,7 @@ async def task_global_scan(pipeline, bot_attach_times):
                     
                     if rem in pipeline.snipers: 
                         # print(f"👋 [Worker] Detach: {rem}", flush=True) # 로그 너무 많으면 주석
-                        del pipeline.snipers[rem]
+                        pipeline.remove_sniper(rem)
                         if rem in bot_attach_times: del bot_attach_times[rem]
                         # Ingester에게 수집 중단 요청
                         await r.srem('focused_tickers', rem) 
@@ -215,8 +126,7 @@ async def task_global_scan(pipeline, bot_attach_times):
                 for add in (new_set - current_set):
                     if add not in pipeline.snipers:
                         print(f"🚀 [Worker] Staging Attach: {add}", flush=True)
-                        new_bot = SniperBot(add, pipeline.logger, pipeline.selector, pipeline.model_bytes)
-                        pipeline.snipers[add] = new_bot
+                        new_bot = pipeline.add_sniper(add)
                         bot_attach_times[add] = now
                         
                         # [중요] 비동기 웜업 시작
@@ -241,7 +151,6 @@ async def redis_consumer():
     print("🧠 [Worker] Starting Logic Engine (Async Redis Mode)...", flush=True)
     
     init_db()
-    init_firebase_worker()
     await send_test_notification()
 
     print("⏳ [System] Initializing Pipeline...", flush=True)
@@ -251,12 +160,15 @@ async def redis_consumer():
     last_quotes = {}
     bot_attach_times = {}
 
-    print("🧠 [Worker] Ready. Listening to 'ticker_stream' & 'fcm_queue'...", flush=True)
+    print("🧠 [Worker] Ready. Listening to 'ticker_stream'... (fcm_queue -> notifier.py)", flush=True)
     
-    # 두 개의 태스크 병렬 실행
-    asyncio.create_task(fcm_consumer_loop())
+    # 스캐너 태스크 병렬 실행 (푸시 발송은 notifier 프로세스가 전담)
     asyncio.create_task(task_global_scan(pipeline, bot_attach_times))
 
+    start_metrics_server(9100)
+    MONITOR.start()
+    asyncio.create_task(sample_queue_depths())
+
     # 메인 시세 처리 루프
     while True:
         try:
@@ -265,20 +177,32 @@ async def redis_consumer():
             
             if pop_result:
                 _, msg = pop_result
+                dequeue_ts = time.time()
                 data = json.loads(msg)
+
+                frame_started = time.perf_counter()
+
+                # ingester 봉투 {"ingest_ts", "events"} (구버전 프레임은 리스트 그대로)
+                if isinstance(data, dict):
+                    ingest_ts = data.get('ingest_ts')
+                    data = data.get('events') or []
+                else:
+                    ingest_ts = None
                 
                 for item in data:
                     ev = item.get('ev')
                     t = item.get('sym')
+                    EVENTS_TOTAL.inc(ev=ev)
                     
                     if ev == 'A':
                         pipeline.selector.update(item)
                         last_agg[t] = item
                         if t in pipeline.snipers:
-                            pipeline.snipers[t].update_dashboard_db(
-                                {'p': item['c'], 's': item['v'], 't': item['e']}, 
+                            pipeline.route_tick(
+                                t, {'p': item['c'], 's': item['v'], 't': item['e']}, 
                                 last_quotes.get(t, {'bids':[],'asks':[]}), 
-                                item
+                                item,
+                                trace=make_trace(item.get('e'), ingest_ts, dequeue_ts)
                             )
                     elif ev == 'Q':
                         last_quotes[t] = {
@@ -286,12 +210,26 @@ async def redis_consumer():
                             'asks': [{'p':item.get('ap'),'s':item.get('as')}]
                         }
                     elif ev == 'T' and t in pipeline.snipers:
-                        pipeline.snipers[t].update_dashboard_db(
-                            item, 
+                        pipeline.route_tick(
+                            t, item, 
                             last_quotes.get(t, {'bids':[],'asks':[]}), 
-                            last_agg.get(t)
+                            last_agg.get(t),
+                            trace=make_trace(item.get('t'), ingest_ts, dequeue_ts)
                         )
+
+                # 프레임에서 종목별로 모은 틱 처리 (종목당 지표 계산/판단 1번)
+                pipeline.flush_ticks()
+
+                # 프레임 단위 지연 (거래소 -> 수신, 수신 -> 워커 꺼냄)
+                if data:
+                    stage_hist.observe_trace(make_trace(data[-1].get('t') or data[-1].get('e'), ingest_ts, dequeue_ts))
+
+                FRAMES_TOTAL.inc()
+                FRAME_SECONDS.observe(time.perf_counter() - frame_started)
             
+            if stage_hist.due():
+                await stage_hist.flush(r)
+
             if not pop_result:
                 await asyncio.sleep(0.01)
 